@@ -1,48 +1,124 @@
 from flask import Flask
-from config import Config
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
-from flask_bootstrap import Bootstrap
+from config import Config
+from app.replica import RoutingSQLAlchemy
 
 '''
-create application object as an instance of class Flask
-__name__ is a predefined python variable set to the name of the module
-Flask uses location of where module is located as a starting point for other resources
+the extensions live at module level without an app, so models and views can
+import them. create_app builds a Flask app from a config class and binds them
+to it, every worker, `flask` command, benchmark or test calls it to get its own
+app instead of sharing one built at import time
 
-this app is an instance variable, not related to app package which is the directory
+setup db, sessions read GET requests from the replica when there is one, see app/replica.py
 '''
-app = Flask(__name__)
-
-'from "config" module read configuration from "Config" class'
-app.config.from_object(Config)
-
-'setup db'
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+db = RoutingSQLAlchemy()
 
-'setup login plugin'
-login = LoginManager(app)
 '''
+setup login plugin
 define which function is for login and force login on protected views
 protect views by using @login_required as a decorator on their functions
 '''
-login.login_view = 'login'
+login = LoginManager()
+login.login_view = 'auth.login'
 
-'setup bootstrap'
-bootstrap = Bootstrap(app)
+def create_app(config_class=Config):
+    '''
+    create application object as an instance of class Flask
+    __name__ is a predefined python variable set to the name of the module
+    Flask uses location of where module is located as a starting point for other resources
+    '''
+    app = Flask(__name__)
 
-'''
-import the routes module from our 'app' package which is the name of our directory
-this 'app' is a reference to the module, which is the same as the name of the directory
-where __init.py__ is located. this is saying import 'routes' function from 'app' module
-
-Another peculiarity is that the routes module is imported at the bottom 
-and not at the top of the script as it is always done. The bottom import 
-is a workaround to circular imports, a common problem with Flask 
-applications. You are going to see that the routes module needs to import 
-the app variable defined in this script, so putting one of the reciprocal 
-imports at the bottom avoids the error that results from the mutual 
-references between these two files.
-'''
-from app import routes, models
+    'from "config" module read configuration from the config class'
+    app.config.from_object(config_class)
+
+    'pool and connection settings of the database engine profile, see app/engine.py'
+    from app.engine import engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+    db.init_app(app)
+    login.init_app(app)
+
+    'setup bootstrap'
+    from flask_bootstrap import Bootstrap
+    Bootstrap(app)
+
+    'process-wide caches sized from this config, see app/models.py and app/fragments.py'
+    from app import models, fragments
+    models.init_app(app)
+    fragments.init_app(app)
+
+    '''
+    gzip/brotli compression of the pages and the API, see app/compression.py.
+    registered first so it runs after every other after_request hook
+    '''
+    from app import compression
+    compression.init_app(app)
+
+    'ETag and Last-Modified on the pages whose views ask for them, see app/conditional.py'
+    from app import conditional
+    conditional.init_app(app)
+
+    'background writer of the request audit log, see app/audit.py'
+    from app import audit
+    audit.init_app(app)
+
+    '''
+    one blueprint per area of the site, imported here rather than at the top so
+    importing the app package (models, forms, a CLI helper) does not import every
+    view, and so the views can import db and login from this module
+    '''
+    from app.auth import auth
+    app.register_blueprint(auth)
+
+    from app.requests import requests
+    app.register_blueprint(requests)
+
+    from app.planning import planning
+    app.register_blueprint(planning)
+
+    from app.resources import resources
+    app.register_blueprint(resources)
+
+    from app.budgets import budgets
+    app.register_blueprint(budgets)
+
+    'vendored, fingerprinted CSS, JS and fonts, see app/assets.py'
+    from app.assets import assets
+    app.register_blueprint(assets)
+
+    'read only archive of closed requests, see app/archive.py'
+    from app.archive import archive
+    app.register_blueprint(archive)
+
+    'JSON API for integrations, see app/api.py'
+    from app.api import api
+    app.register_blueprint(api, url_prefix='/api/v1')
+
+    'streaming CSV/NDJSON exports, see app/exports.py'
+    from app.exports import exports
+    app.register_blueprint(exports)
+
+    'live dashboard updates over server-sent events, see app/live.py'
+    from app.live import live
+    app.register_blueprint(live)
+
+    'request timing, slow query log and Prometheus /metrics, see app/metrics.py'
+    from app.metrics import metrics
+    app.register_blueprint(metrics)
+
+    'custom `flask` commands, see app/cli.py'
+    from app.cli import commands
+    app.register_blueprint(commands)
+
+    return app
+
+def init_migrations(app):
+    '''
+    `flask db` support from Flask-Migrate. Alembic is the single slowest import of
+    the app, and only the `flask` command needs it (see eventy.py), so web workers
+    built with create_app alone (see wsgi.py) never load it
+    '''
+    from flask_migrate import Migrate
+    Migrate(app, db)
+    return app
@@ -0,0 +1,256 @@
+from flask import Blueprint, current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.datastructures import MultiDict
+from app import db
+from app.forms import BudgetForm, RequestForm, ResourceForm, TaskForm
+from app.models import Budget, Request, Resource, Task
+from app.edits import route_back, stale
+from app import scheduler, workflow
+
+'''
+JSON API for integrations, mounted at /api/v1
+
+every endpoint takes a batch (a JSON list, or {"items": [...]}), validates every
+item with the same WTForms form the HTML views use, and writes the whole batch
+in one transaction with one commit. if any item fails validation nothing is
+written and the errors come back keyed by the item's position in the batch.
+role rules and assignment routing are the same as in the views.
+
+PATCH items may carry the "version" they were read with. if any row has been
+saved since, the whole batch is refused with a 409 listing the current versions.
+'''
+
+api = Blueprint('api', __name__)
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors
+
+@api.errorhandler(ApiError)
+def handle_api_error(e):
+    body = {'error': e.message}
+    if e.errors:
+        body['errors'] = e.errors
+    return jsonify(body), e.status
+
+@api.before_request
+def require_login():
+    'API clients get a 401 instead of the redirect to the login page'
+    if not current_user.is_authenticated:
+        return jsonify({'error': 'authentication required'}), 401
+
+def require_role(*roles):
+    if current_user.role not in roles:
+        raise ApiError('role {} is not allowed to do this'.format(current_user.role), 403)
+
+def batch():
+    'the list of items in the request body'
+    body = request.get_json(silent=True)
+    if isinstance(body, dict):
+        body = body.get('items')
+    if not isinstance(body, list) or not all(isinstance(item, dict) for item in body):
+        raise ApiError('expected a JSON list of objects, or {"items": [...]}')
+    if not body:
+        raise ApiError('empty batch')
+    if len(body) > current_app.config['API_MAX_BATCH']:
+        raise ApiError('batch larger than {} items'.format(current_app.config['API_MAX_BATCH']), 413)
+    return body
+
+def validate(form_class, items):
+    '''
+    run every item through form_class and return the forms. raises ApiError with
+    all the errors of the batch if any item is invalid
+    '''
+    forms = []
+    errors = {}
+    for i, item in enumerate(items):
+        formdata = MultiDict((k, str(v)) for k, v in item.items() if v is not None)
+        form = form_class(formdata=formdata, meta={'csrf': False})
+        if not form.validate():
+            errors[i] = form.errors
+        forms.append(form)
+    if errors:
+        raise ApiError('validation failed, nothing was written', 422, errors)
+    return forms
+
+def fetch(model, items):
+    'load the rows named by the "id" of each item with a single query, in item order'
+    try:
+        ids = [int(item['id']) for item in items]
+    except (KeyError, TypeError, ValueError):
+        raise ApiError('every item needs an integer "id"')
+    rows = dict((row.id, row) for row in model.query.filter(model.id.in_(ids)))
+    missing = [i for i in ids if i not in rows]
+    if missing:
+        raise ApiError('no {} with id {}'.format(model.__tablename__, ', '.join(map(str, missing))), 404)
+    return [rows[i] for i in ids]
+
+def check_versions(forms, rows):
+    'refuse the batch if any item was read at an older version than the saved row'
+    errors = dict((i, {'version': [row.version]}) for i, (form, row) in enumerate(zip(forms, rows)) if stale(row, form))
+    if errors:
+        raise ApiError('changed since it was read, nothing was written', 409, errors)
+
+def save(rows, status=200):
+    'one flush to get the ids, one commit for the whole batch'
+    db.session.add_all(rows)
+    try:
+        db.session.flush()
+        ids = [row.id for row in rows]
+        db.session.commit()
+    except StaleDataError:
+        # another writer got between our read and the conditional UPDATE
+        db.session.rollback()
+        raise ApiError('changed since it was read, nothing was written', 409)
+    return jsonify({'ids': ids, 'count': len(ids)}), status
+
+@api.route('/requests', methods=['POST'])
+def create_requests():
+    require_role('cso', 'scso')
+    forms = validate(RequestForm, batch())
+    reqs = []
+    for form in forms:
+        req = Request(client_name=form.client_name.data,
+            event_type=form.event_type.data, event_details=form.event_details.data,
+            client_budget=form.client_budget.data, feedback=form.feedback.data, status=form.status.data, created_by=current_user.username,
+            user_id=current_user.id)
+        workflow.apply(req, 'create', current_user)
+        reqs.append(req)
+    return save(reqs, 201)
+
+@api.route('/requests', methods=['PATCH'])
+def update_requests():
+    '''
+    items carry the request "id", the request fields and an optional workflow
+    "action" (submit by default, reject, services or production). the whole
+    batch is refused if any transition is not allowed
+    '''
+    if current_user.role is None or current_user.role == 'cso':
+        raise ApiError('role {} is not allowed to do this'.format(current_user.role), 403)
+    items = batch()
+    forms = validate(RequestForm, items)
+    reqs = fetch(Request, items)
+    check_versions(forms, reqs)
+    for item, form, req in zip(items, forms, reqs):
+        action = item.get('action') or 'submit'
+        try:
+            workflow.check(req, current_user.role, action)
+        except workflow.InvalidTransition as e:
+            raise ApiError(str(e), 409)
+        if action != 'reject':
+            req.client_name = form.client_name.data
+            req.event_type = form.event_type.data
+            req.event_details = form.event_details.data
+            req.client_budget = form.client_budget.data
+            req.feedback = form.feedback.data
+            req.status = form.status.data
+        workflow.apply(req, action, current_user)
+    return save(reqs)
+
+@api.route('/requests/transition', methods=['POST'])
+def transition_requests():
+    '''
+    {"ids": [...], "action": "submit"} fires one workflow action on many requests
+    with a single UPDATE, requests not in a state the action applies to are skipped.
+    if one changed while the batch was being moved nothing is written, 409
+    '''
+    body = request.get_json(silent=True)
+    ids = body.get('ids') if isinstance(body, dict) else None
+    # bool is an int too, true is not a request id
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ApiError('expected {"ids": [...], "action": "..."}')
+    if not ids:
+        raise ApiError('empty batch')
+    if len(ids) > current_app.config['API_MAX_BATCH']:
+        raise ApiError('batch larger than {} items'.format(current_app.config['API_MAX_BATCH']), 413)
+    # checked before the permission lookup, which would report a missing action as not allowed
+    action = body.get('action')
+    if not isinstance(action, str) or action not in workflow.ACTION_LABELS:
+        raise ApiError('validation failed, nothing was written', 422,
+            {'action': ['one of {}'.format(', '.join(sorted(workflow.ACTION_LABELS)))]})
+    try:
+        moved = workflow.transition_many(ids, action, current_user)
+    except workflow.InvalidTransition as e:
+        raise ApiError(str(e), 403)
+    except StaleDataError:
+        db.session.rollback()
+        raise ApiError('changed since it was read, nothing was written', 409)
+    db.session.commit()
+    return jsonify({'count': moved})
+
+@api.route('/tasks', methods=['POST'])
+def create_tasks():
+    'items carry the task fields and the "request" id they belong to'
+    require_role('sm', 'pm')
+    items = batch()
+    forms = validate(TaskForm, items)
+    parents = fetch(Request, [{'id': item.get('request')} for item in items])
+    subteam = current_user.role + 'tm'
+    tasks = []
+    for form, parent in zip(forms, parents):
+        task = Task(task_name=form.task_name.data, task_details=form.task_details.data,
+            subteam=subteam, request=parent.id, effort=form.effort.data or 1)
+        task.created_by = current_user.role
+        tasks.append(task)
+    # spread over the members of the subteam like tasks added on the site, see app/scheduler.py
+    scheduler.assign_new(subteam, tasks)
+    return save(tasks, 201)
+
+@api.route('/resources', methods=['POST'])
+def create_resources():
+    require_role('sm', 'pm')
+    resources = []
+    for form in validate(ResourceForm, batch()):
+        res = Resource(job_title=form.job_title.data, job_profile=form.job_profile.data,
+            experience_reqd=form.experience_reqd.data, salary_max=form.salary_max.data,
+            salary_min=form.salary_min.data)
+        res.created_by = current_user.role
+        res.assigned_to = 'hr'
+        resources.append(res)
+    return save(resources, 201)
+
+@api.route('/resources', methods=['PATCH'])
+def update_resources():
+    require_role('hr')
+    items = batch()
+    forms = validate(ResourceForm, items)
+    resources = fetch(Resource, items)
+    check_versions(forms, resources)
+    for form, res in zip(forms, resources):
+        res.job_title = form.job_title.data
+        res.job_profile = form.job_profile.data
+        res.experience_reqd = form.experience_reqd.data
+        res.salary_max = form.salary_max.data
+        res.salary_min = form.salary_min.data
+        route_back(res)
+    return save(resources)
+
+@api.route('/budgets', methods=['POST'])
+def create_budgets():
+    require_role('sm', 'pm')
+    budgets = []
+    for form in validate(BudgetForm, batch()):
+        budget = Budget(budget_for=form.budget_for.data, budget_quote=form.budget_quote.data,
+            budget_details=form.budget_details.data)
+        budget.created_by = current_user.role
+        budget.assigned_to = 'fm'
+        budgets.append(budget)
+    return save(budgets, 201)
+
+@api.route('/budgets', methods=['PATCH'])
+def update_budgets():
+    require_role('fm')
+    items = batch()
+    forms = validate(BudgetForm, items)
+    budgets = fetch(Budget, items)
+    check_versions(forms, budgets)
+    for form, budget in zip(forms, budgets):
+        budget.budget_for = form.budget_for.data
+        budget.budget_quote = form.budget_quote.data
+        budget.budget_details = form.budget_details.data
+        route_back(budget)
+    return save(budgets)
@@ -0,0 +1,118 @@
+from datetime import datetime
+from flask import Blueprint, abort, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import literal, select
+from app import db
+from app.live import record_changes
+from app.models import AuditEntry, Request, RequestArchive, Task, TaskArchive
+from app.pagination import keyset_page
+from app import readmodel, summary
+
+'''
+archive of closed requests
+
+a request is closed when it is rejected or handed to a planning team
+(Request.closed_at, set by app/workflow.py). `flask archive` moves requests
+closed more than ARCHIVE_AFTER_DAYS ago out of request and their tasks out of
+task, into request_archive and task_archive, so the live tables and their
+indexes only hold the working set however many years of events are kept.
+a request with a task still open (Task.completed_at is None) is still being
+worked on and stays live, whenever it was closed.
+
+requests move in batches of ARCHIVE_BATCH_SIZE, one transaction per batch: copy
+the rows, delete them from the live tables, take them off the summary counters
+and write changelog rows so the dashboards of every worker drop their cards.
+ids are kept, so the audit log of an archived request still belongs to it.
+archived requests are read only, /archive lists them and links to their tasks
+and history
+'''
+
+archive = Blueprint('archive', __name__)
+
+'columns copied from the live tables, all of the archive table but archived_at'
+REQUEST_COPY = [c.name for c in RequestArchive.__table__.columns if c.name != 'archived_at']
+TASK_COPY = [c.name for c in TaskArchive.__table__.columns]
+
+def archivable(cutoff):
+    'filter for the requests closed before cutoff that have no open task left'
+    open_task = db.session.query(Task.id).filter(Task.request == Request.id, Task.completed_at.is_(None))
+    return db.and_(Request.closed_at < cutoff, ~open_task.exists())
+
+def archive_batch(cutoff, batch_size):
+    '''
+    move up to batch_size requests closed before cutoff without open tasks, oldest
+    first, with their tasks, and commit. returns (requests, tasks) moved
+    '''
+    request_table, task_table = Request.__table__, Task.__table__
+    # locked until the commit on databases that support it, so an edit cannot slip in between
+    rows = db.session.query(Request.id, Request.assigned_to, Request.created_by, Request.status,
+        Request.tasks_for, Request.client_budget) \
+        .filter(archivable(cutoff)).order_by(Request.closed_at, Request.id) \
+        .limit(batch_size).with_for_update().all()
+    if not rows:
+        db.session.commit()
+        return 0, 0
+    ids = [row.id for row in rows]
+    connection = db.session.connection()
+    connection.execute(RequestArchive.__table__.insert().from_select(REQUEST_COPY + ['archived_at'],
+        select(*[request_table.c[name] for name in REQUEST_COPY] + [literal(datetime.utcnow())])
+            .where(request_table.c.id.in_(ids))))
+    connection.execute(TaskArchive.__table__.insert().from_select(TASK_COPY,
+        select(*[task_table.c[name] for name in TASK_COPY]).where(task_table.c.request.in_(ids))))
+    tasks = connection.execute(task_table.delete().where(task_table.c.request.in_(ids))).rowcount
+    moved = connection.execute(request_table.delete().where(request_table.c.id.in_(ids))).rowcount
+    # bulk statements skip the mapper events, keep the counters and changelog up to date here
+    changes = {}
+    for row in rows:
+        summary.merge(changes, summary.deltas(summary.REQUEST_METRICS, dict(row._mapping), None))
+    summary.apply(connection, changes)
+    record_changes(connection, [dict(request_id=row.id, assigned_to=None, previous_assigned_to=row.assigned_to,
+        created_by=None, previous_created_by=row.created_by) for row in rows])
+    db.session.info['requests_changed'] = True
+    db.session.commit()
+    return moved, tasks
+
+def archive_closed(cutoff, batch_size, log=print):
+    'the `flask archive` loop, returns (requests, tasks) moved in total'
+    total_requests = total_tasks = 0
+    while True:
+        moved, tasks = archive_batch(cutoff, batch_size)
+        if not moved:
+            return total_requests, total_tasks
+        total_requests += moved
+        total_tasks += tasks
+        log('archived {} requests and {} tasks'.format(total_requests, total_tasks))
+
+def archived(reqid):
+    'send a view asked for a request that is no longer live to its archived copy, 404 if there is none'
+    if db.session.get(RequestArchive, reqid) is None:
+        abort(404)
+    return redirect(url_for('archive.archived_request', reqid=reqid))
+
+# archived requests, newest first, optionally only clients whose name starts with q
+@archive.route('/archive', methods=['GET'])
+@login_required
+def archived_requests():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role == 'cso':
+        return redirect(url_for('requests.index'))
+    q = request.args.get('q', '').strip()
+    query = readmodel.archived_requests()
+    if q:
+        query = query.filter(RequestArchive.client_name.startswith(q, autoescape=True))
+    reqs = keyset_page(query, RequestArchive.id)
+    return render_template('archive.html', title='Archive', q=q, reqs=reqs)
+
+# one archived request with its tasks and history, read only
+@archive.route('/archive/<int:reqid>', methods=['GET'])
+@login_required
+def archived_request(reqid):
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role == 'cso':
+        return redirect(url_for('requests.index'))
+    req = readmodel.archived_requests().filter(RequestArchive.id == reqid).first_or_404()
+    tasks = readmodel.archived_tasks(request=req.id).order_by(TaskArchive.id).all()
+    entries = keyset_page(readmodel.audit_entries(request_id=req.id), AuditEntry.id)
+    return render_template('archived-request.html', title='Archived Request', req=req, tasks=tasks, entries=entries)
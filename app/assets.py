@@ -0,0 +1,154 @@
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+from flask import Blueprint, abort, current_app, request, url_for
+from app.compression import compress, negotiate
+
+'''
+self-hosted static assets
+
+Bootstrap, jQuery and the Glyphicons fonts are vendored under app/static/vendor
+instead of being pulled from a CDN, so pages load on a network without access
+to one. every file under app/static is served at /assets/ under a name with a
+hash of its content in it (vendor/jquery/1.12.4/jquery.min.<hash>.js), and
+templates link to it with asset_url('vendor/jquery/1.12.4/jquery.min.js').
+a changed file gets a new name, so browsers and proxies can keep each name for
+ASSET_MAX_AGE without asking again (Cache-Control immutable).
+
+the manifest of names is built once per process on first use: files are read,
+hashed and the url() references in stylesheets rewritten to the hashed names
+of what they point at, which is quick enough for the first page of a worker.
+text assets are compressed at the best level on the first request for each
+asset and encoding, and kept, so serving one after that is a dict lookup. with
+DEBUG on the manifest is rebuilt when a file under app/static changes
+'''
+
+assets = Blueprint('assets', __name__)
+
+'mimetypes worth compressing, fonts other than svg, ttf and eot are compressed already'
+COMPRESSIBLE = ('text/css', 'application/javascript', 'text/javascript', 'image/svg+xml', 'font/ttf',
+    'application/x-font-ttf', 'application/vnd.ms-fontobject')
+
+'url(...) in a stylesheet, with or without quotes, split into the path and the ?query or #fragment after it'
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'"?#)]+)([^'")]*)\1\s*\)''')
+SOURCE_MAP = re.compile(rb'\n?/[*/]# sourceMappingURL=[^\n]*')
+
+class Asset(object):
+    def __init__(self, name, body, mimetype):
+        self.name = name
+        self.mimetype = mimetype
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        root, ext = posixpath.splitext(name)
+        self.hashed_name = '{}.{}{}'.format(root, self.digest, ext)
+        self.encoded = {}
+        self._lock = threading.Lock()
+
+    def compressible(self, min_size):
+        return self.mimetype in COMPRESSIBLE and len(self.body) >= min_size
+
+    def encode(self, encoding):
+        '''
+        the body compressed with encoding at the best level, None if that is not
+        smaller. made on the first request that asks for it and kept, under this
+        asset's own lock so other assets are served meanwhile
+        '''
+        if encoding not in self.encoded:
+            with self._lock:
+                if encoding not in self.encoded:
+                    body = compress(self.body, encoding, 9)
+                    self.encoded[encoding] = body if len(body) < len(self.body) else None
+        return self.encoded[encoding]
+
+class Manifest(object):
+    def __init__(self, folder):
+        self.folder = folder
+        self.stamp = stamp(folder)
+        self.assets = {}
+        stylesheets = []
+        for name, path in walk(folder):
+            with open(path, 'rb') as f:
+                body = f.read()
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            if mimetype in ('text/css', 'application/javascript', 'text/javascript'):
+                # the source maps are not vendored, browsers would ask for them and get 404s
+                body = SOURCE_MAP.sub(b'', body)
+            if mimetype == 'text/css':
+                # hashed after the files they refer to, their content changes with those names
+                stylesheets.append((name, body))
+            else:
+                self.assets[name] = Asset(name, body, mimetype)
+        for name, body in stylesheets:
+            self.assets[name] = Asset(name, self.rewrite(name, body.decode('utf-8')).encode('utf-8'), 'text/css')
+        self.hashed = {asset.hashed_name: asset for asset in self.assets.values()}
+
+    def rewrite(self, name, css):
+        'point the relative url() references of stylesheet name at the hashed names'
+        base = posixpath.dirname(name)
+        def hashed(match):
+            quote, path, rest = match.groups()
+            target = self.assets.get(posixpath.normpath(posixpath.join(base, path)))
+            if target is None:
+                return match.group(0)
+            return 'url({0}{1}{2}{0})'.format(quote, posixpath.relpath(target.hashed_name, base), rest)
+        return CSS_URL.sub(hashed, css)
+
+def walk(folder):
+    'every file under folder as (name relative to folder with / separators, path)'
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for file in sorted(files):
+            path = os.path.join(root, file)
+            yield os.path.relpath(path, folder).replace(os.sep, '/'), path
+
+def stamp(folder):
+    return tuple((name, os.stat(path).st_mtime_ns) for name, path in walk(folder))
+
+_manifest = {'current': None}
+_lock = threading.Lock()
+
+def stale(current):
+    if current is None or current.folder != current_app.static_folder:
+        return True
+    return current_app.debug and current.stamp != stamp(current.folder)
+
+def manifest():
+    if stale(_manifest['current']):
+        with _lock:
+            if stale(_manifest['current']):
+                _manifest['current'] = Manifest(current_app.static_folder)
+    return _manifest['current']
+
+@assets.app_template_global()
+def asset_url(name):
+    'URL of the current version of static file name, e.g. asset_url(\'vendor/jquery/1.12.4/jquery.min.js\')'
+    return url_for('assets.asset', filename=manifest().assets[name].hashed_name)
+
+@assets.route('/assets/<path:filename>', methods=['GET'])
+def asset(filename):
+    found = manifest().hashed.get(filename)
+    if found is None:
+        abort(404)
+    response = current_app.response_class(status=200, mimetype=found.mimetype)
+    # weak, the same version is sent with different encodings
+    response.set_etag(found.digest, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['ASSET_MAX_AGE']
+    response.headers['Cache-Control'] += ', immutable'
+    compressible = found.compressible(current_app.config['COMPRESS_MIN_SIZE'])
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    if request.if_none_match.contains_weak(found.digest):
+        response.status_code = 304
+        return response
+    encoding = negotiate(request.accept_encodings) if compressible else None
+    body = found.encode(encoding) if encoding is not None else None
+    if body is None:
+        response.set_data(found.body)
+    else:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,167 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_request_context
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import AuditEntry, Request
+
+'''
+audit log of request changes
+
+records who moved a request between roles and who changed its status, budget
+or feedback, one AuditEntry per changed field. entries are diffed from the
+session at flush time and handed to an in-process queue when the transaction
+commits (rolled back changes are never logged). a background thread writes
+them in batches, one executemany per batch, every AUDIT_FLUSH_INTERVAL seconds
+or AUDIT_BATCH_SIZE entries, so the request itself never waits on the audit
+table.
+
+each app has its own queue and thread, see init_app. the queue is written out
+when the process exits normally. entries still queued
+when a worker is killed are lost, at most one interval worth.
+'''
+
+'Request columns that are audited'
+AUDITED = ('assigned_to', 'status', 'client_budget', 'feedback')
+
+def actor():
+    'username behind the change, None outside a request (CLI commands, imports)'
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.username
+    return None
+
+def text(value):
+    'stored form of a value, an empty string counts as no value'
+    return None if value is None or value == '' else str(value)[:120]
+
+def diff(req_id, before, after, changed_by, now=None):
+    'entries for the audited fields that differ between the before and after dicts'
+    now = now or datetime.utcnow()
+    return [dict(request_id=req_id, field=field, old_value=text(before.get(field)), new_value=text(after[field]),
+        changed_by=changed_by, changed_at=now)
+        for field in AUDITED if field in after and text(before.get(field)) != text(after[field])]
+
+def add(session, entries):
+    'queue entries with session\'s transaction, they are written once it commits'
+    session.info.setdefault('audit', []).extend(entries)
+
+class AuditWriter(object):
+    'background thread writing queued entries in batches'
+
+    STOP = object()
+
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.interval = app.config['AUDIT_FLUSH_INTERVAL']
+        self._queue = queue.Queue(app.config['AUDIT_QUEUE_SIZE'])
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def put(self, entries):
+        'blocks when the queue is full, so a stuck writer slows commits down instead of losing entries'
+        self._start()
+        for entry in entries:
+            self._queue.put(entry)
+
+    def flush(self, timeout=5):
+        'wait until everything queued so far is written'
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def stop(self, timeout=5):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(self.STOP)
+            self._thread.join(timeout)
+
+    def _start(self):
+        'the first put starts the thread'
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            waiting = []
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self.STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiting.append(item)
+                    break
+                batch.append(item)
+            self._write(batch)
+            for done in waiting:
+                done.set()
+
+    def _write(self, batch):
+        if not batch:
+            return
+        with self.app.app_context():
+            try:
+                with db.get_engine(self.app).begin() as connection:
+                    connection.execute(AuditEntry.__table__.insert(), batch)
+                self.written += len(batch)
+            except Exception:
+                self.app.logger.exception('audit writer dropped %d entries', len(batch))
+
+def init_app(app):
+    '''
+    every app gets its own writer, which writes through that app's engine whichever
+    app the process made first
+    '''
+    app.extensions['audit'] = AuditWriter(app)
+    atexit.register(app.extensions['audit'].stop)
+
+def writer():
+    'the AuditWriter of the current app'
+    return current_app.extensions['audit']
+
+@event.listens_for(Session, 'after_flush')
+def collect_entries(session, flush_context):
+    who = actor()
+    now = datetime.utcnow()
+    entries = []
+    for obj in session.new:
+        if isinstance(obj, Request):
+            entries.extend(diff(obj.id, {}, dict((f, getattr(obj, f)) for f in AUDITED), who, now))
+    for obj in session.dirty:
+        if isinstance(obj, Request):
+            state = db.inspect(obj)
+            before, after = {}, {}
+            for field in AUDITED:
+                history = state.attrs[field].history
+                if history.added or history.deleted:
+                    before[field] = history.deleted[0] if history.deleted else None
+                    after[field] = history.added[0] if history.added else None
+            entries.extend(diff(obj.id, before, after, who, now))
+    if entries:
+        add(session, entries)
+
+@event.listens_for(Session, 'after_commit')
+def queue_entries(session):
+    entries = session.info.pop('audit', None)
+    if entries:
+        writer().put(entries)
+
+@event.listens_for(Session, 'after_rollback')
+def drop_entries(session):
+    session.info.pop('audit', None)
@@ -0,0 +1,76 @@
+from flask import Blueprint, current_app, render_template, flash, redirect, request, url_for
+from flask_login import current_user, login_user, logout_user
+from werkzeug.urls import url_parse
+from app import db
+from app.forms import LoginForm, RegistrationForm
+from app.models import User
+from app.passwords import HashingBusy
+
+'sign in, sign out and registering users'
+auth = Blueprint('auth', __name__)
+
+def busy(page):
+    'page as the answer to a sign-in the password hashing pool had no room for'
+    return page, 503, {'Retry-After': str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])}
+
+@auth.route('/login', methods=['GET', 'POST'])
+def login():
+    'login a user that is already authenticated'
+    if current_user.is_authenticated:
+        return redirect(url_for('requests.index'))
+
+    form = LoginForm()
+    'if POST request, run validators to check data'
+    if form.validate_on_submit():
+        'user has to exist in DB before they can login, we query DB by username provided in form'
+        user = User.query.filter_by(username=form.username.data).first()
+        'if username doesn\'t exist or password is incorrect, redirect to login page'
+        try:
+            if user is None or not user.check_password(form.password.data):
+                flash('Invalid username or password')
+                return redirect(url_for('auth.login'))
+        except HashingBusy:
+            flash('Too many sign-ins right now, please try again in a moment')
+            return busy(render_template('login.html', title='Sign In', form=form))
+        'upgrade the stored hash if the hashing policy in Config changed since it was made'
+        if user.password_needs_rehash():
+            try:
+                user.set_password(form.password.data)
+                db.session.commit()
+            except HashingBusy:
+                'the password is right, the upgrade waits for a sign-in when the pool has room'
+                pass
+        login_user(user, remember=form.remember_me.data) 
+        'if credentials are correct, store session as login_user and continue to home page'
+        next_page = request.args.get('next') 
+        'if request comes from login page it has a redirect url already, get that'
+        'also check using url_parse whether next_page doesn\'t have a full url to some other domain (could be a malicious attack). in that case go to index instead'
+        if not next_page or url_parse(next_page).netloc != '':
+            next_page = url_for('requests.index')    
+        return redirect(next_page)
+    return render_template('login.html', title='Sign In', form=form)
+
+@auth.route('/logout')
+def logout():
+    logout_user()
+    return redirect(url_for('requests.index'))
+
+@auth.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('requests.index'))
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        user = User(name=form.name.data, username=form.username.data, 
+            email=form.email.data, role=form.role.data)
+        try:
+            user.set_password(form.password.data)
+        except HashingBusy:
+            flash('Server is busy, please try again in a moment')
+            return busy(render_template('register.html', title='Register User', form=form))
+
+        db.session.add(user)
+        db.session.commit()
+        flash('User ' + form.username.data + ' added successfully!')
+        return redirect(url_for('auth.login'))
+    return render_template('register.html', title='Register User', form=form)
@@ -0,0 +1,88 @@
+from flask import Blueprint, render_template, flash, redirect, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy.orm.exc import StaleDataError
+from app import db
+from app.edits import conflict, route_back, stale
+from app.forms import BudgetForm
+from app.models import Budget
+from app.notifications import notify_assignees
+from app.pagination import keyset_page
+from app import conditional, readmodel
+
+'budget requests between the planning managers and finance'
+budgets = Blueprint('budgets', __name__)
+
+@budgets.route('/new-budget', methods=['GET', 'POST'])
+@login_required
+def new_budget():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'sm' and current_user.role != 'pm':
+        return redirect(url_for('requests.index'))
+    
+    form = BudgetForm()
+
+    if form.validate_on_submit():
+        budget = Budget(budget_for=form.budget_for.data, budget_quote=form.budget_quote.data,
+            budget_details=form.budget_details.data)
+        budget.created_by = current_user.role
+        budget.assigned_to = 'fm'
+
+        db.session.add(budget)
+        db.session.flush()
+        notify_assignees.delay('budget', [budget.id])
+        db.session.commit()
+        
+        flash('Budget request raised successfully!')
+        return redirect(url_for('requests.index'))
+
+    return render_template('budget.html', title='Budget Request Form', form=form)
+
+@budgets.route('/all-budgets', methods=['GET'])
+@login_required
+def all_budgets():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'pm':
+        return redirect(url_for('requests.index'))
+    
+    unchanged = conditional.not_modified(conditional.fingerprint(Budget, assigned_to=current_user.role))
+    if unchanged:
+        return unchanged
+    # get all budget requests
+    budgets = keyset_page(readmodel.budgets(assigned_to=current_user.role), Budget.id)
+    return render_template('all-budgets.html', title='Budget Requests', budgets=budgets)
+
+@budgets.route('/update-budget/<budgetid>', methods=['GET', 'POST'])
+@login_required
+def update_budget(budgetid):
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'fm':
+        return redirect(url_for('requests.index'))
+
+    budget = Budget.query.filter_by(id=budgetid).first_or_404()
+    form = BudgetForm()
+
+    if form.validate_on_submit():
+        if stale(budget, form):
+            return conflict(budget, form, 'budgets.update_budget', budgetid=budget.id)
+        budget.budget_for = form.budget_for.data
+        budget.budget_quote = form.budget_quote.data
+        budget.budget_details = form.budget_details.data
+        route_back(budget)
+        db.session.add(budget)
+        notify_assignees.delay('budget', [budget.id])
+        try:
+            db.session.commit()
+        except StaleDataError:
+            return conflict(budget, form, 'budgets.update_budget', budgetid=budget.id)
+        flash('Budget request updated successfully!')
+        return redirect(url_for('requests.index'))
+    elif request.method == 'GET':
+        form.budget_for.data = budget.budget_for
+        form.budget_quote.data = budget.budget_quote
+        form.budget_details.data = budget.budget_details
+        form.version.data = budget.version
+        
+    return render_template('budget.html', title='Update Budget Request', budget=budget, form=form)
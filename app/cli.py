@@ -0,0 +1,274 @@
+import csv
+import itertools
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+import click
+from flask import Blueprint, current_app
+from app import db, readmodel, summary
+from app.models import Budget, ImportCheckpoint, Request, RequestChange, Resource, Task
+
+'''
+custom `flask` commands, registered on app.cli next to the `flask db` commands
+from Flask-Migrate. they hang off a blueprint without a cli group, so they are
+top level commands of every app create_app builds
+'''
+commands = Blueprint('commands', __name__, cli_group=None)
+
+def keyset(query, column, after):
+    'same shape as app.pagination.keyset_page builds for a list view'
+    if after is not None:
+        query = query.filter(column < after)
+    return query.order_by(column.desc()).limit(26)
+
+'''
+the list view queries, built exactly like the routes build them. any sample value
+works since the planner only looks at the shape of the query
+'''
+DASHBOARD_QUERIES = {
+    'index (assigned)': lambda after: keyset(readmodel.request_cards(assigned_to='scso'), Request.id, after),
+    'index (updated)': lambda after: keyset(readmodel.request_cards(created_by='cso'), Request.id, after),
+    'pending_updates': lambda after: keyset(readmodel.request_cards(assigned_to='fm'), Request.id, after),
+    'planning_dashboard': lambda after: keyset(readmodel.request_cards(tasks_for='services'), Request.id, after),
+    'view_tasks': lambda after: keyset(readmodel.tasks(subteam='smtm'), Task.id, after),
+    'tasks of a request': lambda after: keyset(Task.query.filter_by(request=1), Task.id, after),
+    'all_resources': lambda after: keyset(readmodel.resources(assigned_to='hr'), Resource.id, after),
+    'all_budgets': lambda after: keyset(readmodel.budgets(assigned_to='pm'), Budget.id, after),
+}
+
+def table_walks(query):
+    '''
+    run EXPLAIN QUERY PLAN on query and return the plan lines that walk the table
+    instead of seeking into an index: a plain "SCAN <table>", a rowid range
+    ("USING INTEGER PRIMARY KEY (rowid<?)") and a sort in a temp b-tree
+    '''
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    plan = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + str(compiled))).fetchall()
+    walks = []
+    for detail in (row[-1] for row in plan):
+        if detail.startswith('SCAN') and 'INDEX' not in detail:
+            walks.append(detail)
+        elif 'USING INTEGER PRIMARY KEY' in detail and '=' not in detail:
+            walks.append(detail)
+        elif 'TEMP B-TREE' in detail:
+            walks.append(detail)
+    return walks
+
+@commands.cli.command('check-query-plans')
+def check_query_plans():
+    'Fail if any dashboard query falls back to a full table scan (SQLite only).'
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException('EXPLAIN QUERY PLAN check only runs against SQLite')
+    failed = False
+    for name, build in DASHBOARD_QUERIES.items():
+        # first page and a page further down
+        walks = table_walks(build(None)) + table_walks(build(1000))
+        if walks:
+            failed = True
+            click.echo('FAIL {}: {}'.format(name, '; '.join(sorted(set(walks)))))
+        else:
+            click.echo('ok   {}'.format(name))
+    if failed:
+        raise click.ClickException('some dashboard queries walk the whole table, is the database at `flask db upgrade` head?')
+
+
+@commands.cli.group('import')
+def import_data():
+    '''Bulk import historical requests and tasks from CSV or NDJSON files.
+
+    Files are streamed in fixed-size chunks, each chunk is one executemany
+    INSERT and one commit. Progress is stored in the import_checkpoint table in
+    the same commit, so re-running the same command after a failure resumes
+    after the last committed chunk.
+    '''
+    pass
+
+def read_rows(path, fmt):
+    'stream dicts from a CSV file (header row) or an NDJSON file (one object per line)'
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield row
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+def to_mapping(model, row, defaults):
+    'keep only the model\'s columns and convert values to the column types'
+    mapping = dict(defaults)
+    for column in model.__table__.columns:
+        if column.name not in row:
+            continue
+        value = row[column.name]
+        if value == '' or value is None:
+            value = None
+        elif isinstance(column.type, db.Boolean) and isinstance(value, str):
+            value = value.strip().lower() in ('1', 'true', 't', 'yes', 'y')
+        elif isinstance(column.type, db.Integer):
+            value = int(value)
+        # exports write datetimes as str() does, '2021-10-18 22:10:12.603417', which fromisoformat reads back
+        elif isinstance(column.type, db.DateTime) and isinstance(value, str):
+            value = datetime.fromisoformat(value.strip())
+        elif isinstance(column.type, db.Date) and isinstance(value, str):
+            value = date.fromisoformat(value.strip())
+        mapping[column.name] = value
+    return mapping
+
+def run_import(model, path, fmt, chunk_size, restart, defaults):
+    if fmt is None:
+        fmt = 'csv' if path.lower().endswith('.csv') else 'ndjson'
+    chunk_size = chunk_size or current_app.config['IMPORT_CHUNK_SIZE']
+    source = '{}:{}'.format(model.__tablename__, os.path.abspath(path))
+
+    checkpoint = ImportCheckpoint.query.filter_by(source=source).first()
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(source=source, rows_done=0, finished=False)
+        db.session.add(checkpoint)
+        db.session.commit()
+    elif restart:
+        checkpoint.rows_done = 0
+        checkpoint.finished = False
+        db.session.commit()
+    elif checkpoint.finished:
+        click.echo('{} was already imported ({} rows), use --restart to import it again'.format(path, checkpoint.rows_done))
+        return
+    elif checkpoint.rows_done:
+        click.echo('resuming {} after row {}'.format(path, checkpoint.rows_done))
+
+    rows = read_rows(path, fmt)
+    # skip what earlier runs already committed, still streaming
+    for _ in itertools.islice(rows, checkpoint.rows_done):
+        pass
+
+    started = time.perf_counter()
+    imported = 0
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        first = checkpoint.rows_done + 1
+        try:
+            mappings = [to_mapping(model, row, defaults) for row in chunk]
+            db.session.bulk_insert_mappings(model, mappings)
+            # bulk inserts skip the mapper events that keep the summary counters
+            if model in summary.METRICS:
+                changes = {}
+                for mapping in mappings:
+                    summary.merge(changes, summary.deltas(summary.METRICS[model], None, mapping))
+                summary.apply(db.session.connection(), changes)
+            checkpoint.rows_done += len(chunk)
+            checkpoint.updated = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException('chunk starting at row {} failed, nothing from it was written: {}. '
+                'Fix the file and re-run to resume from that row'.format(first, e))
+        imported += len(chunk)
+        elapsed = time.perf_counter() - started
+        click.echo('{} rows committed ({:.0f} rows/sec)'.format(checkpoint.rows_done, imported / elapsed))
+
+    checkpoint.finished = True
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+    click.echo('imported {} {} rows in {:.1f}s ({:.0f} rows/sec)'.format(
+        imported, model.__tablename__, elapsed, imported / elapsed if elapsed else 0))
+
+def import_options(f):
+    f = click.argument('path', type=click.Path(exists=True, dir_okay=False))(f)
+    f = click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+        help='Input format, guessed from the file extension by default.')(f)
+    f = click.option('--chunk-size', type=int, default=None,
+        help='Rows per INSERT and commit, IMPORT_CHUNK_SIZE by default.')(f)
+    f = click.option('--restart', is_flag=True, help='Ignore the saved checkpoint and import from the first row.')(f)
+    return f
+
+@import_data.command('requests')
+@import_options
+def import_requests(path, fmt, chunk_size, restart):
+    'Import requests. Columns are Request column names, unknown columns are ignored.'
+    run_import(Request, path, fmt, chunk_size, restart, {'status': 'Open'})
+
+@import_data.command('tasks')
+@import_options
+def import_tasks(path, fmt, chunk_size, restart):
+    'Import tasks. Columns are Task column names, "request" is the id of the parent request.'
+    run_import(Task, path, fmt, chunk_size, restart, {})
+
+
+@commands.cli.command('prune-changes')
+@click.option('--hours', type=int, default=None, help='Keep this many hours, LIVE_CHANGELOG_HOURS by default.')
+def prune_changes(hours):
+    'Delete request changelog rows older than the live dashboards need.'
+    hours = hours if hours is not None else current_app.config['LIVE_CHANGELOG_HOURS']
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    deleted = RequestChange.query.filter(RequestChange.changed_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo('deleted {} changelog rows older than {} hours'.format(deleted, hours))
+
+
+@commands.cli.command('archive')
+@click.option('--days', type=int, default=None, help='Archive requests closed longer ago, ARCHIVE_AFTER_DAYS by default.')
+@click.option('--batch-size', type=int, default=None, help='Requests per transaction, ARCHIVE_BATCH_SIZE by default.')
+@click.option('--dry-run', is_flag=True, help='Only count what would be archived.')
+def archive_requests(days, batch_size, dry_run):
+    'Move closed requests whose tasks are all done, with their tasks, to the archive tables.'
+    from app.archive import archivable, archive_closed
+    days = days if days is not None else current_app.config['ARCHIVE_AFTER_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    if dry_run:
+        count = Request.query.filter(archivable(cutoff)).count()
+        click.echo('{} requests closed more than {} days ago would be archived'.format(count, days))
+        return
+    requests, tasks = archive_closed(cutoff, batch_size or current_app.config['ARCHIVE_BATCH_SIZE'], log=click.echo)
+    click.echo('archived {} requests and {} tasks closed more than {} days ago'.format(requests, tasks, days))
+
+
+@commands.cli.command('rebuild-summary')
+def rebuild_summary():
+    'Recompute the workflow summary counters from the request and budget tables.'
+    summary.rebuild()
+    db.session.commit()
+    click.echo('summary counters rebuilt')
+
+
+@commands.cli.command('assign-tasks')
+@click.option('--subteam', type=click.Choice(['smtm', 'pmtm']), multiple=True, help='Only this subteam, both by default.')
+@click.option('--rebalance', is_flag=True, help='Also move open tasks to even out the work of the members.')
+@click.option('--load', 'load_by', type=click.Choice(['count', 'effort']), default=None,
+    help='Count open tasks or sum their estimated effort, TASK_LOAD by default.')
+def assign_tasks(subteam, rebalance, load_by):
+    'Assign open tasks nobody has to the least loaded members of their subteam.'
+    from app import scheduler
+    for team in subteam or ('smtm', 'pmtm'):
+        started = time.perf_counter()
+        if rebalance:
+            new, moved = scheduler.rebalance(team, load_by)
+        else:
+            new, moved = scheduler.auto_assign(team, load_by), {}
+        db.session.commit()
+        click.echo('{}: {} tasks assigned, {} moved in {:.0f} ms, open load now {}'.format(team, len(new), len(moved),
+            (time.perf_counter() - started) * 1000, scheduler.loads(team, scheduler.members(team), load_by)))
+
+
+@commands.cli.command('worker')
+@click.option('--threads', type=int, default=4, help='Jobs run at the same time.')
+@click.option('--poll', type=float, default=None, help='Seconds between looks at the queue when it is empty.')
+@click.option('--once', is_flag=True, help='Run what is due and exit.')
+def worker(threads, poll, once):
+    'Run queued background jobs, retries and jobs left behind by web processes.'
+    from app.jobs import work
+    work(threads, poll if poll is not None else current_app.config['JOB_POLL_INTERVAL'], once, log=click.echo)
+
+
+@commands.cli.command('seed')
+@click.option('--requests', 'count', type=int, default=1000, help='Requests to add.')
+@click.option('--seed', type=int, default=0, help='Random seed, the same seed gives the same data.')
+@click.option('--users-per-role', type=int, default=2)
+def seed_data(count, seed, users_per_role):
+    'Fill the database with synthetic users, requests, tasks, budgets and resources.'
+    from app.seed import generate
+    generate(count, seed, users_per_role)
+    click.echo('added {} requests, users are <role><n> with password "password"'.format(count))
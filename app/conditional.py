@@ -0,0 +1,97 @@
+import hashlib
+import os
+import time
+from datetime import datetime
+from flask import current_app, g, request, session
+from flask_login import current_user
+from app import db
+
+'''
+conditional GET for the dashboards and detail pages
+
+Request, Task, Resource and Budget carry an updated_at that every insert and
+update sets. a view first reads a cheap fingerprint of what its page shows, the
+newest updated_at and the row count of its list (one index range scan over
+the (filter, updated_at) indexes), and passes it to not_modified(). when the
+browser's If-None-Match still matches, the view returns 304 right there, before
+the list queries and the template. otherwise the page it renders goes out with
+that ETag, so the next poll can be answered the same way.
+
+the ETag also covers the user, the query string (the page of the list) and the
+templates, so a deploy or another page never matches. the count is what catches
+rows leaving a list, which does not move the newest updated_at of the rows left
+in it. for the same reason the 304 is decided on the ETag alone: Last-Modified
+is sent for caches and people, If-Modified-Since is not trusted. pages with a
+form get a new ETag every half CSRF token lifetime, so a revalidated page never
+carries an expired token, and pages with flashed messages are never answered
+with 304
+'''
+
+_release = {'tag': None}
+
+def release():
+    '''
+    names, sizes and times of the templates and of the static files (whose hashed
+    names are in the pages), stands for the deployed version of the pages
+    '''
+    if _release['tag'] is None:
+        digest = hashlib.sha1()
+        for folder in (os.path.join(current_app.root_path, current_app.template_folder), current_app.static_folder):
+            for root, dirs, files in os.walk(folder):
+                dirs.sort()
+                for name in sorted(files):
+                    stat = os.stat(os.path.join(root, name))
+                    digest.update('{}/{} {} {}\n'.format(root, name, stat.st_size, stat.st_mtime_ns).encode())
+        _release['tag'] = digest.hexdigest()[:12]
+    return _release['tag']
+
+def fingerprint(model, **filters):
+    '(newest updated_at, row count) of the rows of model matching filters, keywords as for Query.filter_by'
+    return tuple(db.session.query(db.func.max(model.updated_at), db.func.count()).select_from(model)
+        .filter_by(**filters).one())
+
+def newest(parts):
+    'latest datetime anywhere in parts, for Last-Modified'
+    found = []
+    for part in parts:
+        if isinstance(part, datetime):
+            found.append(part)
+        elif isinstance(part, (tuple, list)):
+            found.append(newest(part))
+    found = [f for f in found if f is not None]
+    return max(found) if found else None
+
+def not_modified(*parts, forms=False):
+    '''
+    call at the top of a GET view with the values its page depends on. returns a
+    304 response when the browser already has this version of the page, else None
+    and the page the view renders gets the validators
+    '''
+    if request.method != 'GET' or '_flashes' in session:
+        return None
+    key = [release(), current_user.get_id(), request.full_path, parts]
+    limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    if forms and limit:
+        key.append(int(time.time() // (limit / 2)))
+    g.etag = hashlib.sha1(repr(key).encode()).hexdigest()
+    g.last_modified = newest(parts)
+    if request.if_none_match.contains_weak(g.etag):
+        return validated(current_app.response_class(status=304))
+    return None
+
+def validated(response):
+    response.set_etag(g.etag, weak=True)
+    if g.last_modified is not None:
+        response.last_modified = g.last_modified
+    # every user sees their own version, and it has to be revalidated every time
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Cookie')
+    return response
+
+def add_validators(response):
+    if 'etag' in g and response.status_code == 200:
+        validated(response)
+    return response
+
+def init_app(app):
+    app.after_request(add_validators)
@@ -0,0 +1,43 @@
+from flask import render_template, url_for
+from flask_login import current_user
+from app import db
+from app.models import Budget, Request, Resource
+
+'''
+helpers shared by the edit views of the blueprints and by the JSON API
+'''
+
+'fields compared on the edit conflict page'
+CONFLICT_FIELDS = {
+    Request: ['client_name', 'event_type', 'event_details', 'client_budget', 'feedback', 'status'],
+    Resource: ['job_title', 'job_profile', 'experience_reqd', 'salary_max', 'salary_min'],
+    Budget: ['budget_for', 'budget_quote', 'budget_details'],
+}
+
+def stale(item, form):
+    'true if item was saved by someone else after form was filled from it'
+    return bool(form.version.data) and form.version.data != str(item.version)
+
+def conflict(item, form, endpoint, **values):
+    '''
+    roll back and show the user's edits next to what is saved now, with a link to
+    edit the saved version. every edit is a single UPDATE ... WHERE version = ?,
+    so no lock is held while the form is open
+    '''
+    db.session.rollback()
+    rows = [(getattr(form, name).label.text, getattr(form, name).data, getattr(item, name))
+        for name in CONFLICT_FIELDS[type(item)]]
+    return render_template('conflict.html', title='Edit Conflict', item=item, rows=rows,
+        retry_url=url_for(endpoint, **values)), 409
+
+def route_back(item):
+    'hand a resource or budget request back to whoever did not just act on it'
+    if current_user.role == 'hr':
+        if item.created_by == 'sm':
+            item.assigned_to = 'sm'
+        elif item.created_by == 'pm':
+            item.assigned_to = 'pm'
+        else:
+            item.assigned_to = 'hr'
+    elif current_user.role == 'sm' or current_user.role == 'pm':
+        item.assigned_to = 'hr'
@@ -0,0 +1,98 @@
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+'''
+database engine profiles, picked with DATABASE_PROFILE and applied before the
+engine is created (see app/__init__.py)
+
+- sqlite: a file database in WAL mode, so readers keep reading while
+  update_request writes. synchronous=NORMAL, busy_timeout, mmap_size and
+  cache_size are set on every new connection, and connections are kept in a pool
+  instead of being reopened for every request
+- server: pooled connections to PostgreSQL (or any other server database) with
+  pool sizing, pre-ping and recycling, and a statement timeout on PostgreSQL
+- plain: SQLAlchemy and Flask-SQLAlchemy defaults, no tuning
+
+when DATABASE_PROFILE is unset it follows DATABASE_URL: sqlite for sqlite urls,
+server for everything else
+'''
+
+PROFILES = ('sqlite', 'server', 'plain')
+
+JOURNAL_MODES = ('DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF')
+SYNCHRONOUS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+'PRAGMA statements run on every new SQLite connection, filled in by engine_options()'
+_pragmas = []
+
+def profile_of(config):
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    profile = config.get('DATABASE_PROFILE')
+    if not profile:
+        return 'sqlite' if url.get_backend_name() == 'sqlite' else 'server'
+    if profile not in PROFILES:
+        raise ValueError('DATABASE_PROFILE must be one of {}, not {!r}'.format(', '.join(PROFILES), profile))
+    return profile
+
+def sqlite_pragmas(config):
+    journal_mode = config['SQLITE_JOURNAL_MODE'].upper()
+    synchronous = config['SQLITE_SYNCHRONOUS'].upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError('SQLITE_JOURNAL_MODE must be one of {}'.format(', '.join(JOURNAL_MODES)))
+    if synchronous not in SYNCHRONOUS:
+        raise ValueError('SQLITE_SYNCHRONOUS must be one of {}'.format(', '.join(SYNCHRONOUS)))
+    # busy_timeout first, switching the journal mode needs the write lock
+    return [
+        'PRAGMA busy_timeout = {:d}'.format(int(config['SQLITE_BUSY_TIMEOUT'])),
+        'PRAGMA journal_mode = {}'.format(journal_mode),
+        'PRAGMA synchronous = {}'.format(synchronous),
+        'PRAGMA cache_size = {:d}'.format(int(config['SQLITE_CACHE_SIZE'])),
+        'PRAGMA mmap_size = {:d}'.format(int(config['SQLITE_MMAP_SIZE'])),
+    ]
+
+def engine_options(config):
+    'SQLALCHEMY_ENGINE_OPTIONS for the selected profile'
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    profile = profile_of(config)
+    del _pragmas[:]
+    if profile == 'plain':
+        return {}
+    if profile == 'sqlite':
+        if url.get_backend_name() != 'sqlite':
+            raise ValueError('DATABASE_PROFILE sqlite needs a sqlite DATABASE_URL')
+        _pragmas.extend(sqlite_pragmas(config))
+        if url.database in (None, '', ':memory:'):
+            # Flask-SQLAlchemy keeps an in-memory database on a single connection
+            return {}
+        # sqlite3 only checks the thread a connection was made in, the pool hands
+        # each connection to one thread at a time
+        return {
+            'poolclass': QueuePool,
+            'pool_size': config['DATABASE_POOL_SIZE'],
+            'max_overflow': config['DATABASE_MAX_OVERFLOW'],
+            'pool_timeout': config['DATABASE_POOL_TIMEOUT'],
+            'connect_args': {'check_same_thread': False},
+        }
+    options = {
+        'pool_size': config['DATABASE_POOL_SIZE'],
+        'max_overflow': config['DATABASE_MAX_OVERFLOW'],
+        'pool_timeout': config['DATABASE_POOL_TIMEOUT'],
+        'pool_recycle': config['DATABASE_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+    if url.get_backend_name() == 'postgresql' and config['DATABASE_STATEMENT_TIMEOUT']:
+        options['connect_args'] = {'options': '-c statement_timeout={:d}'.format(int(config['DATABASE_STATEMENT_TIMEOUT']))}
+    return options
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not _pragmas or not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _pragmas:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
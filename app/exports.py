@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+from flask_login import current_user, login_required
+from app import db
+from app.models import Budget, Request, Resource, Task
+
+'''
+streaming CSV / NDJSON exports of the list views
+
+rows are read with a server-side cursor (stream_results + yield_per) as plain
+column tuples and written out by a generator, so the first bytes leave before
+the query has finished and memory use does not grow with the number of rows.
+each export applies the same role based filter as the view it mirrors.
+'''
+
+exports = Blueprint('exports', __name__)
+
+def request_filter():
+    '''
+    ?scope=assigned (default) is the pending updates / index list, created the
+    "updated by me" list and planning the SM/PM planning dashboard
+    '''
+    scope = request.args.get('scope', 'assigned')
+    if scope == 'assigned':
+        return Request.assigned_to == current_user.role
+    if scope == 'created':
+        return Request.created_by == current_user.username
+    if scope == 'planning':
+        if current_user.role == 'sm':
+            return Request.tasks_for == 'services'
+        if current_user.role == 'pm':
+            return Request.tasks_for == 'production'
+        abort(403)
+    abort(400)
+
+def task_filter():
+    'same subteam rule as view_tasks'
+    if current_user.role not in ('sm', 'pm', 'smtm', 'pmtm'):
+        abort(403)
+    if current_user.role in ('smtm', 'pmtm'):
+        return Task.subteam == current_user.role
+    return Task.subteam == current_user.role + 'tm'
+
+def resource_filter():
+    if current_user.role != 'hr':
+        abort(403)
+    return Resource.assigned_to == current_user.role
+
+def budget_filter():
+    'budgets raised by SM/PM are assigned to FM, so finance can export theirs as well'
+    if current_user.role not in ('pm', 'fm'):
+        abort(403)
+    return Budget.assigned_to == current_user.role
+
+'export name -> (model, function returning the filter for current_user)'
+EXPORTS = {
+    'requests': (Request, request_filter),
+    'tasks': (Task, task_filter),
+    'resources': (Resource, resource_filter),
+    'budgets': (Budget, budget_filter),
+}
+
+def stream_rows(model, criterion):
+    columns = list(model.__table__.columns)
+    query = db.session.query(*columns).filter(criterion).order_by(model.id) \
+        .execution_options(stream_results=True).yield_per(current_app.config['EXPORT_BATCH_SIZE'])
+    return [c.name for c in columns], query
+
+def csv_lines(names, rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(names)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        # hand the buffered lines to the server every few hundred rows
+        if i % 500 == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+def ndjson_lines(names, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), default=str) + '\n'
+
+@exports.route('/export/<name>.<fmt>', methods=['GET'])
+@login_required
+def export(name, fmt):
+    if name not in EXPORTS or fmt not in ('csv', 'ndjson'):
+        abort(404)
+    if current_user.role is None:
+        abort(403)
+    model, build_filter = EXPORTS[name]
+    names, rows = stream_rows(model, build_filter())
+    if fmt == 'csv':
+        body, mimetype = csv_lines(names, rows), 'text/csv'
+    else:
+        body, mimetype = ndjson_lines(names, rows), 'application/x-ndjson'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(name, fmt)
+    return response
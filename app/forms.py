@@ -1,10 +1,8 @@
-from typing import Text
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, SubmitField, RadioField
-from wtforms.fields.core import DateField, IntegerField, Label
+from wtforms import StringField, PasswordField, BooleanField, SubmitField, RadioField, SelectField, HiddenField
+from wtforms.fields.core import IntegerField
 from wtforms.fields.simple import TextAreaField, TextField
-from wtforms.validators import DataRequired, Email, EqualTo, NumberRange, ValidationError
-from wtforms.widgets.core import TextArea
+from wtforms.validators import DataRequired, Email, EqualTo, NumberRange, Optional, ValidationError
 from app.models import User
 
 class LoginForm(FlaskForm):
@@ -52,15 +50,32 @@ class RequestForm(FlaskForm):
     servicessubmit = SubmitField('Send to Services Team')
     productionsubmit = SubmitField('Send to Production Team')
     closesubmit = SubmitField('Reject')
+    'version of the row the form was filled from, a stale one gets the conflict page instead of saving'
+    version = HiddenField()
+
+
+class BulkTransitionForm(FlaskForm):
+    'the ticked request ids are read from request.form as "ids", choices depend on the role'
+    action = SelectField('Action', choices=[])
+    submit = SubmitField('Apply to selected')
 
 
 class TaskForm(FlaskForm):
     task_name = StringField('Task Name', validators=[DataRequired()])
     task_details = TextAreaField('Task Details', validators=[DataRequired()])
     subteam = StringField('Subteam', default=None)
+    effort = IntegerField('Estimated Effort (hours)', default=1, validators=[Optional(), NumberRange(min=1)])
     linked_to = TextField('Linked Request ID:')
     submit = SubmitField('Submit')
 
+class AssignTasksForm(FlaskForm):
+    'buttons of the task dashboard for the open tasks of the manager\'s subteam, see app/scheduler.py'
+    assign = SubmitField('Auto-assign unassigned')
+    rebalance = SubmitField('Rebalance')
+
+class CompleteTaskForm(FlaskForm):
+    submit = SubmitField('Mark done')
+
 class ResourceForm(FlaskForm):
     job_title = StringField('Job Title', validators=[DataRequired()])
     job_profile = StringField('Job Profile', validators=[DataRequired()])
@@ -68,9 +83,11 @@ class ResourceForm(FlaskForm):
     salary_min = IntegerField('Min Salary', validators=[DataRequired(), NumberRange(min=0)])
     experience_reqd = IntegerField('Experience Required (in Years)', validators=[DataRequired(), NumberRange(min=0)])
     submit = SubmitField('Raise Resource Request')
+    version = HiddenField()
 
 class BudgetForm(FlaskForm):
     budget_for = StringField('Budget needed for', validators=[DataRequired()])
     budget_quote = IntegerField('Budget Amount', validators=[DataRequired(), NumberRange(min=0)])
     budget_details = TextAreaField('Details about budget requested', validators=[DataRequired()])
-    submit = SubmitField('Raise Budget Request')
\ No newline at end of file
+    submit = SubmitField('Raise Budget Request')
+    version = HiddenField()
\ No newline at end of file
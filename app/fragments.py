@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+from flask import current_app, render_template
+from flask_login import current_user
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Request, RequestChange, Task
+
+'''
+cache of rendered request cards
+
+the dashboards render the same card markup for the same rows over and over, so
+every card is rendered once per (request id, row version, card kind, viewer role)
+and kept in an LRU bounded by CARD_CACHE_BYTES of markup. every UPDATE of a
+request bumps its version, so a card rendered from an older row is never
+served for a newer one.
+
+a cached card is dropped when its request changes:
+- in this process right after the commit, from the session's flush/commit hooks
+  (Task changes drop the card of their parent request)
+- from other workers through the request changelog, read by sync() at the start
+  of every view that renders cards, before the rows themselves are read
+'''
+
+class FragmentCache(object):
+    'LRU of markup strings keyed by tuples starting with the request id, with a size budget in characters'
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._by_id = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            html = self._data.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key, html):
+        if len(html) > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._data[key] = html
+            self._by_id.setdefault(key[0], set()).add(key)
+            self.size += len(html)
+            while self.size > self.max_bytes:
+                self._discard(next(iter(self._data)))
+
+    def invalidate(self, req_id):
+        with self._lock:
+            for key in list(self._by_id.get(req_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_id.clear()
+            self.size = 0
+
+    def _discard(self, key):
+        html = self._data.pop(key, None)
+        if html is None:
+            return
+        self.size -= len(html)
+        keys = self._by_id[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_id[key[0]]
+
+    def __len__(self):
+        return len(self._data)
+
+'sized by init_app'
+card_cache = FragmentCache(0)
+
+def init_app(app):
+    card_cache.max_bytes = app.config['CARD_CACHE_BYTES']
+    app.add_template_global(card, 'card')
+
+'highest changelog id this process has invalidated up to'
+_seen = {'change_id': None}
+_seen_lock = threading.Lock()
+
+def sync():
+    'drop the cards of requests other workers changed since the last sync, one indexed range read'
+    if not current_app.config['CARD_CACHE_ENABLED']:
+        return
+    last = _seen['change_id']
+    if last is None:
+        # cache starts empty, nothing before now can be stale
+        last = db.session.query(db.func.max(RequestChange.id)).scalar() or 0
+        changes = []
+    else:
+        changes = db.session.query(RequestChange.id, RequestChange.request_id) \
+            .filter(RequestChange.id > last).order_by(RequestChange.id).all()
+    for change in changes:
+        card_cache.invalidate(change.request_id)
+    with _seen_lock:
+        newest = changes[-1].id if changes else last
+        if _seen['change_id'] is None or newest > _seen['change_id']:
+            _seen['change_id'] = newest
+
+def card(kind, req, selectable=False):
+    'rendered card markup for req, kind is one of the macros in _cards.html without "_card"'
+    if not current_app.config['CARD_CACHE_ENABLED']:
+        return Markup(render_template('_card.html', kind=kind, req=req, selectable=selectable).strip())
+    # the version makes a card rendered from a row read before a commit, but stored after the
+    # commit dropped the cached ones, unreachable for the rows read after it
+    key = (req.id, req.version, kind, current_user.role, bool(selectable))
+    html = card_cache.get(key)
+    if html is None:
+        html = render_template('_card.html', kind=kind, req=req, selectable=selectable).strip()
+        card_cache.set(key, html)
+    return Markup(html)
+
+@event.listens_for(Session, 'after_flush')
+def collect_stale_cards(session, flush_context):
+    stale = session.info.setdefault('stale_cards', set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Request):
+            stale.add(obj.id)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Task) and obj.request is not None:
+            stale.add(obj.request)
+
+@event.listens_for(Session, 'after_commit')
+def drop_stale_cards(session):
+    for req_id in session.info.pop('stale_cards', ()):
+        card_cache.invalidate(req_id)
+
+@event.listens_for(Session, 'after_rollback')
+def keep_cards(session):
+    session.info.pop('stale_cards', None)
@@ -0,0 +1,161 @@
+import functools
+import json
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Job
+
+'''
+background jobs for work that should not hold up the response
+
+a function decorated with @job gets a .delay(*args, **kwargs) that adds a Job
+row to the current session, so the job is queued in the same transaction as
+the change that caused it and survives restarts. once that transaction commits,
+the job is handed to a thread pool in this process (JOB_THREADS) and the view
+returns right away. `flask worker` runs whatever the web processes did not get
+to: jobs queued while JOB_THREADS is 0, retries that are due, and jobs left
+running by a process that died.
+
+a job is claimed with a conditional UPDATE on its status, so it runs once even
+if a web process and a worker see it at the same time. a job that raises is
+queued again up to its max_attempts with a run_at JOB_RETRY_DELAY seconds later,
+doubling every attempt, and `flask worker` runs it when that comes. arguments go
+through JSON.
+'''
+
+'job name -> function'
+REGISTRY = {}
+
+def job(fn=None, max_attempts=None):
+    'register fn as a job, use as @job or @job(max_attempts=3)'
+    if fn is None:
+        return functools.partial(job, max_attempts=max_attempts)
+    name = '{}.{}'.format(fn.__module__, fn.__name__)
+    REGISTRY[name] = fn
+
+    def delay(*args, **kwargs):
+        'queue fn(*args, **kwargs) with the current transaction, the caller commits'
+        row = Job(name=name, args=json.dumps({'args': args, 'kwargs': kwargs}), status='queued',
+            max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'], run_at=datetime.utcnow())
+        db.session.add(row)
+        return row
+
+    fn.delay = delay
+    fn.job_name = name
+    return fn
+
+_executor = {'pool': None}
+_executor_lock = threading.Lock()
+
+def executor(app):
+    with _executor_lock:
+        if _executor['pool'] is None:
+            _executor['pool'] = ThreadPoolExecutor(app.config['JOB_THREADS'], thread_name_prefix='job')
+        return _executor['pool']
+
+def submit(app, job_id):
+    'run the job in this process\'s pool as soon as a thread is free'
+    if app.config['JOB_THREADS'] > 0:
+        executor(app).submit(run, app, job_id)
+
+def backoff(attempts):
+    return current_app.config['JOB_RETRY_DELAY'] * 2 ** (attempts - 1)
+
+def claim(job_id):
+    'mark a due, queued job as running, false if someone else got it first'
+    now = datetime.utcnow()
+    claimed = Job.query.filter(Job.id == job_id, Job.status == 'queued', Job.run_at <= now) \
+        .update({'status': 'running', 'attempts': Job.attempts + 1, 'started_at': now}, synchronize_session=False)
+    db.session.commit()
+    return claimed == 1
+
+def run(app, job_id):
+    'claim and run one job in its own context of app, true if it ran (successfully or not)'
+    with app.app_context():
+        try:
+            if not claim(job_id):
+                return False
+            row = db.session.get(Job, job_id)
+            payload = json.loads(row.args)
+            try:
+                fn = REGISTRY[row.name]
+                fn(*payload['args'], **payload['kwargs'])
+                row.status = 'done'
+                row.finished_at = datetime.utcnow()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                failed(job_id, traceback.format_exc())
+            return True
+        finally:
+            db.session.remove()
+
+def failed(job_id, error):
+    row = db.session.get(Job, job_id)
+    row.last_error = error[-2000:]
+    if row.attempts >= row.max_attempts:
+        row.status = 'failed'
+        row.finished_at = datetime.utcnow()
+        current_app.logger.error('job %s %s failed for good after %d attempts', row.id, row.name, row.attempts)
+    else:
+        delay = backoff(row.attempts)
+        # picked up by `flask worker` once it is due, no timer is left behind in this process
+        row.status = 'queued'
+        row.run_at = datetime.utcnow() + timedelta(seconds=delay)
+    db.session.commit()
+
+def requeue_stuck():
+    'jobs running longer than JOB_TIMEOUT belong to a process that died, queue them again'
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_TIMEOUT'])
+    stuck = Job.query.filter(Job.status == 'running', Job.started_at < cutoff) \
+        .update({'status': 'queued', 'run_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return stuck
+
+def due(limit):
+    'ids of the queued jobs whose time has come, oldest first'
+    rows = db.session.query(Job.id).filter(Job.status == 'queued', Job.run_at <= datetime.utcnow()) \
+        .order_by(Job.run_at, Job.id).limit(limit).all()
+    db.session.commit()
+    return [row.id for row in rows]
+
+def work(threads, poll, once=False, log=print):
+    'the `flask worker` loop, once=True returns when nothing is due'
+    app = current_app._get_current_object()
+    pool = ThreadPoolExecutor(threads, thread_name_prefix='worker')
+    try:
+        while True:
+            stuck = requeue_stuck()
+            if stuck:
+                log('requeued {} stuck jobs'.format(stuck))
+            ids = due(threads * 4)
+            if ids:
+                ran = sum(1 for f in wait([pool.submit(run, app, i) for i in ids]).done if f.result())
+                log('ran {} jobs'.format(ran))
+            elif once:
+                return
+            else:
+                time.sleep(poll)
+    finally:
+        pool.shutdown()
+
+@event.listens_for(Session, 'after_flush')
+def collect_jobs(session, flush_context):
+    ids = [obj.id for obj in session.new if isinstance(obj, Job)]
+    if ids:
+        session.info.setdefault('jobs', []).extend(ids)
+
+@event.listens_for(Session, 'after_commit')
+def start_jobs(session):
+    for job_id in session.info.pop('jobs', ()):
+        submit(current_app._get_current_object(), job_id)
+
+@event.listens_for(Session, 'after_rollback')
+def forget_jobs(session):
+    session.info.pop('jobs', None)
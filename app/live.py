@@ -0,0 +1,186 @@
+import json
+import threading
+import time
+from datetime import datetime
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+from flask_login import current_user, login_required
+from sqlalchemy import event, or_
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Request, RequestChange
+from app.fragments import card, sync
+from app.readmodel import request_cards_by_id
+from app.replica import primary_only
+
+'''
+live dashboard updates over server-sent events
+
+every insert or update of a Request writes a RequestChange row in the same
+transaction. after the commit, streams in this process are woken right away;
+streams in other workers find the rows on their next poll of the changelog
+(LIVE_POLL_INTERVAL). each stream only sends the requests that entered, changed
+in or left the lists its user is looking at, as ready-rendered cards.
+
+a stream holds a worker thread for up to LIVE_STREAM_LIFETIME, so a process
+serves at most LIVE_MAX_STREAMS of them, keep it well under the threads of a
+worker (see gunicorn.conf.py). past the cap the stream is refused with 503 and
+the page polls itself every LIVE_FALLBACK_POLL seconds instead, which the
+conditional GET of the dashboards answers cheaply (see _live.html)
+'''
+
+live = Blueprint('live', __name__)
+
+class Broadcaster(object):
+    'wakes up the streams of this process when a commit touched requests'
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.seq = 0
+
+    def notify(self):
+        with self._cond:
+            self.seq += 1
+            self._cond.notify_all()
+
+    def wait(self, seq, timeout):
+        'block until notify() was called after seq was read, or timeout seconds'
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq != seq, timeout)
+            return self.seq
+
+broadcaster = Broadcaster()
+
+class StreamSlots(object):
+    'the open streams of this process'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def acquire(self, limit):
+        'take a slot, False when limit streams are open already'
+        with self._lock:
+            if self.open >= limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+streams = StreamSlots()
+
+def record_changes(connection, rows):
+    '''
+    write changelog rows, rows are dicts with request_id, assigned_to,
+    previous_assigned_to, created_by and previous_created_by
+    '''
+    if not rows:
+        return
+    now = datetime.utcnow()
+    for row in rows:
+        row.setdefault('changed_at', now)
+    connection.execute(RequestChange.__table__.insert(), rows)
+
+def previous(target, column):
+    history = db.inspect(target).attrs[column].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(target, column)
+
+@event.listens_for(Request, 'after_insert')
+def request_inserted(mapper, connection, target):
+    record_changes(connection, [dict(request_id=target.id, assigned_to=target.assigned_to, previous_assigned_to=None,
+        created_by=target.created_by, previous_created_by=None)])
+    Session.object_session(target).info['requests_changed'] = True
+
+@event.listens_for(Request, 'after_update')
+def request_updated(mapper, connection, target):
+    record_changes(connection, [dict(request_id=target.id, assigned_to=target.assigned_to,
+        previous_assigned_to=previous(target, 'assigned_to'), created_by=target.created_by,
+        previous_created_by=previous(target, 'created_by'))])
+    Session.object_session(target).info['requests_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def wake_streams(session):
+    if session.info.pop('requests_changed', False):
+        broadcaster.notify()
+
+@event.listens_for(Session, 'after_rollback')
+def forget_changes(session):
+    session.info.pop('requests_changed', None)
+
+def card_lists(page, req):
+    'which lists of page req belongs to for current_user'
+    if page == 'index':
+        return {'assigned': req.assigned_to == current_user.role,
+            'updated': req.created_by == current_user.username}
+    return {'pending': req.assigned_to == current_user.role}
+
+def render_cards(page, req_id, reqs, selectable):
+    cards = {}
+    lists = card_lists(page, reqs[req_id]) if req_id in reqs else None
+    for kind in (('assigned', 'updated') if page == 'index' else ('pending',)):
+        if lists and lists[kind]:
+            cards[kind] = str(card(kind, reqs[req_id], selectable))
+        else:
+            cards[kind] = None
+    return cards
+
+def event_stream(page, last_id):
+    # imported here, workflow imports this module for record_changes
+    from app.workflow import actions_for
+    role = current_user.role
+    username = current_user.username
+    selectable = bool(actions_for(role))
+    interval = current_app.config['LIVE_POLL_INTERVAL']
+    # close after a while, EventSource reconnects with Last-Event-ID and picks up from there
+    deadline = time.monotonic() + current_app.config['LIVE_STREAM_LIFETIME']
+    seq = broadcaster.seq
+    yield 'retry: 3000\n\n'
+    while time.monotonic() < deadline:
+        changes = RequestChange.query.filter(RequestChange.id > last_id, or_(
+            RequestChange.assigned_to == role, RequestChange.previous_assigned_to == role,
+            RequestChange.created_by == username, RequestChange.previous_created_by == username)) \
+            .order_by(RequestChange.id).limit(200).all()
+        if changes:
+            sync()
+            ids = set(c.request_id for c in changes)
+            reqs = request_cards_by_id(ids)
+            # a request changed several times since the last round is sent once, as it is now
+            latest = dict((c.request_id, c.id) for c in changes)
+            for req_id, change_id in sorted(latest.items(), key=lambda item: item[1]):
+                data = {'id': req_id, 'cards': render_cards(page, req_id, reqs, selectable)}
+                yield 'id: {}\nevent: request\ndata: {}\n\n'.format(change_id, json.dumps(data))
+            last_id = changes[-1].id
+        else:
+            yield ': keepalive\n\n'
+        # give the connection back to the pool while waiting
+        db.session.remove()
+        seq = broadcaster.wait(seq, interval)
+
+# woken by commits in this process, so it has to read what was just committed
+@live.route('/events/requests', methods=['GET'])
+@primary_only
+@login_required
+def request_events():
+    '?page=index or ?page=pending picks which cards are sent'
+    page = request.args.get('page', 'index')
+    if page not in ('index', 'pending') or current_user.role is None:
+        abort(404)
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        # a fresh page already shows everything up to now
+        last_id = db.session.query(db.func.max(RequestChange.id)).scalar() or 0
+    if not streams.acquire(current_app.config['LIVE_MAX_STREAMS']):
+        # EventSource gives up on a 503, the page falls back to polling
+        response = Response('too many live streams, poll the page instead\n', status=503, mimetype='text/plain')
+        response.headers['Retry-After'] = str(current_app.config['LIVE_FALLBACK_POLL'])
+        return response
+    response = Response(stream_with_context(event_stream(page, last_id)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # the server closes the response however the stream ends, even before its first line
+    response.call_on_close(streams.release)
+    return response
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from flask import Blueprint, Response, abort, current_app, g, has_app_context, has_request_context, request
+from flask.signals import before_render_template, signals_available, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+'''
+per-request timing and a Prometheus /metrics endpoint
+
+every request records its SQL statement count, SQL time, template render time
+and total time, per endpoint, into in-process histograms. statements slower than
+SLOW_QUERY_THRESHOLD seconds are logged to the eventy.sql logger. each worker
+keeps its own numbers, Prometheus sums them across the scraped workers. the
+numbers of a response also go out in its Server-Timing header, but only to
+those allowed to read /metrics (SERVER_TIMING turns that off).
+
+render time needs Flask's signals, i.e. the blinker package. without it the
+render histogram stays empty.
+'''
+
+slow_log = logging.getLogger('eventy.sql')
+
+metrics = Blueprint('metrics', __name__)
+
+class Histogram(object):
+    'cumulative histogram with one label (endpoint), in Prometheus text format'
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label, value):
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.help), '# TYPE {} histogram'.format(self.name)]
+        with self._lock:
+            for label, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    lines.append('{}_bucket{{endpoint="{}",le="{}"}} {}'.format(self.name, label, bound, count))
+                lines.append('{}_bucket{{endpoint="{}",le="+Inf"}} {}'.format(self.name, label, series['count']))
+                lines.append('{}_sum{{endpoint="{}"}} {}'.format(self.name, label, repr(series['sum'])))
+                lines.append('{}_count{{endpoint="{}"}} {}'.format(self.name, label, series['count']))
+        return lines
+
+SECONDS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+HISTOGRAMS = {
+    'total': Histogram('eventy_request_duration_seconds', 'Time to build the response, per endpoint.', SECONDS),
+    'sql': Histogram('eventy_request_sql_seconds', 'Time spent in SQL statements per request.', SECONDS),
+    'render': Histogram('eventy_request_render_seconds', 'Time spent rendering templates per request.', SECONDS),
+    'queries': Histogram('eventy_request_sql_statements', 'SQL statements executed per request.',
+        [0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000]),
+}
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def end_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    endpoint = None
+    if has_request_context() and 'metrics_start' in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+        endpoint = request.endpoint
+    if has_app_context() and elapsed > current_app.config['SLOW_QUERY_THRESHOLD']:
+        slow_log.warning('slow query %.3fs in %s: %s', elapsed, endpoint or '-', ' '.join(statement.split()))
+
+if signals_available:
+    @before_render_template.connect
+    def start_render(sender, template, context, **extra):
+        if 'metrics_start' in g:
+            # cards are rendered inside the page template, only the outermost render counts
+            if g.render_depth == 0:
+                g.render_start = time.perf_counter()
+            g.render_depth += 1
+
+    @template_rendered.connect
+    def end_render(sender, template, context, **extra):
+        if 'metrics_start' in g:
+            g.render_depth -= 1
+            if g.render_depth == 0:
+                g.render_time += time.perf_counter() - g.render_start
+
+@metrics.before_app_request
+def start_request_metrics():
+    if not current_app.config['METRICS_ENABLED']:
+        return
+    g.metrics_start = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.render_time = 0.0
+    g.render_depth = 0
+
+@metrics.after_app_request
+def record_request_metrics(response):
+    if 'metrics_start' not in g:
+        return response
+    total = time.perf_counter() - g.metrics_start
+    endpoint = request.endpoint or 'unknown'
+    HISTOGRAMS['total'].observe(endpoint, total)
+    HISTOGRAMS['sql'].observe(endpoint, g.sql_time)
+    HISTOGRAMS['render'].observe(endpoint, g.render_time)
+    HISTOGRAMS['queries'].observe(endpoint, g.sql_count)
+    # shows up in the browser's network panel next to the request, only for whoever may read /metrics
+    if current_app.config['SERVER_TIMING'] and allowed():
+        response.headers['Server-Timing'] = 'sql;desc="{} queries";dur={:.1f}, render;dur={:.1f}, total;dur={:.1f}'.format(
+            g.sql_count, g.sql_time * 1000, g.render_time * 1000, total * 1000)
+    return response
+
+def allowed():
+    'a scraper with the METRICS_TOKEN bearer token, or a logged-in user of a METRICS_ROLES role'
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') == 'Bearer ' + token:
+        return True
+    return current_user.is_authenticated and current_user.role in current_app.config['METRICS_ROLES']
+
+@metrics.route('/metrics', methods=['GET'])
+def prometheus():
+    if not allowed():
+        abort(403)
+    lines = []
+    for histogram in HISTOGRAMS.values():
+        lines.extend(histogram.render())
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
@@ -1,14 +1,17 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from app import db, login
+from app.cache import LRUCache
+from app.passwords import hash_password, verify_password, needs_rehash
 
 class User(UserMixin, db.Model):
     'db.Model is a base class for all models from SQLAlchemy'
     id = db.Column(db.Integer, primary_key=True) ; 'set as primary key'
     username = db.Column(db.String(64), index=True)
     email = db.Column(db.String(120), index=True)
-    password_hash = db.Column(db.String(120)) ; 'store a hashed password instead of cleartext'
+    password_hash = db.Column(db.String(256)) ; 'store a hashed password instead of cleartext'
     name = db.Column(db.String(64))
     role = db.Column(db.String(8)) 
     # Roles can only be of type: cso, scso, fm, am, hr, sm (SM manager), pm (PM manager), epm (Event Planning manager), smtm (SM team member), pmtm (PM team member)
@@ -23,13 +26,17 @@ class User(UserMixin, db.Model):
     '''
     requests = db.relationship('Request', backref='creator', lazy='dynamic')
 
-    'set password as hash'
+    'set password as hash, using the hashing policy from Config'
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     'check password to see if it matches'
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    'true if the stored hash was made with an older hashing policy and should be redone'
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
 
     def __repr__(self):
         return '<User {}>'.format(self.username)
@@ -48,11 +55,33 @@ class Request(db.Model):
     #event_date = db.Column(db.Date())
     ready_for_planning = db.Column(db.Boolean(False))
     tasks_for = db.Column(db.String(64))
+    'set when the request is rejected or handed to planning, `flask archive` moves it out some time after'
+    closed_at = db.Column(db.DateTime, index=True)
     
-    tasks = db.relationship('Task', backref='event', lazy='dynamic')
+    'a plain list, so list views can load it for many requests at once with selectinload'
+    tasks = db.relationship('Task', backref='event', order_by='Task.id')
 
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
 
+    'bumped by every UPDATE, which only applies if the row still has the version it was loaded with'
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+    'set by every insert and update, the dashboards\' ETags are built from it, see app/conditional.py'
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    '''
+    composite indexes matching the dashboard filters, id last so keyset paging is an index range scan,
+    updated_at last so the ETag of a list is read from the index alone
+    '''
+    __table_args__ = (
+        db.Index('ix_request_assigned_to_id', 'assigned_to', 'id'),
+        db.Index('ix_request_created_by_id', 'created_by', 'id'),
+        db.Index('ix_request_tasks_for_id', 'tasks_for', 'id'),
+        db.Index('ix_request_assigned_to_updated_at', 'assigned_to', 'updated_at'),
+        db.Index('ix_request_created_by_updated_at', 'created_by', 'updated_at'),
+        db.Index('ix_request_tasks_for_updated_at', 'tasks_for', 'updated_at'),
+    )
+
     def set_assigned_to(self, assigned_to):
         self.assigned_to = assigned_to    
 
@@ -62,15 +91,70 @@ class Request(db.Model):
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     task_name = db.Column(db.String(64), index=True)
-    task_details = db.Column(db.String(120), index=True)
+    task_details = db.Column(db.String(120))
     created_by = db.Column(db.String(64)) # Always SM or PM
     subteam = db.Column(db.String(64))
+    # username of the subteam member doing it, picked by app/scheduler.py
+    assignee = db.Column(db.String(64))
+    effort = db.Column(db.Integer, default=1, server_default='1') # estimated hours
+    completed_at = db.Column(db.DateTime) # None while the task is open
+
+    request = db.Column(db.Integer, db.ForeignKey('request.id'), index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    request = db.Column(db.Integer, db.ForeignKey('request.id'))
+    __table_args__ = (
+        db.Index('ix_task_subteam_id', 'subteam', 'id'),
+        db.Index('ix_task_subteam_updated_at', 'subteam', 'updated_at'),
+        # the open load of every member of a subteam, read from the index alone
+        db.Index('ix_task_subteam_open', 'subteam', 'completed_at', 'assignee', 'effort'),
+    )
 
     def __repr__(self):
         return '<Task {}>'.format(self.body)
 
+class RequestArchive(db.Model):
+    '''
+    closed requests moved out of the request table by `flask archive`, see app/archive.py.
+    same columns and ids as Request, never written after the move
+    '''
+    __tablename__ = 'request_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    client_name = db.Column(db.String(64), index=True)
+    event_type = db.Column(db.String(64))
+    event_details = db.Column(db.String(120))
+    client_budget = db.Column(db.Integer)
+    feedback = db.Column(db.String(120))
+    created_by = db.Column(db.String(64))
+    assigned_to = db.Column(db.String(64))
+    status = db.Column(db.String(64))
+    ready_for_planning = db.Column(db.Boolean(False))
+    tasks_for = db.Column(db.String(64))
+    closed_at = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer)
+    version = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return '<RequestArchive {}>'.format(self.id)
+
+class TaskArchive(db.Model):
+    'tasks of archived requests, moved together with their request'
+    __tablename__ = 'task_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    task_name = db.Column(db.String(64))
+    task_details = db.Column(db.String(120))
+    created_by = db.Column(db.String(64))
+    subteam = db.Column(db.String(64))
+    assignee = db.Column(db.String(64))
+    effort = db.Column(db.Integer)
+    completed_at = db.Column(db.DateTime)
+    request = db.Column(db.Integer, index=True)
+    updated_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return '<TaskArchive {}>'.format(self.id)
+
 class Resource(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     job_title = db.Column(db.String(64), index=True)
@@ -80,6 +164,14 @@ class Resource(db.Model):
     salary_min = db.Column(db.Integer)
     created_by = db.Column(db.String(64)) # Always SM or PM
     assigned_to = db.Column(db.String(64)) # maps to HR or SM/PM
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_resource_assigned_to_id', 'assigned_to', 'id'),
+        db.Index('ix_resource_assigned_to_updated_at', 'assigned_to', 'updated_at'),
+    )
 
     def __repr__(self):
         return '<Resource {}>'.format(self.body)
@@ -91,11 +183,154 @@ class Budget(db.Model):
     budget_details = db.Column(db.String(120))
     created_by = db.Column(db.String(64)) # Always SM or PM
     assigned_to = db.Column(db.String(64)) # maps to HR or SM/PM
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_budget_assigned_to_id', 'assigned_to', 'id'),
+        db.Index('ix_budget_assigned_to_updated_at', 'assigned_to', 'updated_at'),
+    )
 
     def __repr__(self):
         return '<Budget {}>'.format(self.body)
 
+class RequestChange(db.Model):
+    '''
+    changelog of request inserts and updates, one row per changed request per commit.
+    live dashboards in every worker read it to find what changed since they last looked
+    '''
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(db.Integer)
+    assigned_to = db.Column(db.String(64))
+    previous_assigned_to = db.Column(db.String(64))
+    created_by = db.Column(db.String(64))
+    previous_created_by = db.Column(db.String(64))
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return '<RequestChange {} {}>'.format(self.request_id, self.assigned_to)
+
+class AuditEntry(db.Model):
+    '''
+    append-only history of request fields, one row per changed field.
+    written in batches behind the request by the writer in app/audit.py
+    '''
+    id = db.Column(db.Integer, primary_key=True)
+    request_id = db.Column(db.Integer)
+    field = db.Column(db.String(32))
+    old_value = db.Column(db.String(120))
+    new_value = db.Column(db.String(120))
+    changed_by = db.Column(db.String(64))
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    'the history view pages one request newest first'
+    __table_args__ = (
+        db.Index('ix_audit_entry_request_id_id', 'request_id', 'id'),
+    )
+
+    def __repr__(self):
+        return '<AuditEntry {} {}>'.format(self.request_id, self.field)
+
+class SummaryCounter(db.Model):
+    '''
+    precomputed workflow totals, e.g. metric requests_by_role key fm value 12.
+    kept up to date in the same transaction as every request and budget write, see app/summary.py
+    '''
+    id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(32))
+    key = db.Column(db.String(64))
+    value = db.Column(db.BigInteger, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'key', name='uq_summary_counter_metric_key'),
+    )
+
+    def __repr__(self):
+        return '<SummaryCounter {} {} {}>'.format(self.metric, self.key, self.value)
+
+class ImportCheckpoint(db.Model):
+    'how far `flask import` got through a file, committed together with each chunk'
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(255), index=True, unique=True) # model name + absolute path of the file
+    rows_done = db.Column(db.Integer, default=0)
+    finished = db.Column(db.Boolean, default=False)
+    updated = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return '<ImportCheckpoint {} {}>'.format(self.source, self.rows_done)
+
+class Job(db.Model):
+    'a queued call of an @job function, see app/jobs.py'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(128)) # module.function
+    args = db.Column(db.Text) # JSON {"args": [...], "kwargs": {...}}
+    status = db.Column(db.String(16), default='queued') # queued, running, done or failed
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=5)
+    last_error = db.Column(db.Text)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    'workers look for due queued jobs'
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+    def __repr__(self):
+        return '<Job {} {} {}>'.format(self.id, self.name, self.status)
+
+class UserIdentity(UserMixin):
+    '''
+    read-only snapshot of the User columns the views and templates read off current_user.
+    a plain object instead of the ORM row, so it can be shared between requests and
+    threads without being bound to any session
+    '''
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.name = user.name
+        self.role = user.role
+
+    def __repr__(self):
+        return '<UserIdentity {}>'.format(self.username)
+
+'identities by user id, so steady-state page views never touch the user table, sized by init_app'
+identity_cache = LRUCache()
+
+def init_app(app):
+    identity_cache.maxsize = app.config['USER_CACHE_SIZE']
+    identity_cache.ttl = app.config['USER_CACHE_TTL']
+
+'''
+drop the cached identity once a change to the user row commits in this process, TTL
+covers other workers. not at flush: until the commit another request could read and
+cache the old row again, and a rollback keeps it
+'''
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def changed_identity(mapper, connection, target):
+    Session.object_session(target).info.setdefault('stale_identities', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def evict_identities(session):
+    for user_id in session.info.pop('stale_identities', ()):
+        identity_cache.delete(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def keep_identities(session):
+    session.info.pop('stale_identities', None)
+
 'define a user loader function for user login and logged-in sessions'
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
\ No newline at end of file
+    identity = identity_cache.get(int(id))
+    if identity is None:
+        user = User.query.get(int(id))
+        if user is None:
+            return None
+        identity = UserIdentity(user)
+        identity_cache.set(user.id, identity)
+    return identity
\ No newline at end of file
@@ -0,0 +1,33 @@
+import logging
+from app import db
+from app.jobs import job
+from app.models import Budget, Request, Resource, Task
+
+'''
+telling the next role that something is waiting for them
+
+runs as a background job after the commit that moved the item, so the view that
+moved it does not wait. for now the notice goes to the eventy.notify logger,
+a mail or chat sender would go in notify()
+'''
+
+notify_log = logging.getLogger('eventy.notify')
+
+'kind -> (model, how to name it, who it is assigned to)'
+KINDS = {
+    'request': (Request, lambda r: 'request {} for {}'.format(r.id, r.client_name), lambda r: r.assigned_to),
+    'resource': (Resource, lambda r: 'resource request {} ({})'.format(r.id, r.job_title), lambda r: r.assigned_to),
+    'budget': (Budget, lambda r: 'budget request {} ({})'.format(r.id, r.budget_for), lambda r: r.assigned_to),
+    'task': (Task, lambda t: 'task {} ({})'.format(t.id, t.task_name), lambda t: t.assignee),
+}
+
+def notify(role, message):
+    notify_log.info('to %s: %s', role, message)
+
+@job
+def notify_assignees(kind, ids):
+    'tell whoever each item is assigned to now that it is waiting for them'
+    model, describe, assignee = KINDS[kind]
+    for row in db.session.query(model).filter(model.id.in_(ids)):
+        if assignee(row):
+            notify(assignee(row), '{} is waiting for you'.format(describe(row)))
@@ -0,0 +1,74 @@
+from flask import current_app, request, url_for
+
+'''
+keyset (cursor) pagination for the dashboard list views
+
+instead of OFFSET, every page is fetched as "rows with an id below the last id
+we showed", so the database walks straight to the cursor through the index and
+a page costs the same on the first page as on the ten-thousandth one
+'''
+
+class Page(object):
+    'one page of rows plus the cursor for the page after it'
+
+    def __init__(self, items, next_after, limit, param='after'):
+        self.items = items
+        self.next_after = next_after
+        self.limit = limit
+        self.param = param
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_after is not None
+
+    @property
+    def is_first(self):
+        return request.args.get(self.param) is None
+
+    def _url(self, after):
+        'same view and query string, only the cursor of this list changes'
+        args = request.args.to_dict()
+        args.pop(self.param, None)
+        if after is not None:
+            args[self.param] = after
+        args['limit'] = self.limit
+        return url_for(request.endpoint, **dict(request.view_args or {}, **args))
+
+    @property
+    def next_url(self):
+        if not self.has_next:
+            return None
+        return self._url(self.next_after)
+
+    @property
+    def first_url(self):
+        return self._url(None)
+
+
+def page_args(param='after'):
+    'read the cursor and page size from the query string, page size is clamped to MAX_PAGE_SIZE'
+    after = request.args.get(param, type=int)
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+    return after, limit
+
+def keyset_page(query, column, param='after'):
+    '''
+    return one Page of query in descending column order, starting below the cursor
+    named by param. one extra row is fetched to know if there is a next page
+    '''
+    after, limit = page_args(param)
+    if after is not None:
+        query = query.filter(column < after)
+    rows = query.order_by(column.desc()).limit(limit + 1).all()
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = getattr(rows[-1], column.key)
+    return Page(rows, next_after, limit, param)
@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+'''
+password hashing policy
+
+hashing runs in a small bounded thread pool instead of the worker thread that
+handles the request. hashlib's PBKDF2 releases the GIL, so the pool caps how many
+hashes burn CPU at the same time during a login burst, and anything beyond
+PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE is refused right away with
+HashingBusy instead of piling up behind the others. the sign-in and register
+pages answer that with 503 and Retry-After: PASSWORD_HASH_RETRY_AFTER.
+
+the cost lives in Config (PASSWORD_HASH_ALGORITHM / PASSWORD_HASH_ITERATIONS).
+hashes carry the method they were made with, so old hashes keep verifying and
+get rewritten with the current policy on the next successful login
+'''
+
+class HashingBusy(Exception):
+    'raised when the hashing pool and its queue are full'
+    pass
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+def _pool():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            workers = current_app.config['PASSWORD_HASH_WORKERS']
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(workers + current_app.config['PASSWORD_HASH_QUEUE'])
+    return _executor, _slots
+
+def _run(fn, *args, **kwargs):
+    'run fn in the hashing pool and wait for the result, HashingBusy if the pool and its queue are full'
+    executor, slots = _pool()
+    # never wait for a slot, a full queue already means a wait longer than a sign-in should take
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        return executor.submit(fn, *args, **kwargs).result()
+    finally:
+        slots.release()
+
+def current_method():
+    'werkzeug method string for the configured policy, e.g. pbkdf2:sha256:260000'
+    return 'pbkdf2:{}:{}'.format(current_app.config['PASSWORD_HASH_ALGORITHM'], current_app.config['PASSWORD_HASH_ITERATIONS'])
+
+def hash_password(password):
+    return _run(generate_password_hash, password, method=current_method(),
+        salt_length=current_app.config['PASSWORD_HASH_SALT_LENGTH'])
+
+def verify_password(pwhash, password):
+    if not pwhash:
+        return False
+    return _run(check_password_hash, pwhash, password)
+
+def needs_rehash(pwhash):
+    'True if pwhash was made with a different algorithm or cost than the current policy'
+    return pwhash.split('$', 1)[0] != current_method()
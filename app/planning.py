@@ -0,0 +1,135 @@
+from datetime import datetime
+from flask import Blueprint, abort, render_template, flash, redirect, url_for
+from flask_login import current_user, login_required
+from app import db
+from app.forms import AssignTasksForm, CompleteTaskForm, TaskForm
+from app.models import Request, Task
+from app.notifications import notify_assignees
+from app.pagination import keyset_page
+from app import conditional, fragments, readmodel, scheduler
+
+'planning dashboard and the tasks planned for requests'
+planning = Blueprint('planning', __name__)
+
+'planning manager role -> the Request.tasks_for of the requests their team plans'
+TEAMS = {'sm': 'services', 'pm': 'production'}
+
+# show all request tickets ready for planning
+@planning.route('/planning', methods=['GET', 'POST'])
+@login_required
+def planning_dashboard():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role not in TEAMS:
+        return redirect(url_for('requests.index'))
+    tasks_for = TEAMS[current_user.role]
+    unchanged = conditional.not_modified(conditional.fingerprint(Request, tasks_for=tasks_for))
+    if unchanged:
+        return unchanged
+    fragments.sync()
+    reqs = keyset_page(readmodel.request_cards(tasks_for=tasks_for), Request.id)
+    
+    return render_template('planning.html', title='Planning Dashboard', reqs=reqs)
+
+# allow adding tasks to a specific ticket
+@planning.route('/request/<reqid>/tasks', methods=['GET', 'POST'])
+@login_required
+def add_tasks(reqid):
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'sm' and current_user.role != 'pm':
+        return redirect(url_for('requests.index'))
+    
+    form = TaskForm()
+    # the request with the tasks already planned for it and its creator
+    req = readmodel.request_with_tasks(reqid)
+    
+    form.linked_to.data = req.id
+    subteam = current_user.role + 'tm'
+    form.subteam.data = subteam
+
+    if form.validate_on_submit():
+        task = Task(task_name=form.task_name.data, task_details=form.task_details.data, 
+            subteam=subteam, request=req.id, effort=form.effort.data or 1)
+        task.created_by = current_user.role
+        # to the member of the subteam with the least open work
+        scheduler.assign_new(subteam, [task])
+        
+        db.session.add(task)
+        db.session.flush()
+        notify_assignees.delay('task', [task.id])
+        db.session.commit()
+        flash('Task ' + form.task_name.data + ' successfully added and assigned to ' + (task.assignee or 'nobody yet') + '!')
+        return redirect(url_for('planning.view_tasks'))
+    return render_template('add-tasks.html', title='Add Tasks', req=req, form=form)
+
+def team_of(role):
+    'the subteam a planning manager or team member works with'
+    return role if role in ('smtm', 'pmtm') else role + 'tm'
+
+# view list of all tasks for all tickets
+@planning.route('/all-tasks', methods=['GET'])
+@login_required
+def view_tasks():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'sm' and current_user.role != 'pm' and current_user.role != 'smtm' and current_user.role != 'pmtm':
+        return redirect(url_for('requests.index'))
+    
+    subteam = team_of(current_user.role)
+    members = scheduler.members(subteam)
+    # the task rows, the requests of the team they print the client and event of, and who is in the team
+    unchanged = conditional.not_modified(conditional.fingerprint(Task, subteam=subteam),
+        conditional.fingerprint(Request, tasks_for=TEAMS[subteam[:2]]), members, forms=True)
+    if unchanged:
+        return unchanged
+    # get all tasks by subteam
+    tasks = keyset_page(readmodel.tasks(subteam=subteam), Task.id)
+    loads = scheduler.loads(subteam, members)
+    return render_template('tasks.html', title='Task Dashboard', tasks=tasks, loads=loads,
+        assign_form=AssignTasksForm(), done_form=CompleteTaskForm())
+
+# assign the open tasks nobody has, or even out the work of the subteam
+@planning.route('/all-tasks/assign', methods=['POST'])
+@login_required
+def assign_tasks():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role not in TEAMS:
+        return redirect(url_for('requests.index'))
+    subteam = team_of(current_user.role)
+    form = AssignTasksForm()
+    if form.validate_on_submit():
+        if form.rebalance.data:
+            new, moved = scheduler.rebalance(subteam)
+            message = '{} tasks assigned, {} tasks moved to even out the work'.format(len(new), len(moved))
+        else:
+            new, moved = scheduler.auto_assign(subteam), {}
+            message = '{} tasks assigned'.format(len(new))
+        if new or moved:
+            notify_assignees.delay('task', sorted(set(new) | set(moved)))
+        db.session.commit()
+        if not scheduler.members(subteam):
+            message += ', there is nobody in ' + subteam + ' to assign tasks to'
+        flash(message)
+    return redirect(url_for('planning.view_tasks'))
+
+# the assignee, or their manager, closes a task, it no longer counts towards their load
+@planning.route('/task/<int:taskid>/done', methods=['POST'])
+@login_required
+def complete_task(taskid):
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role not in ('sm', 'pm', 'smtm', 'pmtm'):
+        return redirect(url_for('requests.index'))
+    task = Task.query.get_or_404(taskid)
+    if task.subteam != team_of(current_user.role):
+        abort(404)
+    if current_user.role in ('smtm', 'pmtm') and task.assignee != current_user.username:
+        abort(403)
+    form = CompleteTaskForm()
+    if form.validate_on_submit() and task.completed_at is None:
+        task.completed_at = datetime.utcnow()
+        db.session.commit()
+        flash('Task ' + task.task_name + ' marked as done')
+    return redirect(url_for('planning.view_tasks'))
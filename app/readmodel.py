@@ -0,0 +1,74 @@
+from sqlalchemy.orm import joinedload, load_only, selectinload
+from app import db
+from app.models import AuditEntry, Budget, Request, RequestArchive, Resource, Task, TaskArchive, User
+
+'''
+read model for the list views
+
+the dashboards print a handful of columns per row, so they read the named
+queries below instead of hydrating full ORM objects:
+- request cards, tasks, resources and budgets come back as plain rows holding
+  only the columns their template prints. nothing lands in the session's
+  identity map and there are no relations left to lazy load per row
+- a task row carries the client and event of its parent request, joined in the
+  same statement
+- the planning page loads one request with its tasks (selectinload) and its
+  creator (joined) in two statements
+
+all of them are Query objects, so app.pagination.keyset_page pages them as before.
+views that edit a row still load the full object
+'''
+
+'''
+what a request card prints, see _cards.html. assigned_to and created_by also decide which lists it belongs
+to, version is part of the key of the cached card (see app/fragments.py)
+'''
+CARD_COLUMNS = [Request.id, Request.client_name, Request.event_type, Request.event_details, Request.client_budget,
+    Request.feedback, Request.status, Request.assigned_to, Request.created_by, Request.version]
+
+'what the task lists print, with the parent request'
+TASK_COLUMNS = [Task.id, Task.task_name, Task.task_details, Task.subteam, Task.created_by, Task.request,
+    Task.assignee, Task.effort, Task.completed_at, Request.client_name, Request.event_type]
+
+RESOURCE_COLUMNS = [Resource.id, Resource.job_title, Resource.job_profile, Resource.experience_reqd,
+    Resource.salary_max, Resource.salary_min, Resource.created_by, Resource.assigned_to]
+
+BUDGET_COLUMNS = [Budget.id, Budget.budget_for, Budget.budget_quote, Budget.budget_details,
+    Budget.created_by, Budget.assigned_to]
+
+def request_cards(**filters):
+    'card rows of the requests matching filters, keywords as for Query.filter_by'
+    return db.session.query(*CARD_COLUMNS).filter_by(**filters)
+
+def request_cards_by_id(ids):
+    'card rows of the given request ids, by id'
+    return dict((row.id, row) for row in db.session.query(*CARD_COLUMNS).filter(Request.id.in_(ids)))
+
+def tasks(**filters):
+    'task rows matching filters, a task without a parent request has client_name and event_type None'
+    return db.session.query(*TASK_COLUMNS).filter_by(**filters).outerjoin(Request, Task.request == Request.id)
+
+def resources(**filters):
+    return db.session.query(*RESOURCE_COLUMNS).filter_by(**filters)
+
+def budgets(**filters):
+    return db.session.query(*BUDGET_COLUMNS).filter_by(**filters)
+
+def archived_requests(**filters):
+    return RequestArchive.query.filter_by(**filters)
+
+def archived_tasks(**filters):
+    return TaskArchive.query.filter_by(**filters)
+
+def audit_entries(**filters):
+    return db.session.query(AuditEntry.id, AuditEntry.field, AuditEntry.old_value, AuditEntry.new_value,
+        AuditEntry.changed_by, AuditEntry.changed_at).filter_by(**filters)
+
+def request_with_tasks(req_id):
+    'one Request with its tasks and creator loaded up front, read only, 404 if there is none'
+    return Request.query.options(
+        load_only(*CARD_COLUMNS),
+        selectinload(Request.tasks).load_only(Task.task_name, Task.task_details, Task.subteam, Task.created_by,
+            Task.assignee),
+        joinedload(Request.creator).load_only(User.username, User.name),
+    ).filter_by(id=req_id).first_or_404()
@@ -0,0 +1,66 @@
+import time
+from flask import current_app, has_request_context, request, session as cookie
+from flask_sqlalchemy import SQLAlchemy, SignallingSession, get_state
+from sqlalchemy import event, orm
+
+'''
+read/write splitting over an optional read-only replica
+
+with REPLICA_DATABASE_URL set, GET and HEAD requests read from the "replica"
+bind and everything else goes to the primary as before:
+- a flush or an INSERT/UPDATE/DELETE always goes to the primary, and once a
+  request has written, its later reads go there too
+- after a commit that wrote, the user's next requests stay on the primary for
+  REPLICA_PIN_SECONDS (kept in their session cookie), so they see their own
+  changes even while the replica lags behind
+- views decorated with @primary_only never read from the replica
+'''
+
+class RoutingSession(SignallingSession):
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._flushing or getattr(clause, 'is_dml', False):
+            self.info['wrote'] = True
+            self.info['replica'] = False
+        elif self.info.get('replica'):
+            return get_state(self.app).db.get_engine(self.app, bind='replica')
+        return SignallingSession.get_bind(self, mapper, clause)
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    'SQLAlchemy whose sessions route reads to the replica when the request allows it'
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def init_app(self, app):
+        SQLAlchemy.init_app(self, app)
+        app.before_request(route_reads)
+
+def enabled():
+    return bool((current_app.config['SQLALCHEMY_BINDS'] or {}).get('replica'))
+
+def primary_only(view):
+    'keep this view on the primary even for GET, for reads that must never lag'
+    view.primary_only = True
+    return view
+
+def route_reads():
+    if not enabled() or request.method not in ('GET', 'HEAD'):
+        return
+    if cookie.get('primary_until', 0) > time.time():
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'primary_only', False):
+        return
+    current_app.extensions['sqlalchemy'].db.session.info['replica'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def pin_to_primary(session):
+    if not session.info.pop('wrote', False):
+        return
+    if has_request_context() and enabled():
+        cookie['primary_until'] = time.time() + current_app.config['REPLICA_PIN_SECONDS']
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def forget_writes(session):
+    session.info.pop('wrote', None)
@@ -0,0 +1,213 @@
+from flask import Blueprint, render_template, flash, redirect, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy.orm.exc import StaleDataError
+from app import db
+from app.edits import conflict, stale
+from app.forms import BulkTransitionForm, RequestForm
+from app.models import AuditEntry, Request
+from app.notifications import notify_assignees
+from app.pagination import keyset_page
+from app import audit, conditional, fragments, readmodel, search, summary, workflow
+from app.archive import archived
+
+'the home page, search and the event request workflow'
+requests = Blueprint('requests', __name__)
+
+'roles that see the workflow summary panel on the home page'
+SUMMARY_ROLES = ('scso', 'am', 'fm', 'sm', 'pm', 'hr')
+
+'@login_required makes this view a protected view'
+@requests.route('/')
+@requests.route('/index')
+@requests.route('/home')
+@login_required
+def index():
+    # for each user, show their assigned and created requests
+    user = current_user.username
+    role = current_user.role
+    # precomputed workflow totals for managers
+    panel = summary.panel() if role in SUMMARY_ROLES else None
+    # a poll of an unchanged page is answered from the fingerprints of both lists, see app/conditional.py
+    unchanged = conditional.not_modified(conditional.fingerprint(Request, assigned_to=role),
+        conditional.fingerprint(Request, created_by=user), panel)
+    if unchanged:
+        return unchanged
+    # drop cached cards other workers changed before reading the rows
+    fragments.sync()
+    # both lists are paged independently, newest first
+    # plain rows of the card columns, see app/readmodel.py
+    assigned_requests = keyset_page(readmodel.request_cards(assigned_to=role), Request.id)
+    updated_requests = keyset_page(readmodel.request_cards(created_by=user), Request.id, param='updated_after')
+    return render_template('index.html', title='Home', user=user, assigned_requests=assigned_requests, updated_requests=updated_requests,
+        summary=panel, summary_titles=summary.METRIC_TITLES)
+
+# full-text search over the requests and tasks the user can see
+@requests.route('/search', methods=['GET'])
+@login_required
+def search_view():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    q = request.args.get('q', '').strip()
+    reqs = search.search('requests', q, 'after')
+    tasks = search.search('tasks', q, 'tasks_after')
+    return render_template('search.html', title='Search', q=q, reqs=reqs, tasks=tasks)
+
+@requests.route('/new-request', methods=['GET', 'POST'])
+@login_required
+def new_request():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'cso' and current_user.role != 'scso': # redirect for everyone except cso and scso
+        return redirect(url_for('requests.index'))
+    'if users are cso or scso then we show the request form'
+    form = RequestForm()
+    if form.validate_on_submit():
+        req = Request(client_name=form.client_name.data, 
+            event_type=form.event_type.data, event_details=form.event_details.data,
+            client_budget=form.client_budget.data, feedback=form.feedback.data, status=form.status.data, created_by=current_user.username,
+            user_id=current_user.id)
+
+        workflow.apply(req, 'create', current_user)
+        
+        db.session.add(req)
+        db.session.flush()
+        # after the commit, in the background
+        notify_assignees.delay('request', [req.id])
+        db.session.commit()
+
+        flash('Request for client ' + form.client_name.data + ' created successfully!')
+        return redirect(url_for('requests.index'))
+    return render_template('request.html', title='Create New Request', form=form)
+
+@requests.route('/pending-updates', methods=['GET'])
+@login_required
+def pending_updates():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role == 'cso':
+        return redirect(url_for('requests.index'))
+    # get all pending requests assigned to this role/user
+    fragments.sync()
+    reqs = keyset_page(readmodel.request_cards(assigned_to=current_user.role), Request.id)
+    form = BulkTransitionForm()
+    form.action.choices = [(a, workflow.ACTION_LABELS[a]) for a in workflow.actions_for(current_user.role)]
+    return render_template('pending-updates.html', title='Update Pending Requests', reqs=reqs, form=form)
+
+# apply one workflow action to every request ticked on the pending updates page
+@requests.route('/requests/transition', methods=['POST'])
+@login_required
+def bulk_transition():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    form = BulkTransitionForm()
+    form.action.choices = [(a, workflow.ACTION_LABELS[a]) for a in workflow.actions_for(current_user.role)]
+    if form.validate_on_submit():
+        ids = request.form.getlist('ids', type=int)
+        try:
+            moved = workflow.transition_many(ids, form.action.data, current_user)
+        except workflow.InvalidTransition as e:
+            flash(str(e))
+            return redirect(url_for('requests.pending_updates'))
+        except StaleDataError:
+            db.session.rollback()
+            flash('Some of the selected requests were changed by someone else, nothing was updated. Please try again')
+            return redirect(url_for('requests.pending_updates'))
+        if moved:
+            notify_assignees.delay('request', ids)
+        db.session.commit()
+        flash('{} of {} selected requests updated'.format(moved, len(ids)))
+    return redirect(url_for('requests.pending_updates'))
+
+@requests.route('/update-request/<reqid>', methods=['GET', 'POST'])
+@login_required
+def update_request(reqid):
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role == 'cso':
+        return redirect(url_for('requests.index'))
+    if request.method == 'GET':
+        # the saved version of the request is all the form shows
+        row = db.session.query(Request.version, Request.updated_at).filter_by(id=reqid).first()
+        if row is None:
+            return archived(reqid)
+        unchanged = conditional.not_modified(tuple(row), forms=True)
+        if unchanged:
+            return unchanged
+    # pull the url
+    req = Request.query.filter_by(id=reqid).first()
+    if req is None:
+        return archived(reqid)
+    form = RequestForm()
+
+    # when POST call, means request is updated
+    if form.validate_on_submit():
+        if stale(req, form):
+            return conflict(req, form, 'requests.update_request', reqid=req.id)
+        if form.closesubmit.data:
+            try:
+                workflow.apply(req, 'reject', current_user)
+            except workflow.InvalidTransition as e:
+                flash(str(e))
+                return redirect(url_for('requests.index'))
+            db.session.add(req)
+            notify_assignees.delay('request', [req.id])
+            try:
+                db.session.commit()
+            except StaleDataError:
+                return conflict(req, form, 'requests.update_request', reqid=req.id)
+            flash('Request status updated')
+            return redirect(url_for('requests.index'))
+        # save the edits
+        # When GET call, show the request based on specific request ID
+        req.client_name=form.client_name.data
+        req.event_type=form.event_type.data
+        req.event_details=form.event_details.data
+        req.client_budget=form.client_budget.data
+        req.feedback=form.feedback.data
+        req.status=form.status.data
+        if form.servicessubmit.data:
+            action = 'services'
+        elif form.productionsubmit.data:
+            action = 'production'
+        else:
+            action = 'submit'
+        try:
+            workflow.apply(req, action, current_user)
+        except workflow.InvalidTransition as e:
+            # throw away the edits copied from the form
+            db.session.rollback()
+            flash(str(e))
+            return redirect(url_for('requests.index'))
+        notify_assignees.delay('request', [req.id])
+        try:
+            db.session.commit()
+        except StaleDataError:
+            return conflict(req, form, 'requests.update_request', reqid=req.id)
+        flash('Request details updated for ' + form.client_name.data)
+        return redirect(url_for('requests.index'))
+
+    elif request.method == 'GET':
+        form.client_name.data = req.client_name
+        form.event_type.data = req.event_type
+        form.event_details.data = req.event_details
+        form.client_budget.data = req.client_budget
+        form.status.data = req.status
+        form.version.data = req.version
+        
+    return render_template('update.html', title='Update Request', req=req, form=form)
+
+# who changed what on a request, newest first
+@requests.route('/request/<reqid>/history', methods=['GET'])
+@login_required
+def request_history(reqid):
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role == 'cso':
+        return redirect(url_for('requests.index'))
+    req = Request.query.filter_by(id=reqid).first()
+    if req is None:
+        return archived(reqid)
+    # entries of this worker's own recent commits may still be queued
+    audit.writer().flush()
+    entries = keyset_page(readmodel.audit_entries(request_id=req.id), AuditEntry.id)
+    return render_template('history.html', title='Request History', req=req, entries=entries)
@@ -0,0 +1,93 @@
+from flask import Blueprint, render_template, flash, redirect, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy.orm.exc import StaleDataError
+from app import db
+from app.edits import conflict, route_back, stale
+from app.forms import ResourceForm
+from app.models import Resource
+from app.notifications import notify_assignees
+from app.pagination import keyset_page
+from app import conditional, readmodel
+
+'resource (hiring) requests between the planning managers and hr'
+resources = Blueprint('resources', __name__)
+
+@resources.route('/new-resource', methods=['GET', 'POST'])
+@login_required
+def new_resource():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'sm' and current_user.role != 'pm':
+        return redirect(url_for('requests.index'))
+    
+    form = ResourceForm()
+
+    if form.validate_on_submit():
+        res = Resource(job_title=form.job_title.data, job_profile=form.job_profile.data,
+            experience_reqd=form.experience_reqd.data, salary_max=form.salary_max.data,
+            salary_min=form.salary_min.data)
+        res.created_by = current_user.role
+        res.assigned_to = 'hr'
+
+        db.session.add(res)
+        db.session.flush()
+        notify_assignees.delay('resource', [res.id])
+        db.session.commit()
+        
+        flash('Resource request raised successfully!')
+        return redirect(url_for('requests.index'))
+
+    return render_template('resource.html', title='Resource Request Form', form=form)
+
+@resources.route('/all-resources', methods=['GET'])
+@login_required
+def all_resources():
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'hr':
+        return redirect(url_for('requests.index'))
+    
+    unchanged = conditional.not_modified(conditional.fingerprint(Resource, assigned_to=current_user.role))
+    if unchanged:
+        return unchanged
+    # get all resource requests
+    resources = keyset_page(readmodel.resources(assigned_to=current_user.role), Resource.id)
+    return render_template('all-resources.html', title='Resource Requests', resources=resources)
+
+@resources.route('/update-resource/<resid>', methods=['GET', 'POST'])
+@login_required
+def update_resource(resid):
+    if current_user.role is None:
+        return redirect(url_for('auth.login'))
+    if current_user.role != 'hr':
+        return redirect(url_for('requests.index'))
+
+    res = Resource.query.filter_by(id=resid).first_or_404()
+    form = ResourceForm()
+
+    if form.validate_on_submit():
+        if stale(res, form):
+            return conflict(res, form, 'resources.update_resource', resid=res.id)
+        res.job_title = form.job_title.data
+        res.job_profile = form.job_profile.data
+        res.experience_reqd = form.experience_reqd.data
+        res.salary_max = form.salary_max.data
+        res.salary_min = form.salary_min.data
+        route_back(res)
+        db.session.add(res)
+        notify_assignees.delay('resource', [res.id])
+        try:
+            db.session.commit()
+        except StaleDataError:
+            return conflict(res, form, 'resources.update_resource', resid=res.id)
+        flash('Resource request updated successfully!')
+        return redirect(url_for('requests.index'))
+    elif request.method == 'GET':
+        form.job_title.data = res.job_title
+        form.job_profile.data = res.job_profile
+        form.experience_reqd.data = res.experience_reqd
+        form.salary_max.data = res.salary_max
+        form.salary_min.data = res.salary_min
+        form.version.data = res.version
+        
+    return render_template('resource.html', title='Update Resource Request', res=res, form=form)
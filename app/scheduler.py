@@ -0,0 +1,180 @@
+import bisect
+import heapq
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models import Task, User
+
+'''
+assigning tasks to the members of a subteam
+
+the members of subteam smtm are the users with role smtm, likewise pmtm. the load
+of a member is their open tasks (completed_at is None), counted one each or
+weighted by their estimated effort in hours, as TASK_LOAD says. it is read with
+one GROUP BY over the (subteam, completed_at, assignee, effort) index.
+
+new tasks go to the least loaded member. the members sit in a heap keyed on
+load, so placing n tasks over m members is O(n log m): a batch is placed heaviest
+first, each time on the top of the heap, which then moves down by its weight.
+auto_assign does the same for every open task without an assignee, or whose
+assignee left the subteam. rebalance then moves tasks from the most to the least
+loaded member, the task closest to half the gap between them each time, until no
+move narrows it. tasks stay where they are otherwise, so a rebalance moves as
+little work as it can.
+
+the plan_* functions work on plain dicts and lists and are where the time goes,
+the rest reads the rows and writes the new assignees in one executemany
+'''
+
+def weight(effort, load_by):
+    'what one open task adds to the load of its assignee'
+    if load_by == 'effort':
+        return max(effort or 1, 1)
+    return 1
+
+def plan_assign(load, tasks):
+    '''
+    tasks are (weight, id). places them heaviest first on the least loaded member
+    of load (member -> load, updated in place), returns {task id: member}
+    '''
+    heap = [(value, name) for name, value in load.items()]
+    heapq.heapify(heap)
+    plan = {}
+    if not heap:
+        return plan
+    for w, task_id in sorted(tasks, key=lambda t: (-t[0], t[1])):
+        value, name = heap[0]
+        plan[task_id] = name
+        load[name] = value + w
+        heapq.heapreplace(heap, (value + w, name))
+    return plan
+
+def plan_rebalance(load, assigned):
+    '''
+    assigned is member -> [(weight, id)] of their open tasks, load the sum of the
+    weights per member. moves tasks from the most to the least loaded member while
+    that narrows the gap between them, updates both in place and returns
+    {task id: member} of the tasks that moved
+    '''
+    # lazy heaps, an entry whose load is not the member's load any more is skipped
+    low = [(value, name) for name, value in load.items()]
+    high = [(-value, name) for name, value in load.items()]
+    heapq.heapify(low)
+    heapq.heapify(high)
+    for tasks in assigned.values():
+        tasks.sort()
+    moves = {}
+    while low:
+        while low[0][0] != load[low[0][1]]:
+            heapq.heappop(low)
+        while -high[0][0] != load[high[0][1]]:
+            heapq.heappop(high)
+        least, most = low[0][1], high[0][1]
+        gap = load[most] - load[least]
+        # moving weight w < gap leaves both closer to the middle, closest to gap / 2 helps most
+        tasks = assigned[most]
+        half = gap / 2.0
+        i = bisect.bisect_left(tasks, (half,))
+        if i < len(tasks) and tasks[i][0] < gap and (i == 0 or tasks[i][0] - half <= half - tasks[i - 1][0]):
+            task = tasks.pop(i)
+        elif i > 0:
+            task = tasks.pop(i - 1)
+        else:
+            return moves
+        bisect.insort(assigned[least], task)
+        load[most] -= task[0]
+        load[least] += task[0]
+        moves[task[1]] = least
+        heapq.heappush(low, (load[most], most))
+        heapq.heappush(low, (load[least], least))
+        heapq.heappush(high, (-load[most], most))
+        heapq.heappush(high, (-load[least], least))
+    return moves
+
+def members(subteam):
+    'usernames of the members of subteam'
+    return [row.username for row in db.session.query(User.username).filter_by(role=subteam).order_by(User.username)]
+
+def open_tasks(subteam):
+    'filter for the open tasks of subteam'
+    return db.and_(Task.subteam == subteam, Task.completed_at.is_(None))
+
+def loads(subteam, names, load_by=None):
+    'member -> open load for the members names of subteam, 0 for those with nothing open'
+    load_by = load_by or current_app.config['TASK_LOAD']
+    # the same as weight(), in SQL
+    measure = db.func.count() if load_by == 'count' else db.func.sum(db.case((Task.effort > 1, Task.effort), else_=1))
+    load = dict.fromkeys(names, 0)
+    rows = db.session.query(Task.assignee, measure).filter(open_tasks(subteam), Task.assignee.isnot(None)) \
+        .group_by(Task.assignee)
+    for assignee, value in rows:
+        if assignee in load:
+            load[assignee] = value or 0
+    return load
+
+def assign_new(subteam, tasks, load_by=None):
+    '''
+    set the assignee of new Task objects of subteam before they are added. a subteam
+    without members leaves them unassigned for a later auto_assign
+    '''
+    load_by = load_by or current_app.config['TASK_LOAD']
+    names = members(subteam)
+    plan = plan_assign(loads(subteam, names, load_by), [(weight(t.effort, load_by), n) for n, t in enumerate(tasks)])
+    for n, task in enumerate(tasks):
+        task.assignee = plan.get(n)
+
+def save(plan, chunk=500):
+    'write {task id: assignee}, one UPDATE per member and chunk of their task ids'
+    by_member = {}
+    for task_id, name in plan.items():
+        by_member.setdefault(name, []).append(task_id)
+    table = Task.__table__
+    connection = db.session.connection()
+    now = datetime.utcnow()
+    for name, ids in by_member.items():
+        for start in range(0, len(ids), chunk):
+            connection.execute(table.update().where(table.c.id.in_(ids[start:start + chunk]))
+                .values(assignee=name, updated_at=now))
+
+def auto_assign(subteam, load_by=None):
+    '''
+    assign every open task of subteam that has no assignee, or one who is no longer
+    in the subteam. returns {task id: assignee} of those assigned, the caller commits
+    '''
+    load_by = load_by or current_app.config['TASK_LOAD']
+    names = members(subteam)
+    if not names:
+        return {}
+    # locked until the commit on databases that support it, so two managers cannot assign the same task
+    pending = db.session.connection().execute(select(Task.id, Task.effort).where(open_tasks(subteam),
+        db.or_(Task.assignee.is_(None), Task.assignee.notin_(names))).with_for_update()).all()
+    plan = plan_assign(loads(subteam, names, load_by), [(weight(effort, load_by), task_id) for task_id, effort in pending])
+    save(plan)
+    return plan
+
+def rebalance(subteam, load_by=None):
+    '''
+    auto_assign, then even out the open load of the members of subteam.
+    returns ({task id: assignee} of those assigned, of those moved), the caller commits
+    '''
+    load_by = load_by or current_app.config['TASK_LOAD']
+    new = auto_assign(subteam, load_by)
+    names = members(subteam)
+    if not names:
+        return new, {}
+    # plain rows off the connection, the ORM query costs more than the planning for a few thousand tasks
+    rows = db.session.connection().execute(select(Task.id, Task.effort, Task.assignee).where(open_tasks(subteam),
+        Task.assignee.in_(names)).with_for_update()).all()
+    load = dict.fromkeys(names, 0)
+    assigned = dict((name, []) for name in names)
+    before = {}
+    for task_id, effort, assignee in rows:
+        w = weight(effort, load_by)
+        load[assignee] += w
+        assigned[assignee].append((w, task_id))
+        before[task_id] = assignee
+    # a task moved away and back again did not move
+    plan = dict((task_id, name) for task_id, name in plan_rebalance(load, assigned).items() if before[task_id] != name)
+    save(plan)
+    return new, plan
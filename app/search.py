@@ -0,0 +1,119 @@
+import re
+from flask import request
+from flask_login import current_user
+from sqlalchemy import and_, column, literal, literal_column, or_, table
+from app import db
+from app.models import Request, Task
+from app.pagination import Page, page_args
+from app.readmodel import CARD_COLUMNS, TASK_COLUMNS
+
+'''
+full-text search over requests and tasks
+
+on SQLite the text columns are indexed by the FTS5 tables request_fts / task_fts
+that migration a0385eea9983 creates and keeps in sync with triggers. results are
+ranked with bm25 and paged with a (rank, id) cursor. PostgreSQL uses to_tsvector
+over the same columns (GIN index from the same migration), anything else, or a
+SQLite database created without the migration, falls back to a LIKE scan.
+'''
+
+'kind -> (model, FTS5 table, indexed columns, columns of the result rows)'
+SEARCHES = {
+    'requests': (Request, 'request_fts', ['client_name', 'event_type', 'event_details'], CARD_COLUMNS),
+    'tasks': (Task, 'task_fts', ['task_name', 'task_details'], TASK_COLUMNS),
+}
+
+_fts_tables = {}
+
+def backend(fts):
+    'fts5, postgresql or like'
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return 'postgresql'
+    if dialect == 'sqlite':
+        if fts not in _fts_tables:
+            _fts_tables[fts] = db.session.execute(db.text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': fts}).first() is not None
+        if _fts_tables[fts]:
+            return 'fts5'
+    return 'like'
+
+def terms_of(text):
+    'words of the user\'s query, anything else is dropped so it can never be query syntax'
+    return re.findall(r'\w+', text, re.UNICODE)[:10]
+
+def visibility(kind):
+    'the rows current_user may find, same rules as the dashboards. None means nothing'
+    role = current_user.role
+    if kind == 'requests':
+        rules = [Request.assigned_to == role, Request.created_by == current_user.username]
+        if role == 'sm':
+            rules.append(Request.tasks_for == 'services')
+        elif role == 'pm':
+            rules.append(Request.tasks_for == 'production')
+        return or_(*rules)
+    if role in ('smtm', 'pmtm'):
+        return Task.subteam == role
+    if role in ('sm', 'pm'):
+        return Task.subteam == role + 'tm'
+    return None
+
+def ranked(kind, terms):
+    'query of read model rows with a score column matching all terms, lower score is better'
+    model, fts, columns, fields = SEARCHES[kind]
+    how = backend(fts)
+    def rows_of(score):
+        query = db.session.query(*fields, score.label('score')).select_from(model)
+        if kind == 'tasks':
+            query = query.outerjoin(Request, Task.request == Request.id)
+        return query
+    if how == 'fts5':
+        index = table(fts, column('rowid'), column('rank'))
+        match = ' '.join('"{}"*'.format(t) for t in terms)
+        score = index.c.rank
+        query = rows_of(score).join(index, index.c.rowid == model.id) \
+            .filter(literal_column(fts).op('MATCH')(match))
+    elif how == 'postgresql':
+        document = db.func.coalesce(getattr(model, columns[0]), '')
+        for name in columns[1:]:
+            document = document + ' ' + db.func.coalesce(getattr(model, name), '')
+        vector = db.func.to_tsvector('simple', document)
+        tsquery = db.func.plainto_tsquery('simple', ' '.join(terms))
+        score = -db.func.ts_rank(vector, tsquery)
+        query = rows_of(score).filter(vector.op('@@')(tsquery))
+    else:
+        score = literal(0.0)
+        query = rows_of(score)
+        for t in terms:
+            pattern = '%' + t.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            query = query.filter(or_(*[getattr(model, name).ilike(pattern, escape='\\') for name in columns]))
+    return query, score
+
+def search(kind, text, param):
+    '''
+    one Page of kind matching text that current_user may see, best matches first.
+    the cursor in ?<param>= is "<score>:<id>" of the last row shown
+    '''
+    model = SEARCHES[kind][0]
+    limit = page_args(param)[1]
+    terms = terms_of(text)
+    rule = visibility(kind)
+    if not terms or rule is None:
+        return Page([], None, limit, param)
+    query, score = ranked(kind, terms)
+    query = query.filter(rule)
+    cursor = request.args.get(param)
+    if cursor:
+        try:
+            last_score, last_id = cursor.rsplit(':', 1)
+            last_score, last_id = float(last_score), int(last_id)
+        except ValueError:
+            last_score = None
+        if last_score is not None:
+            query = query.filter(or_(score > last_score, and_(score == last_score, model.id > last_id)))
+    rows = query.order_by(score, model.id).limit(limit + 1).all()
+    next_after = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_after = '{!r}:{}'.format(float(rows[-1].score), rows[-1].id)
+    return Page(rows, next_after, limit, param)
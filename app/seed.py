@@ -0,0 +1,125 @@
+import random
+from datetime import datetime, timedelta
+from app import db, summary
+from app.forms import RegistrationForm
+from app.models import Budget, Request, Resource, Task, User
+
+'''
+synthetic data for development and benchmarks
+
+users of every role on the registration form, and requests spread over the
+workflow roughly like a live system: most are somewhere in the approval chain,
+some are being planned with tasks, a few were rejected. the same seed always
+produces the same data. rows go in with bulk inserts, the summary counters are
+rebuilt at the end.
+'''
+
+ROLES = [value for value, label in RegistrationForm.role.kwargs['choices']]
+
+'where requests sit, as (weight, assigned_to, status, ready_for_planning, tasks_for)'
+REQUEST_STATES = [
+    (30, 'scso', 'Open', False, None),
+    (20, 'fm', 'Open', False, None),
+    (15, 'am', 'Open', False, None),
+    (10, 'scso', 'Open', True, None),
+    (10, 'sm', 'Open', True, 'services'),
+    (10, 'pm', 'Open', True, 'production'),
+    (5, 'scso', 'Rejected', False, None),
+]
+
+CLIENTS = ['Volvo', 'Ikea', 'Spotify', 'Ericsson', 'H&M', 'Scania', 'KTH', 'Saab', 'Klarna', 'SEB']
+EVENT_TYPES = ['Wedding', 'Conference', 'Gala dinner', 'Product launch', 'Birthday party', 'Workshop']
+PLACES = ['Stockholm', 'Gothenburg', 'Uppsala', 'Malmo', 'Kiruna']
+TASKS = ['Catering', 'Decorations', 'Music', 'Photography', 'Venue setup', 'Lighting', 'Transport']
+JOBS = ['Chef', 'Waiter', 'Photographer', 'Sound engineer', 'Decorator']
+
+def create_users(per_role=2, password='password'):
+    'per_role users for every role, named <role><n>, e.g. scso0. returns {role: [usernames]}'
+    users = {}
+    for role in ROLES:
+        for n in range(per_role):
+            username = '{}{}'.format(role, n)
+            if User.query.filter_by(username=username).first() is None:
+                user = User(username=username, name='{} {}'.format(role.upper(), n),
+                    email='{}@eventy.se'.format(username), role=role)
+                user.set_password(password)
+                db.session.add(user)
+            users.setdefault(role, []).append(username)
+    db.session.commit()
+    return users
+
+def request_rows(rng, users, count):
+    weights = [s[0] for s in REQUEST_STATES]
+    now = datetime.utcnow()
+    for _ in range(count):
+        weight, assigned_to, status, ready, tasks_for = rng.choices(REQUEST_STATES, weights)[0]
+        # the last role that acted on it
+        actor = {'scso': 'am' if ready else 'cso', 'fm': 'scso', 'am': 'fm', 'sm': 'scso', 'pm': 'scso'}[assigned_to]
+        if status == 'Rejected':
+            actor = rng.choice(['scso', 'am'])
+        # rejected and planned requests closed some time in the last two years, see app/archive.py
+        closed_at = None
+        if status == 'Rejected' or tasks_for:
+            closed_at = now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+        yield dict(client_name=rng.choice(CLIENTS), event_type=rng.choice(EVENT_TYPES),
+            event_details='{} for {} guests in {}'.format(rng.choice(EVENT_TYPES), rng.randint(10, 500), rng.choice(PLACES)),
+            client_budget=rng.randrange(1000, 500000, 500), feedback='', status=status,
+            created_by=rng.choice(users[actor]), assigned_to=assigned_to,
+            ready_for_planning=ready, tasks_for=tasks_for, closed_at=closed_at)
+
+def insert_chunked(model, rows, chunk=5000):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk:
+            db.session.bulk_insert_mappings(model, batch)
+            batch = []
+    if batch:
+        db.session.bulk_insert_mappings(model, batch)
+
+def generate(requests=1000, seed=0, users_per_role=2):
+    '''
+    add requests (and tasks, budgets and resources in proportion) on top of
+    what is already in the database. returns the users created
+    '''
+    rng = random.Random(seed)
+    users = create_users(users_per_role)
+    first_id = (db.session.query(db.func.max(Request.id)).scalar() or 0) + 1
+    insert_chunked(Request, request_rows(rng, users, requests))
+    db.session.commit()
+
+    planned = db.session.query(Request.id, Request.tasks_for) \
+        .filter(Request.id >= first_id, Request.tasks_for.isnot(None)).all()
+    now = datetime.utcnow()
+    def task_rows():
+        for req_id, tasks_for in planned:
+            manager = 'sm' if tasks_for == 'services' else 'pm'
+            for _ in range(rng.randint(0, 5)):
+                # most are assigned, some unevenly, a third are done already
+                assignee = rng.choice(users[manager + 'tm'] * 3 + [users[manager + 'tm'][0], None])
+                completed_at = now - timedelta(minutes=rng.randrange(60 * 24 * 90)) if rng.random() < 0.3 else None
+                yield dict(task_name=rng.choice(TASKS), task_details='{} for request {}'.format(rng.choice(TASKS), req_id),
+                    created_by=manager, subteam=manager + 'tm', request=req_id, assignee=assignee,
+                    effort=rng.choice([1, 2, 4, 8, 16]), completed_at=completed_at)
+    insert_chunked(Task, task_rows())
+
+    def budget_rows():
+        for _ in range(max(1, requests // 10)):
+            manager = rng.choice(['sm', 'pm'])
+            yield dict(budget_for=rng.choice(TASKS), budget_quote=rng.randrange(1000, 100000, 100),
+                budget_details='extra budget', created_by=manager, assigned_to=rng.choice(['fm', 'fm', manager]))
+    insert_chunked(Budget, budget_rows())
+
+    def resource_rows():
+        for _ in range(max(1, requests // 10)):
+            manager = rng.choice(['sm', 'pm'])
+            low = rng.randrange(20000, 40000, 1000)
+            yield dict(job_title=rng.choice(JOBS), job_profile='temporary', experience_reqd=rng.randint(0, 10),
+                salary_min=low, salary_max=low + rng.randrange(0, 20000, 1000), created_by=manager,
+                assigned_to=rng.choice(['hr', 'hr', manager]))
+    insert_chunked(Resource, resource_rows())
+
+    # bulk inserts skip the counter events
+    summary.rebuild()
+    db.session.commit()
+    return users
@@ -0,0 +1,169 @@
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Budget, Request, SummaryCounter
+
+'''
+workflow summary counters
+
+the totals managers look at (requests per role, per status, per planning team,
+client budget and budget quotes per creator) are kept in summary_counter and
+adjusted by the delta of every Request/Budget insert, update and delete, inside
+the same transaction. the deltas of a flush are added up per counter and written
+at its end, one statement per counter that changed however many rows did. the index panel reads a handful of rows instead of running
+GROUP BY over the whole request table. a counter is created by its first
+change with INSERT .. ON CONFLICT DO UPDATE on PostgreSQL and SQLite, so writers
+racing on a new key add up instead of one failing the unique constraint.
+`flask rebuild-summary` recomputes them from scratch if they ever drift.
+'''
+
+'(metric, key column, amount column or None to count rows)'
+REQUEST_METRICS = [
+    ('requests_by_role', 'assigned_to', None),
+    ('requests_by_status', 'status', None),
+    ('requests_by_tasks_for', 'tasks_for', None),
+    ('client_budget_by_creator', 'created_by', 'client_budget'),
+]
+BUDGET_METRICS = [
+    ('budget_quote_by_creator', 'created_by', 'budget_quote'),
+]
+METRICS = {Request: REQUEST_METRICS, Budget: BUDGET_METRICS}
+
+'titles for the index panel'
+METRIC_TITLES = {
+    'requests_by_role': 'Requests with each role',
+    'requests_by_status': 'Requests by status',
+    'requests_by_tasks_for': 'Requests in planning per team',
+    'client_budget_by_creator': 'Client budget (SEK) by last updater',
+    'budget_quote_by_creator': 'Budget quotes (SEK) by requester',
+}
+
+def deltas(metrics, before, after):
+    '''
+    counter changes for one row going from before to after, both dicts of column
+    values or None for an insert / delete. rows with no key (e.g. not in
+    planning yet) are not counted
+    '''
+    changes = {}
+    for metric, key_column, amount_column in metrics:
+        for row, sign in ((before, -1), (after, 1)):
+            if row is None or row.get(key_column) is None:
+                continue
+            amount = 1 if amount_column is None else (row.get(amount_column) or 0)
+            key = (metric, row[key_column])
+            changes[key] = changes.get(key, 0) + sign * amount
+    return changes
+
+UPSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+def upsert(connection, table):
+    '''
+    INSERT of a counter row that adds its value to the row already there. one
+    statement, so two transactions creating the same counter cannot both insert it
+    (uq_summary_counter_metric_key). None on databases without INSERT .. ON CONFLICT
+    '''
+    insert = UPSERTS.get(connection.dialect.name)
+    if insert is None:
+        return None
+    statement = insert(table)
+    return statement.on_conflict_do_update(index_elements=[table.c.metric, table.c.key],
+        set_={'value': table.c.value + statement.excluded.value})
+
+def apply(connection, changes):
+    'add changes {(metric, key): delta} to the counters with the given connection'
+    table = SummaryCounter.__table__
+    rows = [dict(metric=metric, key=key, value=delta) for (metric, key), delta in changes.items() if delta]
+    if not rows:
+        return
+    statement = upsert(connection, table)
+    if statement is not None:
+        for row in rows:
+            connection.execute(statement, row)
+        return
+    for row in rows:
+        result = connection.execute(table.update()
+            .where(table.c.metric == row['metric']).where(table.c.key == row['key'])
+            .values(value=table.c.value + row['value']))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+def merge(total, changes):
+    for key, delta in changes.items():
+        total[key] = total.get(key, 0) + delta
+    return total
+
+def columns_of(model, target, history=False):
+    'column values of target, or the values before this flush when history is True'
+    values = {}
+    state = db.inspect(target)
+    for metric, key_column, amount_column in METRICS[model]:
+        for column in (key_column, amount_column):
+            if column is None:
+                continue
+            if history and state.attrs[column].history.deleted:
+                values[column] = state.attrs[column].history.deleted[0]
+            else:
+                values[column] = getattr(target, column)
+    return values
+
+def counted_columns(model):
+    return set(column for metric, key_column, amount_column in METRICS[model]
+        for column in (key_column, amount_column) if column is not None)
+
+def listen(model):
+    # an expired attribute (e.g. after a commit) is set without loading it, so its
+    # history has no old value and the delta would be lost. active_history loads it first
+    for column in counted_columns(model):
+        event.listen(getattr(model, column), 'set', lambda target, value, oldvalue, initiator: value,
+            active_history=True)
+
+    # collected per flush and written once in write_changes, not a statement per row and metric
+    @event.listens_for(model, 'after_insert')
+    def inserted(mapper, connection, target):
+        collect(target, deltas(METRICS[model], None, columns_of(model, target)))
+
+    @event.listens_for(model, 'after_update')
+    def updated(mapper, connection, target):
+        collect(target, deltas(METRICS[model], columns_of(model, target, history=True), columns_of(model, target)))
+
+    @event.listens_for(model, 'after_delete')
+    def deleted(mapper, connection, target):
+        collect(target, deltas(METRICS[model], columns_of(model, target, history=True), None))
+
+def collect(target, changes):
+    merge(Session.object_session(target).info.setdefault('summary_changes', {}), changes)
+
+@event.listens_for(Session, 'after_flush')
+def write_changes(session, flush_context):
+    changes = session.info.pop('summary_changes', None)
+    if changes:
+        apply(session.connection(), changes)
+
+@event.listens_for(Session, 'after_rollback')
+def drop_changes(session):
+    session.info.pop('summary_changes', None)
+
+listen(Request)
+listen(Budget)
+
+def panel():
+    '{metric: [(key, value), ...]} for the index summary panel'
+    rows = db.session.query(SummaryCounter.metric, SummaryCounter.key, SummaryCounter.value) \
+        .filter(SummaryCounter.value != 0) \
+        .order_by(SummaryCounter.metric, SummaryCounter.key).all()
+    grouped = dict((metric, []) for metric in METRIC_TITLES)
+    for row in rows:
+        grouped.setdefault(row.metric, []).append((row.key, row.value))
+    return grouped
+
+def rebuild():
+    'recompute every counter with GROUP BY queries, the caller commits'
+    SummaryCounter.query.delete()
+    for model, metrics in METRICS.items():
+        for metric, key_column, amount_column in metrics:
+            key = getattr(model, key_column)
+            value = db.func.count(model.id) if amount_column is None \
+                else db.func.coalesce(db.func.sum(getattr(model, amount_column)), 0)
+            for k, v in db.session.query(key, value).filter(key.isnot(None)).group_by(key):
+                db.session.add(SummaryCounter(metric=metric, key=k, value=v))
@@ -0,0 +1,163 @@
+from datetime import datetime
+from sqlalchemy.orm.exc import StaleDataError
+from app import db
+from app.models import Request
+from app.live import record_changes
+from app import audit, summary
+
+'''
+request workflow as a table
+
+a request's state is the role it is assigned to (Request.assigned_to). every
+transition says which roles may fire an action, from which states, where the
+request goes next and which columns change on the way. the list below is compiled
+once at import into a dict keyed by (role, action), so checking a transition is a
+single lookup plus a set membership test.
+'''
+
+'effect value meaning "the username of whoever fires the transition"'
+ACTOR = object()
+'effect value meaning "the time the transition fires"'
+NOW = object()
+
+class InvalidTransition(Exception):
+    pass
+
+class Transition(object):
+    '''
+    action: name of the action ('create', 'submit', 'reject', ...)
+    roles: roles allowed to fire it
+    sources: states (assigned_to values) it can fire from, None for a request that is not assigned yet
+    target: state after the transition, None keeps the request where it is
+    effects: {column: value} written together with the new state, ACTOR becomes the username
+    requires: {column: value} the request must already have
+    '''
+    def __init__(self, action, roles, sources, target, effects=None, requires=None):
+        self.action = action
+        self.roles = tuple(roles)
+        self.sources = frozenset(sources)
+        self.target = target
+        self.effects = effects or {}
+        self.requires = requires or {}
+
+    def values(self, actor):
+        'column values the transition writes'
+        now = datetime.utcnow()
+        values = dict((k, actor.username if v is ACTOR else now if v is NOW else v) for k, v in self.effects.items())
+        if self.target is not None:
+            values['assigned_to'] = self.target
+        return values
+
+    def __repr__(self):
+        return '<Transition {} {}>'.format(self.action, self.roles)
+
+TRANSITIONS = [
+    # a new request goes to the SCSO, or straight to finance when the SCSO creates it
+    Transition('create', ['cso'], [None], 'scso'),
+    Transition('create', ['scso'], [None], 'fm'),
+    # approval chain SCSO -> FM -> AM -> back to SCSO, ready for planning. a rejected
+    # request sent round again is open again
+    Transition('submit', ['scso'], ['scso'], 'fm', effects={'created_by': ACTOR, 'closed_at': None}),
+    Transition('submit', ['fm'], ['fm'], 'am', effects={'created_by': ACTOR, 'closed_at': None}),
+    Transition('submit', ['am'], ['am'], 'scso', effects={'created_by': ACTOR, 'ready_for_planning': True,
+        'closed_at': None}),
+    # managers and HR can edit what is assigned to them without moving it
+    Transition('submit', ['sm'], ['sm'], None, effects={'created_by': ACTOR}),
+    Transition('submit', ['pm'], ['pm'], None, effects={'created_by': ACTOR}),
+    Transition('submit', ['hr'], ['hr'], None, effects={'created_by': ACTOR}),
+    # SCSO hands an approved request to one of the planning teams, which closes it
+    # (closed requests are archived a while later, see app/archive.py)
+    Transition('services', ['scso'], ['scso'], 'sm', effects={'created_by': ACTOR, 'tasks_for': 'services',
+        'closed_at': NOW}, requires={'ready_for_planning': True}),
+    Transition('production', ['scso'], ['scso'], 'pm', effects={'created_by': ACTOR, 'tasks_for': 'production',
+        'closed_at': NOW}, requires={'ready_for_planning': True}),
+    Transition('reject', ['scso', 'am'], ['scso', 'am'], 'scso', effects={'status': 'Rejected', 'closed_at': NOW}),
+]
+
+'labels for the bulk action buttons'
+ACTION_LABELS = {
+    'submit': 'Approve and send on',
+    'services': 'Send to Services Team',
+    'production': 'Send to Production Team',
+    'reject': 'Reject',
+}
+
+def compile_table(transitions):
+    table = {}
+    for t in transitions:
+        for role in t.roles:
+            if (role, t.action) in table:
+                raise ValueError('two transitions for {} {}'.format(role, t.action))
+            table[(role, t.action)] = t
+    return table
+
+TABLE = compile_table(TRANSITIONS)
+
+def actions_for(role):
+    'actions role can fire on existing requests, in table order'
+    return [t.action for t in TRANSITIONS if role in t.roles and t.action != 'create']
+
+def lookup(role, action):
+    t = TABLE.get((role, action))
+    if t is None:
+        raise InvalidTransition('{} cannot {} a request'.format(role, action))
+    return t
+
+def check(req, role, action):
+    'the transition role would fire on req with action, raises InvalidTransition if not allowed'
+    t = lookup(role, action)
+    if req.assigned_to not in t.sources:
+        raise InvalidTransition('request {} is with {}, {} cannot {} it'.format(req.id, req.assigned_to, role, action))
+    for column, value in t.requires.items():
+        if getattr(req, column) != value:
+            raise InvalidTransition('request {} is not {}'.format(req.id, column.replace('_', ' ')))
+    return t
+
+def apply(req, action, actor):
+    'fire action on req as actor (current_user), the caller commits'
+    t = check(req, actor.role, action)
+    for column, value in t.values(actor).items():
+        setattr(req, column, value)
+    return t
+
+def transition_many(ids, action, actor):
+    '''
+    fire action on every request in ids as one UPDATE. requests that are not in
+    a source state or miss a requirement are left alone, returns how many moved.
+    raises StaleDataError if a request changed between reading and moving it,
+    the caller rolls back then, else it commits
+    '''
+    t = lookup(actor.role, action)
+    if None in t.sources:
+        raise InvalidTransition('{} only applies to new requests'.format(action))
+    if not ids:
+        return 0
+    applies = [Request.assigned_to.in_(t.sources)] + [getattr(Request, column) == value
+        for column, value in t.requires.items()]
+    matched = db.session.query(Request.id, Request.version, Request.assigned_to, Request.created_by,
+        Request.status, Request.tasks_for, Request.client_budget) \
+        .filter(Request.id.in_(ids), *applies).all()
+    if not matched:
+        return 0
+    values = t.values(actor)
+    # the same conditions again plus the version each row was read at, as version_id_col
+    # does for a single row. the ORM only bumps the version itself, a bulk UPDATE has to
+    moved = Request.query.filter(db.tuple_(Request.id, Request.version).in_([(row.id, row.version) for row in matched]),
+        *applies).update(dict(values, version=Request.version + 1), synchronize_session=False)
+    if moved != len(matched):
+        # someone changed some of the rows after they were read, the caller rolls back
+        raise StaleDataError('{} of {} requests changed while being moved'.format(len(matched) - moved, len(matched)))
+    # bulk UPDATEs skip the mapper events, write the changelog rows here
+    record_changes(db.session.connection(), [dict(request_id=row.id,
+        assigned_to=values.get('assigned_to', row.assigned_to), previous_assigned_to=row.assigned_to,
+        created_by=values.get('created_by', row.created_by), previous_created_by=row.created_by) for row in matched])
+    changes = {}
+    entries = []
+    for row in matched:
+        before = dict(row._mapping)
+        summary.merge(changes, summary.deltas(summary.REQUEST_METRICS, before, dict(before, **values)))
+        entries.extend(audit.diff(row.id, before, values, actor.username))
+    summary.apply(db.session.connection(), changes)
+    audit.add(db.session, entries)
+    db.session.info['requests_changed'] = True
+    return moved
@@ -0,0 +1,163 @@
+'''
+reader/writer concurrency benchmark for the database engine profiles
+
+for each profile it builds a fresh database at head of the migrations, fills it
+with app.seed and then, for --seconds, runs --readers threads loading the home
+page next to --writers threads creating requests, all through the Flask test
+client. each profile runs in its own interpreter since Config reads the
+environment at import time. reports calls/sec, latency percentiles and failed calls for readers
+and writers, as JSON:
+
+    python benchmarks/concurrency.py --profiles plain sqlite --readers 8 --writers 2 --output run.json
+
+the server profile needs a PostgreSQL database to work in, its tables are
+created by the run and should be empty:
+
+    python benchmarks/concurrency.py --profiles server --database-url postgresql://eventy@localhost/eventy_bench
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+REQUEST_FORM = {'client_name': 'Bench AB', 'event_type': 'Conference', 'event_details': 'concurrency run',
+    'client_budget': 50000, 'status': 'Open', 'submit': 'Submit'}
+
+'side -> (role, method, url, form data)'
+SIDES = {
+    'reader': ('scso', 'GET', '/index', None),
+    'writer': ('cso', 'POST', '/new-request', REQUEST_FORM),
+}
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))], 3)
+
+def run_profile(profile, args):
+    'one profile in this interpreter, returns its result dict'
+    path = None
+    if args.database_url and profile == 'server':
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    os.environ['DATABASE_PROFILE'] = profile
+    # seeding users is not what is measured here
+    os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+    from flask_migrate import upgrade
+    from app import create_app, db, init_migrations
+    from app.seed import generate
+    app = init_migrations(create_app())
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+        generate(args.requests, seed=args.seed)
+        engine = {'pool': type(db.engine.pool).__name__, 'dialect': db.engine.dialect.name}
+        if engine['dialect'] == 'sqlite':
+            engine['journal_mode'] = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        db.session.remove()
+
+    samples = dict((side, []) for side in SIDES)
+    failures = dict((side, 0) for side in SIDES)
+    ready = threading.Barrier(args.readers + args.writers + 1)
+    deadline = []
+
+    def worker(side):
+        role, method, url, data = SIDES[side]
+        client = app.test_client()
+        client.post('/login', data={'username': role + '0', 'password': 'password'})
+        ready.wait()
+        while time.perf_counter() < deadline[0]:
+            start = time.perf_counter()
+            if method == 'GET':
+                response = client.get(url)
+            else:
+                response = client.post(url, data=data)
+            response.get_data()
+            if response.status_code < 400:
+                samples[side].append((time.perf_counter() - start) * 1000)
+            else:
+                failures[side] += 1
+
+    threads = [threading.Thread(target=worker, args=('reader',)) for _ in range(args.readers)] + \
+        [threading.Thread(target=worker, args=('writer',)) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    deadline.append(time.perf_counter() + args.seconds)
+    ready.wait()
+    for thread in threads:
+        thread.join()
+    if path:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+    result = {'profile': profile, 'engine': engine, 'readers': args.readers, 'writers': args.writers}
+    for side, timings in samples.items():
+        result[side] = {
+            'calls': len(timings),
+            'per_sec': round(len(timings) / args.seconds, 1),
+            'p50_ms': percentile(timings, 50),
+            'p95_ms': percentile(timings, 95),
+            'p99_ms': percentile(timings, 99),
+            'mean_ms': round(statistics.mean(timings), 3) if timings else None,
+            'failed': failures[side],
+        }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=['plain', 'sqlite'])
+    parser.add_argument('--database-url', help='server database for the server profile')
+    parser.add_argument('--requests', type=int, default=5000, help='requests seeded before the run')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        json.dump(run_profile(args.worker, args), sys.stdout)
+        return
+    if 'server' in args.profiles and not args.database_url:
+        parser.error('the server profile needs --database-url')
+
+    results = []
+    for profile in args.profiles:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', profile] + sys.argv[1:]
+        run = subprocess.run(command, stdout=subprocess.PIPE, check=True)
+        results.append(json.loads(run.stdout))
+        for side in SIDES:
+            row = results[-1][side]
+            print('{:<8} {:<7} {:>8.1f}/s {:>9} ms p50 {:>9} ms p95 {:>5} failed'.format(
+                profile, side, row['per_sec'], row['p50_ms'], row['p95_ms'], row['failed']), file=sys.stderr)
+
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'seconds': args.seconds,
+            'requests': args.requests, 'seed': args.seed, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
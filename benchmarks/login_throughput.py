@@ -0,0 +1,77 @@
+'''
+login throughput at different password hashing costs
+
+drives POST /login through the Flask test client from several threads against a
+throwaway SQLite database and prints logins/sec and latency per setting. users are
+created with a different cost than the one being measured, so the first round of
+logins also pays for the rehash.
+
+    python benchmarks/login_throughput.py --iterations 50000 150000 260000 --threads 8
+'''
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, nargs='+', default=[50000, 150000, 260000, 600000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[2], help='PASSWORD_HASH_WORKERS settings')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--logins', type=int, default=10, help='logins per client')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from app import create_app, db, passwords
+    from app.models import User
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.app_context():
+        db.create_all()
+        app.config['PASSWORD_HASH_ITERATIONS'] = 1000
+        for i in range(args.threads):
+            user = User(username='bench{}'.format(i), role='cso')
+            user.set_password('secret')
+            db.session.add(user)
+        db.session.commit()
+
+    print('{:>10} {:>8} {:>12} {:>10} {:>10}'.format('iterations', 'workers', 'logins/sec', 'p50 ms', 'p95 ms'))
+    for workers in args.workers:
+        # fresh pool for each pool size
+        passwords._executor = None
+        app.config['PASSWORD_HASH_WORKERS'] = workers
+        for iterations in args.iterations:
+            app.config['PASSWORD_HASH_ITERATIONS'] = iterations
+            latencies = []
+
+            def client(i):
+                c = app.test_client()
+                for _ in range(args.logins):
+                    start = time.perf_counter()
+                    c.post('/login', data={'username': 'bench{}'.format(i), 'password': 'secret'})
+                    latencies.append(time.perf_counter() - start)
+                    c.get('/logout')
+
+            start = time.perf_counter()
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(args.threads)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            print('{:>10} {:>8} {:>12.1f} {:>10.1f} {:>10.1f}'.format(iterations, workers,
+                len(latencies) / elapsed, statistics.median(latencies) * 1000,
+                latencies[int(len(latencies) * 0.95) - 1] * 1000))
+    os.unlink(path)
+
+if __name__ == '__main__':
+    main()
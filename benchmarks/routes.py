@@ -0,0 +1,172 @@
+'''
+route level benchmark
+
+builds a throwaway SQLite database at head of the migrations, fills it with
+app.seed at each data size and drives every route through the Flask test client
+as a user of the role that normally uses it. for each route it reports latency
+percentiles, the number of SQL statements and of ORM objects loaded per call, as JSON so two runs can
+be diffed:
+
+    python benchmarks/routes.py --sizes 1000 10000 100000 --repeat 30 --output before.json
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+REQUEST_FORM = {'client_name': 'Bench AB', 'event_type': 'Conference', 'event_details': 'benchmark run',
+    'client_budget': 50000, 'status': 'Open', 'submit': 'Submit'}
+
+def take(pool, n):
+    'n ids from the pool, already used ids are reused once it runs dry'
+    taken = [pool.pop() for _ in range(min(n, len(pool) - 1))]
+    return taken or pool[:n]
+
+def routes(ids):
+    '''
+    (name, role, method, url or callable returning one, form/json data).
+    ids holds pools of request ids in the right state for the mutating routes
+    '''
+    return [
+        ('index', 'scso', 'GET', '/index', None),
+        ('index (manager)', 'fm', 'GET', '/index', None),
+        ('pending_updates', 'fm', 'GET', '/pending-updates', None),
+        ('planning_dashboard', 'sm', 'GET', '/planning', None),
+        ('view_tasks', 'smtm', 'GET', '/all-tasks', None),
+        ('all_resources', 'hr', 'GET', '/all-resources', None),
+        ('all_budgets', 'pm', 'GET', '/all-budgets', None),
+        ('update_request (form)', 'fm', 'GET', lambda: '/update-request/{}'.format(ids['fm'][0]), None),
+        ('add_tasks (form)', 'sm', 'GET', lambda: '/request/{}/tasks'.format(ids['sm'][0]), None),
+        ('search', 'scso', 'GET', '/search?q=volvo+wedding', None),
+        # polls of unchanged pages, sent with the ETag of the page, see app/conditional.py
+        ('index (revalidate)', 'scso', 'REVALIDATE', '/index', None),
+        ('planning_dashboard (revalidate)', 'sm', 'REVALIDATE', '/planning', None),
+        ('view_tasks (revalidate)', 'smtm', 'REVALIDATE', '/all-tasks', None),
+        ('update_request (revalidate)', 'fm', 'REVALIDATE', lambda: '/update-request/{}'.format(ids['fm'][0]), None),
+        ('new_request', 'cso', 'POST', '/new-request', REQUEST_FORM),
+        ('update_request', 'fm', 'POST', lambda: '/update-request/{}'.format(take(ids['fm'], 1)[0]), REQUEST_FORM),
+        ('add_tasks', 'sm', 'POST', lambda: '/request/{}/tasks'.format(ids['sm'][0]),
+            {'task_name': 'Bench', 'task_details': 'benchmark task'}),
+        ('new_resource', 'sm', 'POST', '/new-resource', {'job_title': 'Chef', 'job_profile': 'temporary',
+            'salary_max': 40000, 'salary_min': 30000, 'experience_reqd': 2}),
+        ('new_budget', 'pm', 'POST', '/new-budget', {'budget_for': 'Music', 'budget_quote': 5000,
+            'budget_details': 'benchmark'}),
+        ('api create requests x50', 'cso', 'JSON', '/api/v1/requests', [dict(REQUEST_FORM) for _ in range(50)]),
+        ('bulk transition x50', 'scso', 'POST', '/requests/transition',
+            lambda: {'action': 'submit', 'ids': take(ids['scso'], 50)}),
+    ]
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100.0 * (len(samples) - 1))))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20, help='calls per route and size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='*', help='route names to run, all by default')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    # seeding users is not what is measured here
+    os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+    from flask_migrate import upgrade
+    from sqlalchemy import event
+    from sqlalchemy.orm import Mapper
+    from app import create_app, db, init_migrations
+    from app.models import Request
+    from app.seed import generate
+    app = init_migrations(create_app())
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    statements = [0]
+    objects = [0]
+    event.listen(Mapper, 'load', lambda *a: objects.__setitem__(0, objects[0] + 1))
+    with app.app_context():
+        upgrade(directory=os.path.join(os.path.dirname(__file__), '..', 'migrations'))
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+
+    results = []
+    seeded = 0
+    for size in sorted(args.sizes):
+        with app.app_context():
+            generate(size - seeded, seed=args.seed + size)
+            seeded = size
+            pools = {}
+            for role in ('fm', 'sm', 'scso'):
+                pools[role] = [r.id for r in db.session.query(Request.id).filter_by(assigned_to=role)
+                    .order_by(Request.id.desc()).limit(args.repeat * 60)]
+            db.session.remove()
+        clients = {}
+        for name, role, method, url, data in routes(pools):
+            if args.only and name not in args.only:
+                continue
+            if role not in clients:
+                clients[role] = app.test_client()
+                clients[role].post('/login', data={'username': role + '0', 'password': 'password'})
+            client = clients[role]
+            timings = []
+            queries = []
+            loaded = []
+            status = None
+            etags = {}
+            for _ in range(args.repeat):
+                target = url() if callable(url) else url
+                body = data() if callable(data) else data
+                if method == 'REVALIDATE' and target not in etags:
+                    etags[target] = client.get(target).headers.get('ETag')
+                before = statements[0]
+                before_objects = objects[0]
+                start = time.perf_counter()
+                if method == 'GET':
+                    response = client.get(target)
+                elif method == 'REVALIDATE':
+                    response = client.get(target, headers={'If-None-Match': etags[target]})
+                elif method == 'JSON':
+                    response = client.post(target, json=body)
+                else:
+                    response = client.post(target, data=body)
+                response.get_data()
+                timings.append((time.perf_counter() - start) * 1000)
+                queries.append(statements[0] - before)
+                loaded.append(objects[0] - before_objects)
+                status = response.status_code
+            results.append({
+                'size': size, 'route': name, 'role': role, 'method': method, 'status': status,
+                'calls': len(timings),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'mean_ms': round(statistics.mean(timings), 3),
+                'queries': round(statistics.mean(queries), 2),
+                'objects': round(statistics.mean(loaded), 2),
+            })
+            print('{:>8} {:<28} {:>8.2f} ms p50 {:>8.2f} ms p95 {:>6.1f} queries {:>7.1f} objects'.format(
+                size, name, results[-1]['p50_ms'], results[-1]['p95_ms'], results[-1]['queries'],
+                results[-1]['objects']), file=sys.stderr)
+
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+            'repeat': args.repeat, 'seed': args.seed, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    os.unlink(path)
+
+if __name__ == '__main__':
+    main()
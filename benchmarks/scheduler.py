@@ -0,0 +1,93 @@
+'''
+task assignment scheduler timings
+
+fills a throwaway SQLite database with one subteam of --members members and
+--tasks open tasks for each size, then times, per load measure:
+
+  assign one   picking the assignee of one new task (what add_tasks does)
+  auto-assign  assigning every task when none has an assignee yet
+  rebalance    evening out the work after one member got everything
+  no-op        a rebalance of an already even subteam
+
+each includes reading the rows, the planning and writing the new assignees,
+and is the median of --repeat runs.
+
+    python benchmarks/scheduler.py --tasks 1000 5000 20000 --members 12
+'''
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def timed(fn, repeat, setup=None):
+    'median ms of fn over repeat runs, setup runs untimed before each'
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, nargs='+', default=[1000, 5000, 20000], help='open tasks in the subteam')
+    parser.add_argument('--members', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    from app import create_app, db, scheduler
+    from app.models import Task, User
+    app = create_app()
+    rng = random.Random(0)
+
+    print('{:>7} {:>7} {:>12} {:>12} {:>12} {:>12}'.format('tasks', 'load', 'assign one', 'auto-assign',
+        'rebalance', 'no-op'))
+    try:
+        with app.app_context():
+            db.create_all()
+            for n in range(args.members):
+                db.session.add(User(username='smtm{}'.format(n), role='smtm'))
+            db.session.commit()
+            names = scheduler.members('smtm')
+            for size in args.tasks:
+                Task.query.delete()
+                db.session.bulk_insert_mappings(Task, [dict(task_name='task', subteam='smtm', created_by='sm',
+                    effort=rng.choice([1, 2, 4, 8, 16])) for _ in range(size)])
+                db.session.commit()
+                for load_by in ('count', 'effort'):
+                    def unassign():
+                        Task.query.update({'assignee': None})
+                        db.session.commit()
+                    def one_member():
+                        Task.query.update({'assignee': names[0]})
+                        db.session.commit()
+                    def assign_one():
+                        scheduler.assign_new('smtm', [Task(subteam='smtm', effort=4)], load_by)
+                    def auto_assign():
+                        scheduler.auto_assign('smtm', load_by)
+                        db.session.commit()
+                    def rebalance():
+                        scheduler.rebalance('smtm', load_by)
+                        db.session.commit()
+                    results = [
+                        timed(assign_one, args.repeat),
+                        timed(auto_assign, args.repeat, unassign),
+                        timed(rebalance, args.repeat, one_member),
+                        timed(rebalance, args.repeat),
+                    ]
+                    print('{:>7} {:>7} {:>9.1f} ms {:>9.1f} ms {:>9.1f} ms {:>9.1f} ms'.format(size, load_by, *results))
+    finally:
+        os.unlink(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+'''
+startup time benchmark
+
+measures what a fresh worker pays before it can serve: the cold import of the
+app package up to a ready Flask app, and the first request after that (GET
+/login, which compiles the templates it renders) next to a second, warm one.
+every sample is a new interpreter, so nothing is cached in the process. also
+reports how many modules were loaded and whether Alembic was among them, as JSON:
+
+    python benchmarks/startup.py --repeat 20 --output after.json
+
+--tree points it at another checkout of the repo, e.g. a `git worktree` of an
+older commit, to compare before and after on the same machine:
+
+    git worktree add /tmp/eventy-before <commit>
+    python benchmarks/startup.py --tree /tmp/eventy-before --output before.json
+'''
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def probe(tree):
+    'one sample in this interpreter, returns its timings in ms'
+    sys.path.insert(0, tree)
+    start = time.perf_counter()
+    import app as package
+    # trees from before the app factory build the app while importing the package
+    app = package.create_app() if hasattr(package, 'create_app') else package.app
+    ready = time.perf_counter()
+    client = app.test_client()
+    timings = []
+    for _ in range(2):
+        request_start = time.perf_counter()
+        response = client.get('/login')
+        response.get_data()
+        assert response.status_code == 200, response.status_code
+        timings.append((time.perf_counter() - request_start) * 1000)
+    return {
+        'app_ms': (ready - start) * 1000,
+        'first_request_ms': timings[0],
+        'warm_request_ms': timings[1],
+        'modules': len(sys.modules),
+        'alembic': 'alembic' in sys.modules,
+    }
+
+def sample(tree, database_url):
+    'one probe in a new interpreter, plus the wall time of the whole process'
+    env = dict(os.environ, DATABASE_URL=database_url)
+    start = time.perf_counter()
+    run = subprocess.run([sys.executable, os.path.abspath(__file__), '--probe', '--tree', tree],
+        stdout=subprocess.PIPE, check=True, cwd=tree, env=env)
+    result = json.loads(run.stdout)
+    result['process_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tree', default=ROOT, help='checkout of the repo to measure')
+    parser.add_argument('--repeat', type=int, default=10, help='fresh interpreters per run')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    tree = os.path.abspath(args.tree)
+
+    if args.probe:
+        json.dump(probe(tree), sys.stdout)
+        return
+
+    # nothing measured touches the database, it only has to be a valid URL
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        # one untimed run so the .pyc files exist, like on a deployed worker
+        sample(tree, 'sqlite:///' + path)
+        samples = [sample(tree, 'sqlite:///' + path) for _ in range(args.repeat)]
+    finally:
+        os.unlink(path)
+
+    result = {}
+    for key in ('process_ms', 'app_ms', 'first_request_ms', 'warm_request_ms'):
+        values = [s[key] for s in samples]
+        result[key] = {'median': round(statistics.median(values), 1), 'min': round(min(values), 1),
+            'max': round(max(values), 1)}
+        print('{:<18} {:>8.1f} ms median {:>8.1f} ms min'.format(key, result[key]['median'], result[key]['min']),
+            file=sys.stderr)
+    result['modules'] = samples[0]['modules']
+    result['alembic'] = samples[0]['alembic']
+    print('{:<18} {:>8} loaded, alembic {}'.format('modules', result['modules'],
+        'loaded' if result['alembic'] else 'not loaded'), file=sys.stderr)
+
+    report = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'tree': tree,
+            'repeat': args.repeat, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'result': result,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -13,4 +13,94 @@ class Config(object):
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'this-is-a-default-secret'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(baseDir, 'app.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # engine profile: sqlite (WAL + pragmas), server (pooled PostgreSQL) or plain, follows DATABASE_URL
+    # when unset. see app/engine.py
+    DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE')
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE') or 10)
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW') or 20)
+    DATABASE_POOL_TIMEOUT = int(os.environ.get('DATABASE_POOL_TIMEOUT') or 30)
+    DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE') or 1800)
+    # server profile, PostgreSQL cancels statements running longer than this (milliseconds, 0 turns it off)
+    DATABASE_STATEMENT_TIMEOUT = int(os.environ.get('DATABASE_STATEMENT_TIMEOUT') or 30000)
+    # optional read-only replica. GET requests read from it, except for users who committed something
+    # in the last REPLICA_PIN_SECONDS, see app/replica.py
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else None
+    REPLICA_PIN_SECONDS = float(os.environ.get('REPLICA_PIN_SECONDS') or 5)
+    # sqlite profile pragmas, negative cache size is in KiB
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE') or -64000)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    # rows per page on the dashboard list views, ?limit= is capped at MAX_PAGE_SIZE
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE') or 25)
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE') or 100)
+    # logged-in user identities kept in memory by the user loader, TTL in seconds
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 1024)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 300)
+    # password hashing policy, changing the cost re-hashes each user on their next login
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM') or 'sha256'
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS') or 260000)
+    PASSWORD_HASH_SALT_LENGTH = 16
+    # hashes run at most PASSWORD_HASH_WORKERS at a time and PASSWORD_HASH_QUEUE more may wait,
+    # a login past that is refused right away with 503, retry after PASSWORD_HASH_RETRY_AFTER seconds
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 2)
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or 16)
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER') or 5)
+    # largest batch accepted by one /api/v1 call
+    API_MAX_BATCH = int(os.environ.get('API_MAX_BATCH') or 1000)
+    # rows per INSERT and commit in `flask import`
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE') or 5000)
+    # rows fetched per round trip by the streaming exports
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE') or 1000)
+    # live dashboards check the request changelog for other workers' commits this often (seconds)
+    # and drop the connection after LIVE_STREAM_LIFETIME so the browser reconnects
+    LIVE_POLL_INTERVAL = float(os.environ.get('LIVE_POLL_INTERVAL') or 2)
+    LIVE_STREAM_LIFETIME = int(os.environ.get('LIVE_STREAM_LIFETIME') or 300)
+    # every open stream holds a worker thread, a process serves at most LIVE_MAX_STREAMS of them
+    # (keep it under the threads per worker, see gunicorn.conf.py), pages past the cap poll every
+    # LIVE_FALLBACK_POLL seconds instead
+    LIVE_MAX_STREAMS = int(os.environ.get('LIVE_MAX_STREAMS') or 16)
+    LIVE_FALLBACK_POLL = int(os.environ.get('LIVE_FALLBACK_POLL') or 30)
+    # `flask prune-changes` keeps this many hours of the request changelog
+    LIVE_CHANGELOG_HOURS = int(os.environ.get('LIVE_CHANGELOG_HOURS') or 24)
+    # rendered request cards kept in memory per worker, budget in characters of markup
+    CARD_CACHE_ENABLED = (os.environ.get('CARD_CACHE_ENABLED') or '1') == '1'
+    CARD_CACHE_BYTES = int(os.environ.get('CARD_CACHE_BYTES') or 8 * 1024 * 1024)
+    # request audit log, written in the background every AUDIT_FLUSH_INTERVAL seconds or AUDIT_BATCH_SIZE entries
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL') or 1)
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE') or 500)
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE') or 10000)
+    # background jobs, see app/jobs.py. JOB_THREADS run jobs right after the commit that queued them
+    # (0 leaves them all to `flask worker`), a failing job is retried after JOB_RETRY_DELAY seconds,
+    # doubling each time, up to JOB_MAX_ATTEMPTS runs. jobs running longer than JOB_TIMEOUT are requeued
+    JOB_THREADS = int(os.environ.get('JOB_THREADS') or 2)
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 5)
+    JOB_RETRY_DELAY = float(os.environ.get('JOB_RETRY_DELAY') or 2)
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 1)
+    JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT') or 300)
+    # new tasks go to the subteam member with the least open work, counted in tasks ('count')
+    # or in estimated hours ('effort'), see app/scheduler.py
+    TASK_LOAD = os.environ.get('TASK_LOAD') or 'count'
+    # `flask archive` moves requests closed (rejected or handed to planning) more than
+    # ARCHIVE_AFTER_DAYS ago, with their tasks, to the archive tables, ARCHIVE_BATCH_SIZE per transaction
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 365)
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE') or 500)
+    # HTML and JSON responses of at least COMPRESS_MIN_SIZE bytes are sent gzip (COMPRESS_LEVEL 1-9)
+    # or brotli compressed, see app/compression.py
+    COMPRESS_ENABLED = (os.environ.get('COMPRESS_ENABLED') or '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 1024)
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or 6)
+    COMPRESS_MIMETYPES = ('text/html', 'application/json')
+    # seconds browsers keep a fingerprinted static asset, see app/assets.py
+    ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE') or 365 * 24 * 3600)
+    # per-request SQL/render timing, SQL statements slower than SLOW_QUERY_THRESHOLD seconds are logged
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or '1') == '1'
+    SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD') or 0.2)
+    # /metrics is open to these roles, and to scrapers sending "Authorization: Bearer <METRICS_TOKEN>"
+    METRICS_ROLES = ('am',)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # the timings of each response in a Server-Timing header, sent only to those allowed /metrics
+    SERVER_TIMING = (os.environ.get('SERVER_TIMING') or '1') == '1'
\ No newline at end of file
@@ -1,7 +1,9 @@
-'from the app package import the app instance variable'
-from app import app, db
+'the `flask` command entry (FLASK_APP), builds the app with `flask db` support'
+from app import create_app, db, init_migrations
 from app.models import User, Request
 
+app = init_migrations(create_app())
+
 'useful for debugging, define shell constants when using `flask shell` for debug'
 @app.shell_context_processor
 def make_shell_context():
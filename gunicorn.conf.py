@@ -0,0 +1,18 @@
+import os
+
+'''
+gunicorn settings, read by `gunicorn wsgi:app` from this directory
+
+the live dashboards hold a request open for up to LIVE_STREAM_LIFETIME, which on
+the default sync workers is a whole worker per open tab. threaded workers give
+each stream a thread instead, and each process serves at most LIVE_MAX_STREAMS
+of them, the rest of its threads stay free for the pages. keep LIVE_MAX_STREAMS
+well under GUNICORN_THREADS
+'''
+
+bind = os.environ.get('GUNICORN_BIND') or '0.0.0.0:8000'
+workers = int(os.environ.get('WEB_CONCURRENCY') or 2)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS') or 32)
+# a stream is only quiet between keepalives, the worker is not stuck
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 60)
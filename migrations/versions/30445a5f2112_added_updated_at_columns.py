@@ -0,0 +1,47 @@
+"""added updated_at columns to request, task, resource and budget
+
+Revision ID: 30445a5f2112
+Revises: d47ad8a0d633
+Create Date: 2026-10-18 20:44:42.018935
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '30445a5f2112'
+down_revision = 'd47ad8a0d633'
+branch_labels = None
+depends_on = None
+
+'table -> columns indexed together with updated_at'
+INDEXED = {
+    'request': ['assigned_to', 'created_by', 'tasks_for'],
+    'task': ['subteam'],
+    'resource': ['assigned_to'],
+    'budget': ['assigned_to'],
+}
+
+
+def upgrade():
+    # plain ADD COLUMN, not batch mode: recreating request or task on SQLite would drop
+    # the full-text search triggers from a0385eea9983. existing rows count as changed now
+    now = datetime.utcnow()
+    for table, columns in INDEXED.items():
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(sa.text('UPDATE {} SET updated_at = :now'.format(table)).bindparams(now=now))
+        for column in columns:
+            op.create_index('ix_{}_{}_updated_at'.format(table, column), table, [column, 'updated_at'], unique=False)
+    op.add_column('request_archive', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('task_archive', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('task_archive', 'updated_at')
+    op.drop_column('request_archive', 'updated_at')
+    for table, columns in INDEXED.items():
+        for column in columns:
+            op.drop_index('ix_{}_{}_updated_at'.format(table, column), table_name=table)
+        op.drop_column(table, 'updated_at')
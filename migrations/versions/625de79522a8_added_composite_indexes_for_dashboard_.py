@@ -0,0 +1,40 @@
+"""added composite indexes for dashboard filters
+
+Revision ID: 625de79522a8
+Revises: 27710b7d1f0c
+Create Date: 2026-10-18 09:41:05.502967
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '625de79522a8'
+down_revision = '27710b7d1f0c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # every dashboard does filter_by(<column>=...).order_by(id.desc()), so each
+    # index leads with the filter column and ends with id for the keyset cursor
+    op.create_index('ix_request_assigned_to_id', 'request', ['assigned_to', 'id'], unique=False)
+    op.create_index('ix_request_created_by_id', 'request', ['created_by', 'id'], unique=False)
+    op.create_index('ix_request_tasks_for_id', 'request', ['tasks_for', 'id'], unique=False)
+    op.create_index('ix_task_subteam_id', 'task', ['subteam', 'id'], unique=False)
+    op.create_index(op.f('ix_task_request'), 'task', ['request'], unique=False)
+    op.create_index('ix_resource_assigned_to_id', 'resource', ['assigned_to', 'id'], unique=False)
+    op.create_index('ix_budget_assigned_to_id', 'budget', ['assigned_to', 'id'], unique=False)
+    # free text, nothing filters on it
+    op.drop_index(op.f('ix_task_task_details'), table_name='task')
+
+
+def downgrade():
+    op.create_index(op.f('ix_task_task_details'), 'task', ['task_details'], unique=False)
+    op.drop_index('ix_budget_assigned_to_id', table_name='budget')
+    op.drop_index('ix_resource_assigned_to_id', table_name='resource')
+    op.drop_index(op.f('ix_task_request'), table_name='task')
+    op.drop_index('ix_task_subteam_id', table_name='task')
+    op.drop_index('ix_request_tasks_for_id', table_name='request')
+    op.drop_index('ix_request_created_by_id', table_name='request')
+    op.drop_index('ix_request_assigned_to_id', table_name='request')
@@ -0,0 +1,39 @@
+"""added task assignee, effort and completed_at columns
+
+Revision ID: 7e7847db6546
+Revises: 30445a5f2112
+Create Date: 2026-10-18 22:10:12.603417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e7847db6546'
+down_revision = '30445a5f2112'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ['assignee', 'effort', 'completed_at']
+
+
+def upgrade():
+    # plain ADD COLUMN, not batch mode: recreating task on SQLite would drop the
+    # full-text search triggers from a0385eea9983. the old owner column was never
+    # written and is left alone
+    op.add_column('task', sa.Column('assignee', sa.String(length=64), nullable=True))
+    op.add_column('task', sa.Column('effort', sa.Integer(), server_default='1', nullable=True))
+    op.add_column('task', sa.Column('completed_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_task_subteam_open', 'task', ['subteam', 'completed_at', 'assignee', 'effort'], unique=False)
+    op.add_column('task_archive', sa.Column('assignee', sa.String(length=64), nullable=True))
+    op.add_column('task_archive', sa.Column('effort', sa.Integer(), nullable=True))
+    op.add_column('task_archive', sa.Column('completed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for column in reversed(COLUMNS):
+        op.drop_column('task_archive', column)
+    op.drop_index('ix_task_subteam_open', table_name='task')
+    for column in reversed(COLUMNS):
+        op.drop_column('task', column)
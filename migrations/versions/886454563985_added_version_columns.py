@@ -0,0 +1,28 @@
+"""added version columns to request, resource and budget
+
+Revision ID: 886454563985
+Revises: a0385eea9983
+Create Date: 2026-10-18 19:42:13.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '886454563985'
+down_revision = 'a0385eea9983'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # plain ADD COLUMN, not batch mode: recreating request on SQLite would drop the
+    # full-text search triggers from a0385eea9983. existing rows start at version 1
+    for table in ('request', 'resource', 'budget'):
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in ('request', 'resource', 'budget'):
+        op.drop_column(table, 'version')
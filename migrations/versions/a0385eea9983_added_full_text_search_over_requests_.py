@@ -0,0 +1,73 @@
+"""added full-text search over requests and tasks
+
+Revision ID: a0385eea9983
+Revises: 7614ff2523fe
+Create Date: 2026-10-18 18:10:44.902716
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a0385eea9983'
+down_revision = '7614ff2523fe'
+branch_labels = None
+depends_on = None
+
+
+'(fts table, content table, indexed columns)'
+SEARCH_TABLES = [
+    ('request_fts', 'request', ['client_name', 'event_type', 'event_details']),
+    ('task_fts', 'task', ['task_name', 'task_details']),
+]
+
+
+def sqlite_upgrade():
+    # external content FTS5 tables kept in sync by triggers, see
+    # https://www.sqlite.org/fts5.html#external_content_tables
+    for fts, table, columns in SEARCH_TABLES:
+        cols = ', '.join(columns)
+        new = ', '.join('new.' + c for c in columns)
+        old = ', '.join('old.' + c for c in columns)
+        op.execute("CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id')"
+            .format(fts=fts, cols=cols, table=table))
+        op.execute("""CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+        END""".format(fts=fts, table=table, cols=cols, new=new))
+        op.execute("""CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+        END""".format(fts=fts, table=table, cols=cols, old=old))
+        # only edits of the indexed text re-index a row, not every workflow step
+        op.execute("""CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});
+        END""".format(fts=fts, table=table, cols=cols, old=old, new=new))
+        op.execute("INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(fts=fts))
+
+
+def postgresql_upgrade():
+    # must match the expression app/search.py builds
+    for fts, table, columns in SEARCH_TABLES:
+        document = " || ' ' || ".join("coalesce({}, '')".format(c) for c in columns)
+        op.execute("CREATE INDEX ix_{table}_search ON {table} USING gin (to_tsvector('simple', {document}))"
+            .format(table=table, document=document))
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        sqlite_upgrade()
+    elif dialect == 'postgresql':
+        postgresql_upgrade()
+    # other databases search with LIKE
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for fts, table, columns in SEARCH_TABLES:
+        if dialect == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute('DROP TRIGGER IF EXISTS {}_{}'.format(fts, suffix))
+            op.execute('DROP TABLE IF EXISTS {}'.format(fts))
+        elif dialect == 'postgresql':
+            op.execute('DROP INDEX IF EXISTS ix_{}_search'.format(table))
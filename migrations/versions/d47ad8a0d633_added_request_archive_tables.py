@@ -0,0 +1,67 @@
+"""added request archive tables and request.closed_at
+
+Revision ID: d47ad8a0d633
+Revises: 7d67e0d76e76
+Create Date: 2026-10-18 20:41:01.440560
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd47ad8a0d633'
+down_revision = '7d67e0d76e76'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('request_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('client_name', sa.String(length=64), nullable=True),
+    sa.Column('event_type', sa.String(length=64), nullable=True),
+    sa.Column('event_details', sa.String(length=120), nullable=True),
+    sa.Column('client_budget', sa.Integer(), nullable=True),
+    sa.Column('feedback', sa.String(length=120), nullable=True),
+    sa.Column('created_by', sa.String(length=64), nullable=True),
+    sa.Column('assigned_to', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(length=64), nullable=True),
+    sa.Column('ready_for_planning', sa.Boolean(), nullable=True),
+    sa.Column('tasks_for', sa.String(length=64), nullable=True),
+    sa.Column('closed_at', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_request_archive_client_name'), 'request_archive', ['client_name'], unique=False)
+    op.create_table('task_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('task_name', sa.String(length=64), nullable=True),
+    sa.Column('task_details', sa.String(length=120), nullable=True),
+    sa.Column('created_by', sa.String(length=64), nullable=True),
+    sa.Column('subteam', sa.String(length=64), nullable=True),
+    sa.Column('request', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_task_archive_request'), 'task_archive', ['request'], unique=False)
+    # plain ADD COLUMN, not batch mode: recreating request on SQLite would drop the
+    # full-text search triggers from a0385eea9983
+    op.add_column('request', sa.Column('closed_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_request_closed_at'), 'request', ['closed_at'], unique=False)
+    # requests that are already closed count from their last audited change, or
+    # from now when there is none, so nothing is archived right after the upgrade
+    op.execute(sa.text("""UPDATE request SET closed_at = COALESCE(
+            (SELECT MAX(changed_at) FROM audit_entry WHERE audit_entry.request_id = request.id), :now)
+        WHERE status = 'Rejected' OR tasks_for IS NOT NULL""").bindparams(now=datetime.utcnow()))
+
+
+def downgrade():
+    op.drop_index(op.f('ix_request_closed_at'), table_name='request')
+    op.drop_column('request', 'closed_at')
+    op.drop_index(op.f('ix_task_archive_request'), table_name='task_archive')
+    op.drop_table('task_archive')
+    op.drop_index(op.f('ix_request_archive_client_name'), table_name='request_archive')
+    op.drop_table('request_archive')
@@ -0,0 +1,29 @@
+"""widen user.password_hash for configurable hash algorithms
+
+Revision ID: f3a0f594593e
+Revises: 625de79522a8
+Create Date: 2026-10-18 11:03:27.640119
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a0f594593e'
+down_revision = '625de79522a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pbkdf2:sha512 hashes are 160+ characters, more than the old 120
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=120),
+            type_=sa.String(length=256), existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.alter_column('password_hash', existing_type=sa.String(length=256),
+            type_=sa.String(length=120), existing_nullable=True)
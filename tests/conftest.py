@@ -0,0 +1,70 @@
+import os
+from contextlib import contextmanager
+import pytest
+from app import create_app, db
+from app.models import Request, User, identity_cache
+from app.fragments import card_cache
+from app.search import _fts_tables
+from config import Config
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ROLES = ['cso', 'scso', 'am', 'fm', 'sm', 'pm', 'hr', 'smtm', 'pmtm']
+
+def make_config(path, **settings):
+    'Config for a throwaway SQLite database at path, cheap password hashes and no job threads'
+    attrs = dict(TESTING=True, WTF_CSRF_ENABLED=False, SQLALCHEMY_DATABASE_URI='sqlite:///' + path,
+        SQLALCHEMY_BINDS=None, PASSWORD_HASH_ITERATIONS=1000, JOB_THREADS=0, METRICS_ENABLED=False)
+    attrs.update(settings)
+    return type('TestConfig', (Config,), attrs)
+
+def build_app(path, **settings):
+    app = create_app(make_config(path, **settings))
+    # process-wide caches keyed by ids, which the next test's database reuses
+    identity_cache.clear()
+    card_cache.clear()
+    _fts_tables.clear()
+    return app
+
+def add_users():
+    'one user per role named after it, password "pw", committed'
+    for role in ROLES:
+        user = User(username=role, name=role.upper(), email=role + '@eventy.se', role=role)
+        user.set_password('pw')
+        db.session.add(user)
+    db.session.commit()
+
+@contextmanager
+def running(app):
+    'app context of app on its fresh database, built with create_all and add_users'
+    with app.app_context():
+        db.create_all()
+        add_users()
+        yield app
+        app.extensions['audit'].stop()
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def app(tmp_path):
+    with running(build_app(str(tmp_path / 'test.db'))) as app:
+        yield app
+
+@pytest.fixture
+def login(app):
+    'login(role) -> a test client logged in as the user of that role'
+    def login(role):
+        client = app.test_client()
+        response = client.post('/login', data={'username': role, 'password': 'pw'})
+        assert response.status_code == 302, response.status_code
+        return client
+    return login
+
+def add_request(**columns):
+    'a request waiting for the scso, committed'
+    values = dict(client_name='Volvo', event_type='Gala dinner', event_details='for 200 guests',
+        client_budget=50000, status='Open', created_by='cso', assigned_to='scso', ready_for_planning=False)
+    values.update(columns)
+    req = Request(**values)
+    db.session.add(req)
+    db.session.commit()
+    return req
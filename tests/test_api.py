@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Request, RequestChange
+from tests.conftest import add_request
+
+@pytest.mark.parametrize('body', [
+    None,
+    [1, 2],
+    {'action': 'submit'},
+    {'ids': [], 'action': 'submit'},
+    {'ids': ['1'], 'action': 'submit'},
+    {'ids': [True], 'action': 'submit'},
+])
+def test_transition_refuses_malformed_ids(app, login, body):
+    response = login('scso').post('/api/v1/requests/transition', json=body)
+    assert response.status_code == 400, response.get_json()
+
+@pytest.mark.parametrize('action', [None, '', 'create', 'launch', 3, ['submit']])
+def test_transition_refuses_unknown_actions(app, login, action):
+    req = add_request()
+    body = {'ids': [req.id]}
+    if action is not None:
+        body['action'] = action
+    response = login('scso').post('/api/v1/requests/transition', json=body)
+    assert response.status_code == 422
+    assert 'action' in response.get_json()['errors']
+    assert 'cannot' not in response.get_json()['error']
+
+def test_transition_action_not_allowed_for_role(app, login):
+    req = add_request(assigned_to='fm')
+    response = login('fm').post('/api/v1/requests/transition', json={'ids': [req.id], 'action': 'services'})
+    assert response.status_code == 403
+    assert response.get_json()['error'] == 'fm cannot services a request'
+
+def test_transition_moves_only_requests_it_applies_to(app, login):
+    ready = add_request(ready_for_planning=True)
+    not_ready = add_request(client_name='Spotify')
+    elsewhere = add_request(client_name='Klarna', assigned_to='fm', ready_for_planning=True)
+    ids = [ready.id, not_ready.id, elsewhere.id]
+    changes = RequestChange.query.count()
+    response = login('scso').post('/api/v1/requests/transition', json={'ids': ids, 'action': 'services'})
+    assert response.status_code == 200
+    assert response.get_json() == {'count': 1}
+    db.session.expire_all()
+    moved = db.session.get(Request, ready.id)
+    assert (moved.assigned_to, moved.tasks_for, moved.created_by, moved.version) == ('sm', 'services', 'scso', 2)
+    assert moved.closed_at is not None
+    assert db.session.get(Request, not_ready.id).assigned_to == 'scso'
+    assert db.session.get(Request, elsewhere.id).assigned_to == 'fm'
+    # the live dashboards learn about bulk moves from the changelog
+    assert RequestChange.query.count() == changes + 1
+
+def test_transition_racing_another_writer_writes_nothing(app, login):
+    first = add_request(ready_for_planning=True).id
+    second = add_request(client_name='Spotify', ready_for_planning=True).id
+    changes = RequestChange.query.count()
+    def edit_in_between(state):
+        # another writer saves the second request between our SELECT and UPDATE
+        if state.is_update:
+            with db.engine.begin() as connection:
+                connection.execute(Request.__table__.update().where(Request.id == second)
+                    .values(assigned_to='fm', version=Request.version + 1))
+    event.listen(Session, 'do_orm_execute', edit_in_between)
+    try:
+        response = login('scso').post('/api/v1/requests/transition',
+            json={'ids': [first, second], 'action': 'services'})
+    finally:
+        event.remove(Session, 'do_orm_execute', edit_in_between)
+    assert response.status_code == 409
+    db.session.expire_all()
+    assert (db.session.get(Request, first).assigned_to, db.session.get(Request, first).version) == ('scso', 1)
+    assert db.session.get(Request, second).assigned_to == 'fm'
+    assert RequestChange.query.count() == changes
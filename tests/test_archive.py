@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from app import db, summary
+from app.archive import archive_closed
+from app.models import Request, RequestArchive, SummaryCounter, Task, TaskArchive
+from tests.conftest import add_request
+
+def closed_request(days_ago, **columns):
+    values = dict(status='Open', assigned_to='sm', tasks_for='services', ready_for_planning=True,
+        closed_at=datetime.utcnow() - timedelta(days=days_ago))
+    values.update(columns)
+    return add_request(**values)
+
+def add_task(req, done):
+    task = Task(task_name='Catering', task_details='lunch', subteam='smtm', created_by='sm', request=req.id,
+        assignee='smtm', completed_at=datetime.utcnow() if done else None)
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+def counters():
+    return sorted((c.metric, c.key, c.value) for c in SummaryCounter.query.filter(SummaryCounter.value != 0))
+
+def cutoff():
+    return datetime.utcnow() - timedelta(days=365)
+
+def test_moves_old_closed_requests_with_their_tasks(app):
+    old = closed_request(400).id
+    task = add_task(db.session.get(Request, old), done=True).id
+    rejected = closed_request(500, status='Rejected', assigned_to='scso', tasks_for=None).id
+    recent = closed_request(10).id
+    still_open = add_request().id
+
+    assert archive_closed(cutoff(), batch_size=1, log=lambda message: None) == (2, 1)
+
+    assert {r.id for r in Request.query} == {recent, still_open}
+    assert {r.id for r in RequestArchive.query} == {old, rejected}
+    assert [t.id for t in TaskArchive.query] == [task]
+    assert Task.query.count() == 0
+
+def test_keeps_requests_with_open_tasks(app):
+    busy = closed_request(400)
+    add_task(busy, done=True)
+    open_task = add_task(busy, done=False)
+
+    assert archive_closed(cutoff(), batch_size=10, log=lambda message: None) == (0, 0)
+    assert db.session.get(Request, busy.id) is not None
+    assert Task.query.count() == 2
+
+    open_task.completed_at = datetime.utcnow()
+    db.session.commit()
+    assert archive_closed(cutoff(), batch_size=10, log=lambda message: None) == (1, 2)
+
+def test_summary_counters_match_a_rebuild(app):
+    for days in (400, 500, 10):
+        closed_request(days)
+    add_request()
+    archive_closed(cutoff(), batch_size=10, log=lambda message: None)
+    kept = counters()
+    summary.rebuild()
+    db.session.commit()
+    assert kept == counters()
+
+def test_archived_request_redirects_to_the_archive(app, login):
+    req_id = closed_request(400).id
+    archive_closed(cutoff(), batch_size=10, log=lambda message: None)
+    response = login('scso').get('/update-request/{}'.format(req_id))
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/archive/{}'.format(req_id))
+    assert login('scso').get('/archive/{}'.format(req_id)).status_code == 200
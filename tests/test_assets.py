@@ -0,0 +1,44 @@
+import gzip
+import re
+import pytest
+from app import assets
+
+JQUERY = 'vendor/jquery/1.12.4/jquery.min.js'
+
+@pytest.fixture(autouse=True)
+def fresh_manifest():
+    # the manifest and its compressed bodies are kept per process
+    assets._manifest['current'] = None
+    yield
+    assets._manifest['current'] = None
+
+def test_pages_do_not_compress_assets(app, login):
+    page = login('scso').get('/index').get_data(as_text=True)
+    assert '/assets/vendor/jquery/1.12.4/jquery.min.' in page
+    assert all(not asset.encoded for asset in assets._manifest['current'].assets.values())
+
+def test_asset_is_compressed_on_its_first_request_and_kept(app):
+    client = app.test_client()
+    with app.test_request_context():
+        url = assets.asset_url(JQUERY)
+    found = assets._manifest['current'].assets[JQUERY]
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert 'immutable' in response.headers['Cache-Control']
+    assert gzip.decompress(response.data) == found.body
+    cached = found.encoded['gzip']
+    assert client.get(url, headers={'Accept-Encoding': 'gzip'}).data == cached
+    assert found.encoded['gzip'] is cached
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.data == found.body
+
+def test_unchanged_asset_is_answered_with_304(app):
+    client = app.test_client()
+    with app.test_request_context():
+        url = assets.asset_url(JQUERY)
+    digest = re.search(r'\.(\w{12})\.js$', url).group(1)
+    response = client.get(url, headers={'If-None-Match': 'W/"{}"'.format(digest)})
+    assert response.status_code == 304
+    assert not assets._manifest['current'].assets[JQUERY].encoded
@@ -0,0 +1,66 @@
+import time
+from app import audit, db
+from app.models import AuditEntry
+from tests.conftest import add_request, build_app, running
+
+def entries(req_id):
+    audit.writer().flush()
+    return sorted((e.field, e.old_value, e.new_value, e.changed_by)
+        for e in AuditEntry.query.filter_by(request_id=req_id))
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_new_request_logs_its_audited_fields(app):
+    req = add_request(client_budget=1200)
+    # no feedback yet, and no user outside a request
+    assert entries(req.id) == [('assigned_to', None, 'scso', None), ('client_budget', None, '1200', None),
+        ('status', None, 'Open', None)]
+
+def test_changed_fields_are_logged_with_who_changed_them(app, login):
+    req = add_request()
+    audit.writer().flush()
+    AuditEntry.query.delete()
+    db.session.commit()
+    response = login('scso').post('/update-request/{}'.format(req.id), data=dict(client_name='Volvo',
+        event_type='Gala dinner', event_details='for 200 guests', client_budget=50000, feedback='ok',
+        status='Open', version='1', submit='Submit'))
+    assert response.status_code == 302
+    assert entries(req.id) == [('assigned_to', 'scso', 'fm', 'scso'), ('feedback', None, 'ok', 'scso')]
+
+def test_rolled_back_changes_are_not_logged(app):
+    req = add_request()
+    before = entries(req.id)
+    req.status = 'Closed'
+    db.session.flush()
+    db.session.rollback()
+    assert entries(req.id) == before
+
+def test_full_batch_is_written_without_waiting_for_the_interval(tmp_path):
+    with running(build_app(str(tmp_path / 'test.db'), AUDIT_BATCH_SIZE=3, AUDIT_FLUSH_INTERVAL=60)):
+        writer = audit.writer()
+        add_request()
+        assert wait_for(lambda: writer.written == 3)
+
+def test_partial_batch_is_written_after_the_interval(tmp_path):
+    with running(build_app(str(tmp_path / 'test.db'), AUDIT_BATCH_SIZE=100, AUDIT_FLUSH_INTERVAL=0.05)):
+        writer = audit.writer()
+        add_request()
+        assert wait_for(lambda: writer.written == 3)
+
+def test_each_app_writes_to_its_own_database(app, tmp_path):
+    db.session.remove()
+    with running(build_app(str(tmp_path / 'other.db'))):
+        req = add_request(client_budget=7)
+        assert ('client_budget', None, '7', None) in entries(req.id)
+        db.session.remove()
+    assert AuditEntry.query.count() == 0
+
+def test_history_view_shows_entries_just_committed(app, login):
+    req = add_request(client_budget=4321)
+    page = login('scso').get('/request/{}/history'.format(req.id)).get_data(as_text=True)
+    assert '4321' in page
+    assert 'No changes recorded yet' not in page
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy.orm.exc import StaleDataError
+from app import db
+from app.models import Request
+from tests.conftest import add_request
+
+EDIT = dict(client_name='Volvo', event_type='Gala dinner', event_details='for 300 guests', client_budget=60000,
+    feedback='', status='Open')
+
+def saved(req_id):
+    db.session.expire_all()
+    return db.session.get(Request, req_id)
+
+def test_form_from_an_older_version_gets_the_conflict_page(app, login):
+    req = add_request()
+    req.client_budget = 55000
+    db.session.commit()
+    response = login('scso').post('/update-request/{}'.format(req.id), data=dict(EDIT, version='1', submit='Submit'))
+    assert response.status_code == 409
+    assert b'60000' in response.data and b'55000' in response.data
+    assert (saved(req.id).client_budget, saved(req.id).version) == (55000, 2)
+
+def test_form_from_the_saved_version_is_written(app, login):
+    req = add_request()
+    response = login('scso').post('/update-request/{}'.format(req.id), data=dict(EDIT, version='1', submit='Submit'))
+    assert response.status_code == 302
+    assert (saved(req.id).client_budget, saved(req.id).version, saved(req.id).assigned_to) == (60000, 2, 'fm')
+
+def test_api_refuses_the_whole_batch_if_one_item_is_stale(app, login):
+    fresh, old = add_request(), add_request(client_name='Spotify')
+    old.client_budget = 55000
+    db.session.commit()
+    response = login('scso').patch('/api/v1/requests', json=[dict(EDIT, id=fresh.id, version=1),
+        dict(EDIT, id=old.id, version=1)])
+    assert response.status_code == 409
+    assert response.get_json()['errors'] == {'1': {'version': [2]}}
+    assert saved(fresh.id).client_budget == 50000
+    assert saved(old.id).client_budget == 55000
+
+def test_update_lost_to_another_writer_raises(app):
+    req = add_request()
+    assert req.version == 1
+    req.client_budget = 70000
+    # another writer saves between our read and our UPDATE
+    with db.engine.begin() as connection:
+        connection.execute(Request.__table__.update().where(Request.id == req.id).values(version=Request.version + 1))
+    with pytest.raises(StaleDataError):
+        db.session.commit()
+    db.session.rollback()
@@ -0,0 +1,53 @@
+from app import db
+from tests.conftest import add_request
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={'If-None-Match': etag})
+
+def test_unchanged_dashboard_is_answered_with_304(app, login):
+    add_request()
+    client = login('scso')
+    first = client.get('/index')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    again = revalidate(client, '/index', etag)
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+def test_changed_rows_give_a_new_page(app, login):
+    req = add_request()
+    client = login('scso')
+    etag = client.get('/index').headers['ETag']
+    req.client_budget = 65000
+    db.session.commit()
+    edited = revalidate(client, '/index', etag)
+    assert edited.status_code == 200
+    assert edited.headers['ETag'] != etag
+
+def test_departed_rows_give_a_new_page(app, login):
+    older = add_request()
+    add_request(client_name='Spotify')
+    client = login('scso')
+    etag = client.get('/index').headers['ETag']
+    # the newest updated_at of the rows left is the same, only the count moved
+    db.session.delete(older)
+    db.session.commit()
+    assert revalidate(client, '/index', etag).status_code == 200
+
+def test_etag_is_per_user_and_page(app, login):
+    add_request()
+    etag = login('scso').get('/index').headers['ETag']
+    assert revalidate(login('fm'), '/index', etag).status_code == 200
+    assert revalidate(login('scso'), '/index?assigned_after=1', etag).status_code == 200
+
+def test_detail_page_follows_the_request_version(app, login):
+    req = add_request()
+    client = login('scso')
+    url = '/update-request/{}'.format(req.id)
+    etag = client.get(url).headers['ETag']
+    assert revalidate(client, url, etag).status_code == 304
+    req.feedback = 'call back'
+    db.session.commit()
+    assert revalidate(client, url, etag).status_code == 200
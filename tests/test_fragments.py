@@ -0,0 +1,35 @@
+from flask_login import login_user
+from app import db, readmodel
+from app.fragments import card, card_cache
+from app.models import User
+from tests.conftest import add_request
+
+def test_card_is_rendered_once(app, login):
+    add_request(client_name='Volvo')
+    client = login('scso')
+    assert b'Volvo' in client.get('/index').data
+    hits = card_cache.hits
+    assert b'Volvo' in client.get('/index').data
+    assert card_cache.hits == hits + 1
+
+def test_edit_drops_the_card(app, login):
+    req = add_request(client_name='Spotify')
+    client = login('scso')
+    assert b'Spotify' in client.get('/index').data
+    req.client_name = 'Klarna'
+    db.session.commit()
+    page = client.get('/index').data
+    assert b'Klarna' in page and b'Spotify' not in page
+
+def test_card_of_a_row_read_before_a_commit_is_never_served(app, login):
+    req = add_request(client_name='Spotify')
+    # a slow view read the row, then another one committed a change, which dropped the cached cards
+    old_row = readmodel.request_cards(id=req.id).one()
+    req.client_name = 'Klarna'
+    db.session.commit()
+    # and only now the slow view stores the card it rendered from the old row
+    with app.test_request_context():
+        login_user(User.query.filter_by(username='scso').one())
+        assert 'Spotify' in card('assigned', old_row)
+    page = login('scso').get('/index').data
+    assert b'Klarna' in page and b'Spotify' not in page
@@ -0,0 +1,36 @@
+from app import db
+from app.models import User, UserIdentity, identity_cache
+
+def cached(username):
+    user = User.query.filter_by(username=username).first()
+    identity_cache.set(user.id, UserIdentity(user))
+    return user
+
+def test_identity_is_evicted_when_the_change_commits(app):
+    user = cached('hr')
+    user.name = 'Human Resources'
+    db.session.flush()
+    # another request may still read the old row until the commit
+    assert identity_cache.get(user.id).name == 'HR'
+    db.session.commit()
+    assert identity_cache.get(user.id) is None
+
+def test_rolled_back_change_keeps_the_identity(app):
+    user = cached('hr')
+    user_id = user.id
+    user.role = 'am'
+    db.session.flush()
+    db.session.rollback()
+    assert identity_cache.get(user_id).role == 'hr'
+    db.session.commit()
+    assert identity_cache.get(user_id).role == 'hr'
+
+def test_logged_in_user_sees_a_committed_role_change(app, login):
+    client = login('pm')
+    assert client.get('/index').status_code == 200
+    user = User.query.filter_by(username='pm').first()
+    assert identity_cache.get(user.id) is not None
+    user.role = None
+    db.session.commit()
+    # users without a role are sent back to the login page
+    assert client.get('/search?q=x').status_code == 302
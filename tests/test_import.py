@@ -0,0 +1,31 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.models import Request
+from tests.conftest import add_request, build_app
+
+COMPARED = ['id', 'client_name', 'event_type', 'client_budget', 'status', 'assigned_to', 'created_by',
+    'ready_for_planning', 'closed_at', 'updated_at', 'version']
+
+def rows():
+    return [dict((name, getattr(req, name)) for name in COMPARED) for req in Request.query.order_by(Request.id)]
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+def test_export_imports_back(app, login, tmp_path, fmt):
+    add_request(client_budget=1200)
+    add_request(client_name='Spotify', ready_for_planning=True, closed_at=datetime(2021, 3, 4, 5, 6, 7, 890))
+    exported = rows()
+    path = tmp_path / ('requests.' + fmt)
+    path.write_bytes(login('scso').get('/export/requests.{}'.format(fmt)).data)
+
+    # the scoped session belongs to the thread and is bound to the app it was made for
+    db.session.remove()
+    fresh = build_app(str(tmp_path / 'fresh.db'))
+    with fresh.app_context():
+        db.create_all()
+        result = fresh.test_cli_runner().invoke(args=['import', 'requests', str(path)])
+        assert result.exit_code == 0, result.output
+        assert rows() == exported
+        assert isinstance(Request.query.first().updated_at, datetime)
+        db.session.remove()
+        db.engine.dispose()
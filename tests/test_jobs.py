@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+from app import db, jobs
+from app.jobs import job
+from app.models import Job
+
+'''
+jobs run through work(once=True) as `flask worker --once` does, the test apps
+have JOB_THREADS = 0 so nothing runs in the background
+'''
+
+calls = []
+
+@job
+def record(*args, **kwargs):
+    calls.append((args, kwargs))
+
+@job(max_attempts=2)
+def broken():
+    raise RuntimeError('not today')
+
+def run_due():
+    log = []
+    jobs.work(2, 0, once=True, log=log.append)
+    return log
+
+def fresh(job_id):
+    db.session.expire_all()
+    return db.session.get(Job, job_id)
+
+def test_delay_queues_with_the_transaction(app):
+    calls.clear()
+    kept = record.delay(1, 'two', three=3)
+    db.session.commit()
+    record.delay('dropped')
+    db.session.rollback()
+    assert [row.id for row in Job.query] == [kept.id]
+    assert run_due() == ['ran 1 jobs']
+    assert calls == [((1, 'two'), {'three': 3})]
+    row = fresh(kept.id)
+    assert (row.status, row.attempts) == ('done', 1)
+    assert row.finished_at is not None
+
+def test_a_job_is_claimed_once(app):
+    row = record.delay()
+    db.session.commit()
+    assert jobs.claim(row.id)
+    assert not jobs.claim(row.id)
+    # already claimed, so the worker has nothing to run
+    assert run_due() == []
+
+def test_failed_job_is_retried_later_with_backoff(app):
+    app.config['JOB_RETRY_DELAY'] = 60
+    row = broken.delay()
+    db.session.commit()
+    started = datetime.utcnow()
+    run_due()
+    row = fresh(row.id)
+    assert (row.status, row.attempts) == ('queued', 1)
+    assert 'not today' in row.last_error
+    assert started + timedelta(seconds=59) < row.run_at < started + timedelta(seconds=70)
+    # not due yet
+    assert run_due() == []
+    row.run_at = datetime.utcnow()
+    db.session.commit()
+    run_due()
+    row = fresh(row.id)
+    assert (row.status, row.attempts) == ('failed', 2)
+    assert jobs.backoff(2) == 120
+
+def test_stuck_jobs_are_requeued(app):
+    calls.clear()
+    row = record.delay('again')
+    db.session.commit()
+    assert jobs.claim(row.id)
+    row = fresh(row.id)
+    row.started_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_TIMEOUT'] + 1)
+    db.session.commit()
+    assert run_due() == ['requeued 1 stuck jobs', 'ran 1 jobs']
+    assert calls == [(('again',), {})]
+    assert fresh(row.id).attempts == 2
+
+def test_worker_command_runs_what_is_due(app):
+    calls.clear()
+    record.delay('from the command')
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['worker', '--once', '--threads', '1'])
+    assert result.exit_code == 0, result.output
+    assert 'ran 1 jobs' in result.output
+    assert calls == [(('from the command',), {})]
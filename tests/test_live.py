@@ -0,0 +1,35 @@
+import pytest
+from app.live import streams
+from tests.conftest import build_app, running
+
+@pytest.fixture
+def capped(tmp_path):
+    'app serving at most one live stream'
+    with running(build_app(str(tmp_path / 'test.db'), LIVE_MAX_STREAMS=1, LIVE_FALLBACK_POLL=7,
+            LIVE_STREAM_LIFETIME=1)) as app:
+        yield app
+
+def client_for(app, role):
+    client = app.test_client()
+    assert client.post('/login', data={'username': role, 'password': 'pw'}).status_code == 302
+    return client
+
+def test_streams_past_the_cap_are_refused(capped):
+    first = client_for(capped, 'scso').get('/events/requests?page=index', buffered=False)
+    assert first.status_code == 200
+    assert first.mimetype == 'text/event-stream'
+    refused = client_for(capped, 'cso').get('/events/requests?page=index', buffered=False)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '7'
+    refused.close()
+    first.close()
+    assert streams.open == 0
+    again = client_for(capped, 'cso').get('/events/requests?page=pending', buffered=False)
+    assert again.status_code == 200
+    again.close()
+    assert streams.open == 0
+
+def test_dashboard_polls_when_refused(capped):
+    page = client_for(capped, 'scso').get('/index').get_data(as_text=True)
+    assert 'EventSource' in page
+    assert 'setInterval(refresh, 7000)' in page
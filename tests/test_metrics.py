@@ -0,0 +1,33 @@
+import pytest
+from tests.conftest import build_app, running
+
+@pytest.fixture
+def measured(tmp_path):
+    with running(build_app(str(tmp_path / 'test.db'), METRICS_ENABLED=True, METRICS_TOKEN='s3cret')) as app:
+        yield app
+
+def client_for(app, role=None):
+    client = app.test_client()
+    if role:
+        assert client.post('/login', data={'username': role, 'password': 'pw'}).status_code == 302
+    return client
+
+def test_metrics_need_a_metrics_role_or_the_token(measured):
+    assert client_for(measured).get('/metrics').status_code == 403
+    assert client_for(measured, 'scso').get('/metrics').status_code == 403
+    assert client_for(measured).get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    scraped = client_for(measured).get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert scraped.status_code == 200
+    assert 'eventy_request_duration_seconds_bucket' in scraped.get_data(as_text=True)
+    assert client_for(measured, 'am').get('/metrics').status_code == 200
+
+def test_server_timing_only_for_those_allowed_metrics(measured):
+    assert 'Server-Timing' not in client_for(measured).get('/login').headers
+    assert 'Server-Timing' not in client_for(measured, 'scso').get('/index').headers
+    timing = client_for(measured, 'am').get('/index').headers['Server-Timing']
+    assert timing.startswith('sql;desc="') and 'total;dur=' in timing
+    assert 'Server-Timing' in client_for(measured).get('/login', headers={'Authorization': 'Bearer s3cret'}).headers
+
+def test_server_timing_can_be_turned_off(tmp_path):
+    with running(build_app(str(tmp_path / 'test.db'), METRICS_ENABLED=True, SERVER_TIMING=False)) as app:
+        assert 'Server-Timing' not in client_for(app, 'am').get('/index').headers
@@ -0,0 +1,44 @@
+import glob
+import os
+import shutil
+import pytest
+from flask_migrate import Migrate, migrate, upgrade
+from app import db, search
+from tests.conftest import ROOT, add_request, add_users, build_app
+
+'''
+the schema `flask db upgrade` builds, with the full-text search tables and
+triggers that db.create_all() does not make
+'''
+
+@pytest.fixture
+def upgraded(tmp_path):
+    'app on a database built by the migrations, from a copy of them that new revisions can be written to'
+    directory = str(tmp_path / 'migrations')
+    shutil.copytree(os.path.join(ROOT, 'migrations'), directory, ignore=shutil.ignore_patterns('__pycache__'))
+    app = build_app(str(tmp_path / 'migrated.db'))
+    Migrate(app, db, directory=directory)
+    with app.app_context():
+        upgrade()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+def test_autogenerate_keeps_the_search_tables(upgraded):
+    directory = upgraded.extensions['migrate'].directory
+    before = set(glob.glob(os.path.join(directory, 'versions', '*.py')))
+    migrate(directory=directory, message='check')
+    for path in set(glob.glob(os.path.join(directory, 'versions', '*.py'))) - before:
+        with open(path) as f:
+            assert '_fts' not in f.read()
+
+def test_search_uses_the_fts_index(upgraded):
+    add_users()
+    add_request(client_name='Spotify', event_details='launch party on the roof')
+    add_request(client_name='Klarna', event_details='board dinner')
+    assert search.backend('request_fts') == 'fts5'
+    client = upgraded.test_client()
+    assert client.post('/login', data={'username': 'scso', 'password': 'pw'}).status_code == 302
+    page = client.get('/search?q=roof').get_data(as_text=True)
+    assert 'Spotify' in page
+    assert 'Klarna' not in page
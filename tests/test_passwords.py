@@ -0,0 +1,54 @@
+import threading
+from werkzeug.security import generate_password_hash
+from app import db, models, passwords
+from app.models import User
+
+def test_full_pool_refuses_sign_in_right_away(app, monkeypatch):
+    # one hash running and nothing may queue behind it
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setitem(app.config, 'PASSWORD_HASH_QUEUE', 0)
+    monkeypatch.setattr(passwords, '_executor', None)
+    monkeypatch.setattr(passwords, '_slots', None)
+    started, release = threading.Event(), threading.Event()
+    def slow_hash():
+        started.set()
+        release.wait(10)
+    def sign_in():
+        with app.app_context():
+            passwords._run(slow_hash)
+    running = threading.Thread(target=sign_in)
+    running.start()
+    try:
+        assert started.wait(10)
+        response = app.test_client().post('/login', data={'username': 'cso', 'password': 'pw'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == str(app.config['PASSWORD_HASH_RETRY_AFTER'])
+        assert b'Too many sign-ins' in response.data
+    finally:
+        release.set()
+        running.join()
+    assert app.test_client().post('/login', data={'username': 'cso', 'password': 'pw'}).status_code == 302
+    passwords._executor.shutdown()
+
+def old_policy_hash(username):
+    user = User.query.filter_by(username=username).first()
+    user.password_hash = generate_password_hash('pw', method='pbkdf2:sha256:500')
+    db.session.commit()
+    return user.id
+
+def test_sign_in_upgrades_an_old_hash(app):
+    user_id = old_policy_hash('hr')
+    assert app.test_client().post('/login', data={'username': 'hr', 'password': 'pw'}).status_code == 302
+    db.session.expire_all()
+    assert not db.session.get(User, user_id).password_needs_rehash()
+
+def test_busy_pool_skips_the_upgrade_not_the_sign_in(app, monkeypatch):
+    user_id = old_policy_hash('hr')
+    def busy(password):
+        raise passwords.HashingBusy()
+    monkeypatch.setattr(models, 'hash_password', busy)
+    client = app.test_client()
+    assert client.post('/login', data={'username': 'hr', 'password': 'pw'}).status_code == 302
+    assert client.get('/index').status_code == 200
+    db.session.expire_all()
+    assert db.session.get(User, user_id).password_needs_rehash()
@@ -0,0 +1,31 @@
+import os
+import pytest
+from flask_migrate import Migrate, upgrade
+from app import db
+from app.cli import DASHBOARD_QUERIES, table_walks
+from tests.conftest import ROOT, build_app
+
+'''
+the dashboard list queries must seek into the composite indexes of the
+migrations, a query that falls back to walking its table only gets slow once
+the table is big, so it is caught here on the schema `flask db upgrade` builds
+'''
+
+@pytest.fixture(scope='module')
+def migrated(tmp_path_factory):
+    app = build_app(str(tmp_path_factory.mktemp('plans') / 'migrated.db'))
+    Migrate(app, db, directory=os.path.join(ROOT, 'migrations'))
+    with app.app_context():
+        upgrade()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.mark.parametrize('name', sorted(DASHBOARD_QUERIES))
+@pytest.mark.parametrize('after', [None, 1000], ids=['first page', 'later page'])
+def test_dashboard_query_uses_an_index(migrated, name, after):
+    assert table_walks(DASHBOARD_QUERIES[name](after)) == []
+
+def test_table_walks_catches_a_scan(migrated):
+    from app.models import Request
+    assert table_walks(Request.query.filter(Request.feedback == 'x')) == ['SCAN request']
@@ -0,0 +1,74 @@
+from app import db, scheduler
+from app.models import Task, User
+from tests.conftest import add_request
+
+def test_plan_assign_places_heaviest_first_on_the_least_loaded():
+    load = {'a': 0, 'b': 5}
+    plan = scheduler.plan_assign(load, [(1, 'x'), (8, 'y'), (2, 'z')])
+    assert plan == {'y': 'a', 'z': 'b', 'x': 'b'}
+    assert load == {'a': 8, 'b': 8}
+
+def test_plan_assign_without_members():
+    assert scheduler.plan_assign({}, [(1, 'x')]) == {}
+
+def test_plan_rebalance_evens_out_and_stops():
+    load = {'a': 12, 'b': 0}
+    assigned = {'a': [(4, 1), (4, 2), (4, 3)], 'b': []}
+    moves = scheduler.plan_rebalance(load, assigned)
+    assert len(moves) == 1 and set(moves.values()) == {'b'}
+    assert load == {'a': 8, 'b': 4}
+    # moving another 4 would only swap who carries more
+    assert scheduler.plan_rebalance(load, assigned) == {}
+
+def add_members(*names):
+    'names become the whole smtm subteam, instead of the fixture\'s user smtm'
+    User.query.filter_by(role='smtm').delete()
+    for name in names:
+        db.session.add(User(username=name, role='smtm'))
+    db.session.commit()
+
+def add_tasks(efforts, assignee=None, done=False):
+    req = add_request(assigned_to='sm', tasks_for='services')
+    tasks = [Task(task_name='task', subteam='smtm', created_by='sm', request=req.id, effort=effort,
+        assignee=assignee, completed_at=db.func.now() if done else None) for effort in efforts]
+    db.session.add_all(tasks)
+    db.session.commit()
+    return tasks
+
+def open_loads():
+    return scheduler.loads('smtm', scheduler.members('smtm'), 'effort')
+
+def test_auto_assign_spreads_open_tasks_by_effort(app):
+    add_members('alice', 'bob')
+    add_tasks([8, 4, 2, 2])
+    # done tasks carry no load, a task with someone outside the subteam is reassigned
+    add_tasks([16], assignee='alice', done=True)
+    add_tasks([1], assignee='pmtm')
+    plan = scheduler.auto_assign('smtm', 'effort')
+    db.session.commit()
+    assert len(plan) == 5
+    assert Task.query.filter(Task.completed_at.is_(None), Task.assignee.notin_(['alice', 'bob'])).count() == 0
+    assert sorted(open_loads().values()) == [8, 9]
+
+def test_rebalance_moves_work_off_the_busiest_member(app):
+    add_members('alice', 'bob', 'carol')
+    add_tasks([2] * 6, assignee='alice')
+    new, moved = scheduler.rebalance('smtm', 'count')
+    db.session.commit()
+    assert new == {}
+    assert len(moved) == 4
+    assert open_loads() == {'alice': 4, 'bob': 4, 'carol': 4}
+    assert scheduler.rebalance('smtm', 'count') == ({}, {})
+
+def test_assign_new_goes_to_the_least_loaded(app):
+    add_members('alice', 'bob')
+    add_tasks([4], assignee='alice')
+    task = Task(task_name='new', subteam='smtm', effort=2)
+    scheduler.assign_new('smtm', [task], 'effort')
+    assert task.assignee == 'bob'
+
+def test_subteam_without_members_stays_unassigned(app):
+    add_members()
+    tasks = add_tasks([1, 1])
+    assert scheduler.auto_assign('smtm', 'count') == {}
+    assert all(db.session.get(Task, t.id).assignee is None for t in tasks)
@@ -0,0 +1,66 @@
+from sqlalchemy import event
+from app import db, summary, workflow
+from app.models import Budget, SummaryCounter, User
+from tests.conftest import add_request
+
+def counters():
+    return sorted((c.metric, c.key, c.value) for c in SummaryCounter.query.filter(SummaryCounter.value != 0))
+
+def test_counters_follow_every_write(app):
+    first = add_request(client_budget=1000)
+    second = add_request(client_name='Spotify', client_budget=2500, assigned_to='am')
+    add_request(client_name='Klarna', client_budget=400, assigned_to='sm', tasks_for='services', status='Closed')
+    first.client_budget = 1500
+    first.assigned_to = 'fm'
+    db.session.commit()
+    workflow.transition_many([second.id], 'submit', User.query.filter_by(role='am').first())
+    db.session.commit()
+    db.session.add(Budget(budget_quote=700, created_by='fm'))
+    db.session.delete(first)
+    db.session.commit()
+    kept = counters()
+    assert ('requests_by_role', 'scso', 1) in kept
+    assert ('client_budget_by_creator', 'am', 2500) in kept
+    assert ('client_budget_by_creator', 'cso', 400) in kept
+    summary.rebuild()
+    db.session.commit()
+    assert counters() == kept
+
+def test_new_counters_add_up(app):
+    'the first change of a key creates its row, the next ones add to it'
+    changes = {('requests_by_status', 'Open'): 2, ('requests_by_role', 'hr'): 1}
+    with db.engine.begin() as connection:
+        summary.apply(connection, changes)
+    with db.engine.begin() as connection:
+        summary.apply(connection, changes)
+        summary.apply(connection, {('requests_by_role', 'hr'): -2})
+    rows = dict(((c.metric, c.key), c.value) for c in SummaryCounter.query)
+    assert rows == {('requests_by_status', 'Open'): 4, ('requests_by_role', 'hr'): 0}
+
+def test_one_statement_per_counter_for_a_batch(app, login):
+    items = [dict(client_name='Client {}'.format(n), event_type='Gala dinner', event_details='for 200 guests',
+        client_budget=1000 + n, status='Open') for n in range(50)]
+    statements = []
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if 'summary_counter' in statement:
+            statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        assert login('scso').post('/api/v1/requests', json=items).status_code == 201
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    # requests_by_role fm, requests_by_status Open, client_budget_by_creator scso
+    assert len(statements) == 3
+    kept = counters()
+    assert ('client_budget_by_creator', 'scso', sum(1000 + n for n in range(50))) in kept
+    summary.rebuild()
+    db.session.commit()
+    assert counters() == kept
+
+def test_rolled_back_changes_are_not_counted(app):
+    add_request()
+    kept = counters()
+    db.session.add(Budget(budget_quote=700, created_by='fm'))
+    db.session.flush()
+    db.session.rollback()
+    assert counters() == kept
@@ -0,0 +1,4 @@
+'entry for WSGI servers, e.g. `gunicorn wsgi:app`, without the migration tooling the `flask` command loads'
+from app import create_app
+
+app = create_app()